@@ -0,0 +1,64 @@
+import io
+import json
+
+import pytest
+
+from tools.convertor.utils import _iter_json_records
+
+
+def _records(text, read_chars):
+    return list(_iter_json_records(io.StringIO(text), read_chars=read_chars))
+
+
+@pytest.mark.parametrize("read_chars", [1, 2, 3, 4, 5, 6, 7, 8, 13, 1 << 20])
+@pytest.mark.parametrize("data", [
+    [6.5, 1e5, "a"],
+    [-0.25, 1.5e-3, 12345.678, 0, {"x": 2.5e10}, [1.0, 2]],
+    [{"a": 1.25, "b": "6."}, {"a": -3e2, "b": None}],
+])
+def test_number_split_at_buffer_edge(data, read_chars):
+    for indent in (None, 2):
+        assert _records(json.dumps(data, indent=indent), read_chars) == data
+
+
+@pytest.mark.parametrize("read_chars", [1, 3, 1 << 20])
+def test_truncated_array_raises(read_chars):
+    with pytest.raises(ValueError):
+        _records("[1.5, 2", read_chars)
+    with pytest.raises(ValueError):
+        _records("[1.5 x]", read_chars)
+
+
+def _convert(records, target, chunk_rows):
+    pytest.importorskip("pyarrow")
+    from tools.convertor.utils import convert_file
+    return convert_file(io.BytesIO(json.dumps(records).encode()), "JSON", target, chunk_rows=chunk_rows)
+
+
+@pytest.mark.parametrize("target", ["Parquet", "Feather"])
+def test_column_null_in_first_chunk(target):
+    import pandas as pd
+    records = [{"a": i, "b": None} for i in range(5)] + [{"a": None, "b": "x"}] * 5
+    ok, path = _convert(records, target, chunk_rows=5)
+    assert ok, path
+    df = pd.read_parquet(path) if target == "Parquet" else pd.read_feather(path)
+    assert df["b"].tolist()[5:] == ["x"] * 5
+    assert df["a"].tolist()[:5] == [0, 1, 2, 3, 4]
+
+
+def test_column_null_beyond_lookahead():
+    pa = pytest.importorskip("pyarrow")
+    from tools.convertor.columnar import frames_to_batches
+    import pandas as pd
+    frames = [pd.DataFrame({"a": [1, 2], "b": [None, None]}) for _ in range(3)] + [pd.DataFrame({"a": [3], "b": ["x"]})]
+    batches = list(frames_to_batches(frames, lookahead_rows=4))
+    # 超过预读行数仍全为空的列按文本列处理，之后出现的文本值可以写入
+    assert all(batch.schema.field("b").type == pa.string() for batch in batches)
+    assert sum(batch.num_rows for batch in batches) == 7
+
+
+@pytest.mark.parametrize("target", ["Parquet", "Feather"])
+def test_empty_input_fails(target):
+    ok, err = _convert([], target, chunk_rows=5)
+    assert not ok
+    assert "没有数据" in err
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from tools.shared.governor import FairSemaphore, ResourceGovernor, _Waiter
+
+
+def _waiter(sem, owner, granted, name):
+    waiter = _Waiter(owner, lambda: granted.append(name))
+    sem._enqueue(waiter)
+    return waiter
+
+
+def test_round_robin_across_owners():
+    sem = FairSemaphore("test", 1)
+    assert sem.try_acquire()
+    granted = []
+    for name in ("a1", "a2", "a3"):
+        _waiter(sem, "a", granted, name)
+    _waiter(sem, "b", granted, "b1")
+    _waiter(sem, "c", granted, "c1")
+    assert granted == []
+    for _ in range(5):
+        sem.release()
+    # 各所有者轮流取队首，a 排队的请求多也不会一直占用名额
+    assert granted == ["a1", "b1", "c1", "a2", "a3"]
+    assert sem.in_use == 1
+
+
+def test_try_acquire_does_not_jump_queue():
+    sem = FairSemaphore("test", 1)
+    assert sem.try_acquire()
+    _waiter(sem, "a", [], "a1")
+    sem.release()
+    assert sem.in_use == 1
+    assert not sem.try_acquire()
+
+
+def test_abandon_before_grant_leaves_queue():
+    sem = FairSemaphore("test", 1)
+    assert sem.try_acquire()
+    granted = []
+    gone = _waiter(sem, "a", granted, "a1")
+    _waiter(sem, "b", granted, "b1")
+    sem._abandon(gone)
+    assert "a" not in sem._queues
+    assert sem.in_use == 1
+    sem.release()
+    assert granted == ["b1"]
+    assert sem.in_use == 1
+
+
+def test_abandon_after_grant_returns_slot():
+    sem = FairSemaphore("test", 1)
+    granted = []
+    first = _waiter(sem, "a", granted, "a1")
+    _waiter(sem, "b", granted, "b1")
+    assert granted == ["a1"] and first.granted
+    # 已分到名额后才放弃（如取消恰好发生在分配之后），名额交给下一个排队者
+    sem._abandon(first)
+    assert granted == ["a1", "b1"]
+    assert sem.in_use == 1
+    sem.release()
+    assert sem.in_use == 0
+
+
+def test_cancelled_check_abandons_wait():
+    sem = FairSemaphore("test", 1)
+    assert sem.try_acquire()
+
+    def cancelled():
+        raise RuntimeError("cancelled")
+
+    with pytest.raises(RuntimeError):
+        sem.acquire("a", check=cancelled)
+    assert not sem._queues
+    sem.release()
+    assert sem.in_use == 0
+
+
+def test_cancelled_async_waiter_abandons_wait():
+    governor = ResourceGovernor({"test": 1})
+    sem = governor.resources["test"]
+
+    async def main():
+        async with governor.async_slot("test"):
+            task = asyncio.create_task(sem.acquire_async("job"))
+            await asyncio.sleep(0)
+            assert sem.waiting("job")[1] == 1
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            assert sem.waiting("job")[1] == 0
+
+    asyncio.run(main())
+    assert sem.in_use == 0
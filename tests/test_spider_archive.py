@@ -0,0 +1,18 @@
+from tools.spider.archive import make_snippet
+
+
+def test_snippet_highlights_each_match_once():
+    # 较短的关键词是较长关键词的一部分时，不会在已高亮的内容里再嵌套 <mark>
+    snippet = make_snippet("中文检索 检索", "检索 中文检索")
+    assert snippet == "<mark>中文检索</mark> <mark>检索</mark>"
+
+
+def test_snippet_is_case_insensitive():
+    snippet = make_snippet("Python 和 python", "PYTHON")
+    assert snippet == "<mark>Python</mark> 和 <mark>python</mark>"
+
+
+def test_snippet_escapes_html():
+    # 在原文上匹配后再转义，关键词不会匹配到转义产生的实体内部
+    snippet = make_snippet("<i>a&b</i> amp", "amp")
+    assert snippet == "&lt;i&gt;a&amp;b&lt;/i&gt; <mark>amp</mark>"
@@ -0,0 +1,19 @@
+from tools.spider.cli import _ShardJournal, shard_indices
+from tools.spider.journal import CrawlJournal
+
+
+def _ok(i):
+    return {"标题": f"t{i}", "链接": f"https://example.com/{i}", "内容": "x", "状态": "ok"}
+
+
+def test_resume_with_different_worker_count(tmp_path):
+    journal = CrawlJournal(str(tmp_path / "jobs.sqlite3"))
+    # 第一次用 2 个进程，各完成了分片中的第一个链接
+    for indices in shard_indices(5, 2):
+        _ShardJournal(journal, indices).record("cli-x", 0, _ok(indices[0]), True)
+    # 换成 3 个进程续爬：每个分片只恢复属于自己的链接，序号映射为分片内序号
+    restored = {}
+    for indices in shard_indices(5, 3):
+        for local, row in _ShardJournal(journal, indices).iter_succeeded("cli-x"):
+            restored[indices[local]] = row["链接"]
+    assert restored == {0: "https://example.com/0", 1: "https://example.com/1"}
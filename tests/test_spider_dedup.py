@@ -0,0 +1,86 @@
+import asyncio
+
+from tools.spider.dedup import DEDUP_MARK, STATUS_DUPLICATE, CrawlDedup, DedupStore
+
+BODY = "".join(f"第{i}段：同一篇文章被几十个站点转载，标题略改、正文末尾加了不同的广告尾巴。" for i in range(20))
+
+
+def _result(url, body=BODY):
+    return {"标题": "t", "链接": url, "内容": f"标题：t\n正文：{body}", "状态": "ok"}
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_waiter_gets_owner_url_after_success():
+    dedup = CrawlDedup(DEDUP_MARK)
+
+    async def main():
+        assert await dedup.claim("https://example.com/a?utm_source=x") is None
+        waiting = asyncio.create_task(dedup.claim("http://example.com/a"))
+        await asyncio.sleep(0)
+        assert not waiting.done()
+        await dedup.check("https://example.com/a?utm_source=x", _result("https://example.com/a?utm_source=x"), True)
+        return await asyncio.wait_for(waiting, 1)
+
+    assert _run(main()) == "https://example.com/a?utm_source=x"
+    assert dedup.skipped_fetches == 1
+
+
+def test_waiter_retakes_ownership_after_failure():
+    dedup = CrawlDedup(DEDUP_MARK)
+    url = "https://example.com/a"
+
+    async def main():
+        assert await dedup.claim(url) is None
+        second = asyncio.create_task(dedup.claim(url + "?utm_source=share"))
+        third = asyncio.create_task(dedup.claim(url + "?utm_campaign=feed"))
+        await asyncio.sleep(0)
+        # 先抓的链接失败：只有一个等待者接手抓取，另一个继续等待接手者的结果
+        await dedup.check(url, _result(url), False)
+        done, pending = await asyncio.wait({second, third}, timeout=1, return_when=asyncio.FIRST_COMPLETED)
+        assert len(done) == 1 and len(pending) == 1
+        winner = done.pop()
+        assert winner.result() is None
+        winner_url = url + "?utm_source=share" if winner is second else url + "?utm_campaign=feed"
+        await dedup.check(winner_url, _result(winner_url), True)
+        assert await asyncio.wait_for(pending.pop(), 1) == winner_url
+        # 之后同一文章的链接直接跳过
+        assert await dedup.claim(url) == winner_url
+
+    _run(main())
+    assert dedup.skipped_fetches == 2
+
+
+def test_near_duplicate_body_is_marked():
+    dedup = CrawlDedup(DEDUP_MARK)
+
+    async def main():
+        for url in ("https://a.example.com/1", "https://b.example.com/2"):
+            assert await dedup.claim(url) is None
+        first = await dedup.check("https://a.example.com/1", _result("https://a.example.com/1"), True)
+        second = await dedup.check("https://b.example.com/2", _result("https://b.example.com/2", BODY + "广告"), True)
+        return first, second
+
+    first, second = _run(main())
+    assert first["状态"] == "ok"
+    assert second["状态"] == STATUS_DUPLICATE
+    assert second["重复于"] == "https://a.example.com/1"
+
+
+def test_store_skips_url_seen_in_earlier_job(tmp_path):
+    store = DedupStore(str(tmp_path / "dedup.sqlite3"))
+    url = "https://example.com/a"
+
+    async def first_job():
+        dedup = CrawlDedup(DEDUP_MARK, store=store)
+        assert await dedup.claim(url) is None
+        await dedup.check(url, _result(url), True)
+
+    async def second_job():
+        dedup = CrawlDedup(DEDUP_MARK, store=store)
+        return await dedup.claim("http://example.com/a?utm_medium=feed")
+
+    _run(first_job())
+    assert _run(second_job()) == url
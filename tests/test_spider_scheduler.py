@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+from tools.spider import scheduler as scheduler_module
+from tools.spider.retry import FAIL_HTTP_429, FAIL_HTTP_5XX, FetchError
+from tools.spider.scheduler import HostLimiter, HostScheduler
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(scheduler_module.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_additive_increase_up_to_max(clock):
+    limiter = HostLimiter(initial=2, max_limit=4, rate=0)
+    limiter._adjust(0.1, True)
+    # 每次成功加 1/limit，即每轮（limit 个请求）约加 1
+    assert limiter.limit == pytest.approx(2.5)
+    for _ in range(50):
+        limiter._adjust(0.1, True)
+    assert limiter.limit == 4.0
+
+
+def test_failure_halves_once_per_latency_window(clock):
+    limiter = HostLimiter(initial=8, max_limit=8, rate=0)
+    limiter._adjust(0.5, True)
+    limiter._adjust(None, False)
+    assert limiter.limit == 4.0
+    # 同一个延迟周期内的连续失败只减一次，避免一批在途请求同时失败时直接降到 1
+    limiter._adjust(None, False)
+    assert limiter.limit == 4.0
+    clock[0] += 1.0
+    limiter._adjust(None, False)
+    assert limiter.limit == 2.0
+    clock[0] += 1.0
+    limiter._adjust(None, False)
+    clock[0] += 1.0
+    limiter._adjust(None, False)
+    assert limiter.limit == 1.0
+    assert limiter.failed == 5
+
+
+def test_slow_response_counts_as_congestion(clock):
+    limiter = HostLimiter(initial=4, max_limit=8, rate=0)
+    limiter._adjust(0.1, True)
+    before = limiter.limit
+    clock[0] += 10.0
+    limiter._adjust(5.0, True)
+    assert limiter.limit == before / 2
+
+
+@pytest.mark.parametrize("kind", [FAIL_HTTP_429, FAIL_HTTP_5XX])
+def test_http_error_in_slot_halves_host_limit(kind):
+    scheduler = HostScheduler(max_total=4, host_initial=4, host_max=4, host_rate=0)
+    url = "https://example.com/a"
+
+    async def main():
+        with pytest.raises(FetchError):
+            async with scheduler.slot(url):
+                raise FetchError(kind, status_code=429 if kind == FAIL_HTTP_429 else 503)
+
+    asyncio.run(main())
+    limiter = scheduler.limiter(url)
+    assert limiter.limit == 2.0
+    assert limiter.in_flight == 0
+    assert scheduler.snapshot()["example.com"]["failed"] == 1
+
+
+def test_cancelled_slot_does_not_adjust():
+    scheduler = HostScheduler(max_total=4, host_initial=4, host_max=4, host_rate=0)
+    url = "https://example.com/a"
+
+    async def main():
+        async def fetch():
+            async with scheduler.slot(url):
+                await asyncio.sleep(10)
+        task = asyncio.create_task(fetch())
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    limiter = scheduler.limiter(url)
+    assert limiter.limit == 4.0
+    assert limiter.in_flight == 0
+    assert limiter.failed == 0
+
+
+def test_host_limit_blocks_until_release():
+    limiter = HostLimiter(initial=1, max_limit=1, rate=0)
+
+    async def main():
+        await limiter.acquire()
+        second = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0.01)
+        assert not second.done()
+        await limiter.release(0.1, True)
+        await asyncio.wait_for(second, 1)
+        assert limiter.in_flight == 1
+
+    asyncio.run(main())
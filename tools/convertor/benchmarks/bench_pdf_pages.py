@@ -0,0 +1,76 @@
+"""
+PDF 按页并行提取基准：用不同进程数提取同一份 PDF 的文本和表格，对比耗时、加速比并核对结果与单进程一致。
+
+用法（在仓库根目录执行）：
+    python -m tools.convertor.benchmarks.bench_pdf_pages [PDF 文件] [-p 生成的页数] [-w 1,2,4,8]
+
+不指定 PDF 文件时生成一份每页含一段文字和一个表格的测试 PDF。
+"""
+import argparse
+import os
+import tempfile
+import time
+from fpdf import FPDF
+from tools.convertor.pdf_pages import MODE_TABLES, MODE_TEXT, PdfPagePool, extract_range, page_count
+
+
+def make_sample_pdf(pages, path):
+    pdf = FPDF()
+    pdf.set_font("Helvetica", size=9)
+    for n in range(pages):
+        pdf.add_page()
+        for i in range(30):
+            pdf.cell(0, 4, f"Page {n + 1} line {i + 1}: the quick brown fox jumps over the lazy dog {n * i}",
+                     new_x="LMARGIN", new_y="NEXT")
+        pdf.ln(4)
+        for row in range(12):
+            for col in range(6):
+                pdf.cell(30, 6, f"r{row}c{col}-{n}", border=1)
+            pdf.ln(6)
+    pdf.output(path)
+
+
+def _default_workers():
+    cpus = os.cpu_count() or 1
+    workers = [1]
+    while workers[-1] * 2 <= cpus:
+        workers.append(workers[-1] * 2)
+    if workers[-1] != cpus:
+        workers.append(cpus)
+    return workers
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PDF 按页并行提取的进程数扩展性基准")
+    parser.add_argument("pdf", nargs="?", help="PDF 文件，不指定时生成测试 PDF")
+    parser.add_argument("-p", "--pages", type=int, default=120, help="生成的测试 PDF 页数")
+    parser.add_argument("-w", "--workers", help="逗号分隔的进程数列表，默认 1、2、4…直到 CPU 核数")
+    args = parser.parse_args()
+    workers = [int(w) for w in args.workers.split(",")] if args.workers else _default_workers()
+
+    path = args.pdf
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(), "sample.pdf")
+        make_sample_pdf(args.pages, path)
+    total = page_count(path)
+    print(f"{path}：{total} 页，CPU 核数 {os.cpu_count()}")
+
+    for mode in (MODE_TEXT, MODE_TABLES):
+        expected = extract_range(path, 0, total, mode)
+        print(f"\n模式 {mode}")
+        print(f"{'进程数':>6}{'耗时 s':>10}{'页/秒':>10}{'加速':>8}  一致")
+        baseline = None
+        for n in workers:
+            pool = PdfPagePool(max_workers=n)
+            # 先提取一次启动子进程，计时不包含进程启动和模块导入
+            pool.extract(path, mode)
+            start = time.perf_counter()
+            result = pool.extract(path, mode)
+            elapsed = time.perf_counter() - start
+            pool.shutdown(wait=True)
+            baseline = baseline or elapsed
+            print(f"{n:>6}{elapsed:>10.2f}{total / elapsed:>10.1f}{baseline / elapsed:>7.1f}x  {'是' if result == expected else '否'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+import gzip
+
+# 列式格式（Parquet、Arrow IPC/Feather）和压缩 CSV 的读写，基于 pyarrow。
+# pyarrow 为可选依赖：未安装时 Parquet/Feather/zstd 不可用，gzip 压缩的 CSV 仍可通过 pandas 处理。
+
+# 文本 CSV 及其压缩格式对应的压缩算法
+CSV_CODECS = {"CSV": None, "CSV.gz": "gzip", "CSV.zst": "zstd"}
+# 能以 Arrow RecordBatch 直接读写的格式，两端都在其中时转换全程不经过 Python 对象
+ARROW_FORMATS = set(CSV_CODECS) | {"Parquet", "Feather"}
+# 只能通过 pyarrow 读写的格式
+ARROW_ONLY_FORMATS = {"CSV.zst", "Parquet", "Feather"}
+
+PARQUET_COMPRESSIONS = ["zstd", "snappy", "gzip", "none"]
+FEATHER_COMPRESSIONS = ["lz4", "zstd", "uncompressed"]
+
+# Parquet 每个行组的行数：行组越大压缩率和扫描效率越高，写入时需在内存中缓冲一个行组
+ROW_GROUP_ROWS = 1 << 18
+# Arrow 读取 CSV 时每块的字节数，列类型按第一块推断
+CSV_BLOCK_BYTES = 16 << 20
+# 第一批中有全为空值的列时，最多缓冲多少行等待后续批次确定其类型
+NULL_LOOKAHEAD_ROWS = 1 << 18
+# 输入没有任何数据行时的错误信息：不生成只有 0 字节的目标文件
+EMPTY_INPUT = "输入文件中没有数据"
+
+
+def has_arrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def require_arrow(fmt):
+    if not has_arrow():
+        raise ValueError(f"{fmt} 格式需要安装 pyarrow（pip install pyarrow）")
+
+
+def _rewind(source):
+    if hasattr(source, "seek"):
+        source.seek(0)
+
+
+class _KeepOpen:
+    """转交对文件对象的读写，但 close() 不关闭它：pyarrow 的流关闭或回收时会连带关闭底层文件。"""
+
+    def __init__(self, f):
+        self._f = f
+        self.closed = False
+
+    def __getattr__(self, name):
+        return getattr(self._f, name)
+
+    def close(self):
+        self.closed = True
+
+
+def _input_stream(source, codec):
+    import pyarrow as pa
+    if hasattr(source, "read"):
+        source = _KeepOpen(source)
+    return pa.input_stream(source, compression=codec)
+
+
+def open_csv_input(source, codec):
+    """返回可供 pandas.read_csv 读取的（解压后的）文件对象或路径。"""
+    if codec is None:
+        return source
+    if codec == "gzip":
+        return gzip.open(source, "rb")
+    require_arrow("CSV.zst")
+    return _input_stream(source, codec)
+
+
+def open_csv_output(out, codec):
+    """返回写入时自动压缩的文件对象，写完后需关闭（不会关闭 out）。"""
+    if codec is None:
+        return None
+    if codec == "gzip":
+        return gzip.GzipFile(fileobj=out, mode="wb")
+    require_arrow("CSV.zst")
+    import pyarrow as pa
+    return pa.CompressedOutputStream(pa.PythonFile(_KeepOpen(out), mode="w"), codec)
+
+
+def _iter_csv_batches(source, codec, strings=False):
+    from pyarrow import csv as pacsv
+    import pyarrow as pa
+    read_options = pacsv.ReadOptions(block_size=CSV_BLOCK_BYTES)
+    convert_options = None
+    if strings:
+        # 按第一块推断的类型与后面的数据冲突时，所有列按文本读取
+        with pacsv.open_csv(_input_stream(source, codec), read_options=read_options) as reader:
+            names = reader.schema.names
+        _rewind(source)
+        convert_options = pacsv.ConvertOptions(column_types={name: pa.string() for name in names})
+    with pacsv.open_csv(_input_stream(source, codec), read_options=read_options, convert_options=convert_options) as reader:
+        for batch in reader:
+            yield batch
+
+
+def iter_batches(source, filetype, batch_rows, csv_strings=False):
+    """按批读取 Arrow 可直接读取的格式，逐批产出 pyarrow.RecordBatch。"""
+    require_arrow(filetype)
+    if filetype in CSV_CODECS:
+        yield from _iter_csv_batches(source, CSV_CODECS[filetype], csv_strings)
+    elif filetype == "Parquet":
+        import pyarrow.parquet as pq
+        with pq.ParquetFile(source) as f:
+            yield from f.iter_batches(batch_size=batch_rows)
+    elif filetype == "Feather":
+        import pyarrow.ipc as ipc
+        with ipc.open_file(source) as reader:
+            for i in range(reader.num_record_batches):
+                yield reader.get_batch(i)
+    else:
+        raise ValueError("暂不支持的文件类型！")
+
+
+def _to_batch(df, schema, i):
+    import pyarrow as pa
+    try:
+        return pa.RecordBatch.from_pandas(df, schema=schema, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError) as e:
+        raise ValueError(f"第 {i + 1} 批数据的列类型与之前的批次不一致：{e}") from e
+
+
+def _fill_null_fields(schema, other):
+    """schema 中类型为 null（该列迄今全为空值）的字段改用 other 中同名字段的类型。"""
+    import pyarrow as pa
+    for index, field in enumerate(schema):
+        if pa.types.is_null(field.type):
+            j = other.get_field_index(field.name)
+            if j >= 0 and not pa.types.is_null(other.field(j).type):
+                schema = schema.set(index, field.with_type(other.field(j).type))
+    return schema
+
+
+def _has_null_fields(schema):
+    import pyarrow as pa
+    return any(pa.types.is_null(field.type) for field in schema)
+
+
+def _null_fields_to_string(schema):
+    """仍全为空值、无法推断类型的列按文本列写出。"""
+    import pyarrow as pa
+    for index, field in enumerate(schema):
+        if pa.types.is_null(field.type):
+            schema = schema.set(index, field.with_type(pa.string()))
+    return schema
+
+
+def frames_to_batches(frames, lookahead_rows=NULL_LOOKAHEAD_ROWS):
+    """
+    把 pandas DataFrame 批次转换为 RecordBatch，列类型以第一批为准。
+    第一批中全为空值的列类型未知：暂缓输出，直到后续批次中出现非空值，或缓冲超过 lookahead_rows 行
+    （此时仍全为空的列按文本列处理），再以确定后的类型转换已缓冲的批次。
+    """
+    import pyarrow as pa
+    schema = None
+    pending = []
+    pending_rows = 0
+    for i, df in enumerate(frames):
+        if pending or schema is None:
+            inferred = pa.Schema.from_pandas(df, preserve_index=False)
+            schema = inferred if schema is None else _fill_null_fields(schema, inferred)
+            pending.append((i, df))
+            pending_rows += len(df)
+            if _has_null_fields(schema) and pending_rows < lookahead_rows:
+                continue
+            schema = _null_fields_to_string(schema)
+            for j, frame in pending:
+                yield _to_batch(frame, schema, j)
+            pending, pending_rows = [], 0
+            continue
+        yield _to_batch(df, schema, i)
+    if pending:
+        schema = _null_fields_to_string(schema)
+        for j, frame in pending:
+            yield _to_batch(frame, schema, j)
+
+
+def batches_to_frames(batches):
+    for batch in batches:
+        yield batch.to_pandas()
+
+
+def _write_parquet(batches, out, row_group_rows, compression):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    writer = None
+    pending = []
+    pending_rows = 0
+    try:
+        for batch in batches:
+            if writer is None:
+                writer = pq.ParquetWriter(out, batch.schema, compression=compression or "snappy")
+            pending.append(batch)
+            pending_rows += batch.num_rows
+            # 攒够一个行组再写，避免小批次产生大量小行组
+            if pending_rows >= row_group_rows:
+                writer.write_table(pa.Table.from_batches(pending), row_group_size=row_group_rows)
+                pending, pending_rows = [], 0
+            yield batch.num_rows
+        if writer is None:
+            raise ValueError(EMPTY_INPUT)
+        if pending:
+            writer.write_table(pa.Table.from_batches(pending), row_group_size=row_group_rows)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def _write_feather(batches, out, compression):
+    import pyarrow.ipc as ipc
+    compression = compression or "lz4"
+    options = ipc.IpcWriteOptions(compression=None if compression == "uncompressed" else compression)
+    writer = None
+    try:
+        for batch in batches:
+            if writer is None:
+                writer = ipc.new_file(out, batch.schema, options=options)
+            writer.write_batch(batch)
+            yield batch.num_rows
+        if writer is None:
+            raise ValueError(EMPTY_INPUT)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def _write_csv(batches, out, codec):
+    import pyarrow as pa
+    from pyarrow import csv as pacsv
+    sink = pa.PythonFile(_KeepOpen(out), mode="w")
+    if codec is not None:
+        sink = pa.CompressedOutputStream(sink, codec)
+    writer = None
+    try:
+        for batch in batches:
+            if writer is None:
+                writer = pacsv.CSVWriter(sink, batch.schema)
+            writer.write_batch(batch)
+            yield batch.num_rows
+        if writer is None:
+            raise ValueError(EMPTY_INPUT)
+    finally:
+        if writer is not None:
+            writer.close()
+        if codec is not None:
+            sink.close()
+
+
+def write_batches(batches, out, target_format, row_group_rows=ROW_GROUP_ROWS, compression=None):
+    """把 RecordBatch 逐批写入 out，每写完一批产出该批行数；compression 为 None 时 Parquet 用 snappy、Feather 用 lz4。"""
+    if target_format == "Parquet":
+        return _write_parquet(batches, out, row_group_rows, compression)
+    if target_format == "Feather":
+        return _write_feather(batches, out, compression)
+    return _write_csv(batches, out, CSV_CODECS[target_format])
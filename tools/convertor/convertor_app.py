@@ -1,6 +1,14 @@
 import streamlit as st
+import io
 import os
-from tools.convertor.utils import read_file, convert_and_download, json_to_pdf, pdf_to_docx, docx_to_pdf, pdf_tables_to_docx
+from functools import partial
+from tools.convertor.columnar import FEATHER_COMPRESSIONS, PARQUET_COMPRESSIONS, ROW_GROUP_ROWS
+from tools.convertor.utils import DATA_FORMATS, DATA_SUFFIXES, detect_filetype, read_file, convert_file, json_to_pdf, pdf_to_docx, docx_to_pdf, pdf_tables_to_docx
+from tools.shared.governor import RESOURCE_WORKERS, get_governor
+from tools.shared.job_view import job_panel, submit_job
+from tools.shared.jobs import JOB_DONE
+from tools.shared.memory import track_rss
+from tools.shared.upload_cache import get_upload_cache
 
 # 格式转换工具主文件
 # 按照 .cursorrules 规范，定义 PROJECT_META 供主入口自动聚合
@@ -12,6 +20,76 @@ PROJECT_META = {
     "entry": "tools/convertor/convertor_app.py"
 }
 
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+DATA_MIMES = {
+    "CSV": "text/csv",
+    "Excel": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "JSON": "application/json",
+    "CSV.gz": "application/gzip",
+    "CSV.zst": "application/zstd",
+    "Parquet": "application/vnd.apache.parquet",
+    "Feather": "application/vnd.apache.arrow.file",
+}
+
+def _convert_job(job, func, data, download, as_bytes, with_progress, unit):
+    # 上传文件在提交前已读成字节，后台线程中不再访问 UploadedFile
+    # 转换是 CPU 密集任务，占用一个全局计算进程名额，多人同时转换时排队
+    job.update(message="等待计算资源...")
+    with get_governor().slot(RESOURCE_WORKERS, check=job.check_cancelled), track_rss() as rss:
+        job.update(message="正在转换...")
+        source = data if as_bytes else io.BytesIO(data)
+        if with_progress:
+            def progress(done, total=None):
+                job.check_cancelled()
+                rss.sample()
+                job.update(done=done, total=total, message=f"已转换 {done} {unit}")
+            ok, out_path = func(source, progress=progress)
+        else:
+            ok, out_path = func(source)
+    return {"ok": ok, "path": out_path, "memory": rss.summary(), **download}
+
+def submit_convert_job(session_key, title, func, file, download, as_bytes=False, with_progress=False, unit="行"):
+    """
+    把耗时的文档转换提交为后台任务，download 为结果下载按钮的 label/file_name/mime/success。
+    with_progress 为 True 时 func 还会收到 progress(已完成数, 总数=None) 回调，用于汇报进度和响应取消，unit 为进度单位。
+    """
+    submit_job(session_key, "convertor", _convert_job, func, file.getvalue(), download, as_bytes, with_progress, unit, title=title)
+
+def _file_reader(path):
+    """返回在下载时才读取文件的回调：Streamlit 不会关闭回调返回的文件对象，因此直接返回读出的字节。"""
+    def read():
+        with open(path, "rb") as f:
+            return f.read()
+    return read
+
+def show_convert_job(session_key):
+    """显示转换任务进度，完成后给出下载按钮或错误信息。"""
+    job = job_panel(session_key)
+    if job is None or job.status != JOB_DONE:
+        return
+    result = job.result
+    if result["ok"] and result["path"] and os.path.exists(result["path"]):
+        path = result["path"]
+        st.success(result["success"])
+        # 结果文件在点击下载时才读取
+        st.download_button(
+            label=result["label"],
+            data=_file_reader(path),
+            file_name=result["file_name"],
+            mime=result["mime"],
+            key=f"{session_key}_download",
+            on_click="ignore",
+        )
+        st.caption(result["memory"])
+    else:
+        st.error(f"{job.title}失败：{result['path']}")
+
+def _docx_download(segment_pages, name):
+    """PDF 转 Word 结果的下载信息，分段输出时为 zip。"""
+    if segment_pages:
+        return {"label": "下载 Word 分段压缩包", "file_name": f"{name}.zip", "mime": "application/zip"}
+    return {"label": "下载 Word 文件", "file_name": f"{name}.docx", "mime": DOCX_MIME}
+
 def main():
     # 侧边栏：仅保留本工具相关配置
     with st.sidebar:
@@ -26,41 +104,54 @@ def main():
     with main_tab:
         col1, col2 = st.columns(2)
         with col1:
-            with st.expander("数据文件互转（CSV/Excel/JSON）", expanded=True):
+            with st.expander("数据文件互转（CSV/Excel/JSON/Parquet/Feather）", expanded=True):
+                file = st.file_uploader("上传文件 (CSV, CSV.gz, CSV.zst, Excel, JSON, Parquet, Feather)", type=["csv", "gz", "zst", "xlsx", "json", "parquet", "pq", "feather", "arrow"], key="data_file")
+                filetype = detect_filetype(file.name) if file is not None else None
+                err = None
+                if file is not None and filetype is None:
+                    st.error("暂不支持的文件类型！")
+                elif filetype:
+                    # 只读取前 20 行预览，按文件内容缓存，切换选项、下载结果等操作重跑时不再重新解析；
+                    # 完整转换在后台按批流式进行
+                    df, err = get_upload_cache().parse(file, read_file, filetype=filetype)
+                    if err:
+                        st.error(err)
+                    else:
+                        st.success(f"已成功读取 {filetype} 文件，数据预览（前 20 行）：")
+                        st.dataframe(df, use_container_width=True)
                 with st.form("data_convert_form"):
-                    file = st.file_uploader("上传文件 (CSV, Excel, JSON)", type=["csv", "xlsx", "json"], key="data_file")
+                    # 目标格式不含上传文件本身的格式
+                    target_format = st.selectbox("选择目标格式", [f for f in DATA_FORMATS if f != filetype], key="target_format")
+                    # 以下选项只在目标格式为 Parquet/Feather 时生效
+                    opt1, opt2, opt3 = st.columns(3)
+                    with opt1:
+                        parquet_compression = st.selectbox("Parquet 压缩算法", PARQUET_COMPRESSIONS, key="parquet_compression")
+                    with opt2:
+                        row_group_rows = st.number_input("Parquet 行组行数", min_value=1000, max_value=10000000, value=ROW_GROUP_ROWS, step=10000, key="row_group_rows", help="行组越大压缩率和查询效率越高，转换时占用的内存也越多")
+                    with opt3:
+                        feather_compression = st.selectbox("Feather 压缩算法", FEATHER_COMPRESSIONS, key="feather_compression")
                     submit_btn = st.form_submit_button("开始转换")
                 if submit_btn:
                     if file is None:
                         st.warning("请先上传需要转换的文件。")
-                    else:
-                        filetype = None
-                        if file.name.endswith(".csv"):
-                            filetype = "CSV"
-                        elif file.name.endswith(".xlsx"):
-                            filetype = "Excel"
-                        elif file.name.endswith(".json"):
-                            filetype = "JSON"
-                        else:
-                            st.error("暂不支持的文件类型！")
-                        if filetype:
-                            with st.spinner("正在读取文件..."):
-                                df, err = read_file(file, filetype)
-                            if err:
-                                st.error(err)
-                            else:
-                                st.success(f"已成功读取 {filetype} 文件，数据预览：")
-                                st.dataframe(df.head(20), use_container_width=True)
-                                target_format = st.selectbox("选择目标格式", [f for f in ["CSV", "Excel", "JSON"] if f != filetype], key="target_format")
-                                if st.button("下载转换结果", key="download_btn"):
-                                    ok, err2 = convert_and_download(df, target_format, filename_prefix="converted")
-                                    if not ok and err2:
-                                        st.error(err2)
+                    elif filetype and not err:
+                        suffix = DATA_SUFFIXES[target_format]
+                        submit_convert_job("data_convert_job", f"{filetype} 转 {target_format}", partial(
+                            convert_file, filetype=filetype, target_format=target_format, row_group_rows=int(row_group_rows),
+                            compression={"Parquet": parquet_compression, "Feather": feather_compression}.get(target_format),
+                        ), file, {
+                            "label": f"下载{target_format}文件",
+                            "file_name": f"converted{suffix}",
+                            "mime": DATA_MIMES[target_format],
+                            "success": "转换完成！请点击下方按钮下载。",
+                        }, with_progress=True)
+                show_convert_job("data_convert_job")
             with st.expander("PDF ↔ Word 智能互转/表格提取", expanded=True):
             
                 with st.form("pdf_word_form"):
                     file = st.file_uploader("上传 PDF 或 Word 文件（自动识别互转/表格提取）", type=["pdf", "docx"], key="pdf_word_file")
                     only_table = st.checkbox("仅提取 PDF 表格为 Word 表格", key="only_table")
+                    segment_pages = st.number_input("PDF 分段输出：每多少页保存为一个 Word 文件（0 为不分段）", min_value=0, max_value=100000, value=0, step=100, key="segment_pages", help="数百页以上的大 PDF 建议分段，转换时内存中只保留一个分段，结果打包为 zip 下载")
                     submit_convert = st.form_submit_button("开始转换")
                 st.info("⚠️ 高保真 PDF 转 Word（完全还原排版/图片/表格）请使用专业工具（如Adobe、WPS、Smallpdf等）。本工具仅支持简单文本和表格的提取，复杂排版和图片无法还原。\n\n如需仅提取 PDF 表格为 Word 表格，请勾选下方选项。")
 
@@ -73,50 +164,26 @@ def main():
                             if ext != ".pdf":
                                 st.error("仅提取表格功能只支持 PDF 文件！")
                             else:
-                                with st.spinner("正在提取 PDF 表格..."):
-                                    ok, out_path = pdf_tables_to_docx(file)
-                                if ok and out_path and os.path.exists(out_path):
-                                    with open(out_path, "rb") as f:
-                                        st.success("Word 表格文件生成成功！请点击下方按钮下载。\n\n⚠️ 仅支持简单表格，复杂表格样式、合并单元格等无法还原。")
-                                        st.download_button(
-                                            label="下载 Word 文件",
-                                            data=f.read(),
-                                            file_name="pdf_tables.docx",
-                                            mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-                                        )
-                                else:
-                                    st.error(f"PDF 表格提取失败：{out_path}")
+                                submit_convert_job("pdf_word_job", "PDF 表格提取", partial(pdf_tables_to_docx, segment_pages=segment_pages), file, {
+                                    **_docx_download(segment_pages, "pdf_tables"),
+                                    "success": "Word 表格文件生成成功！请点击下方按钮下载。\n\n⚠️ 仅支持简单表格，复杂表格样式、合并单元格等无法还原。",
+                                }, with_progress=True, unit="页")
                         else:
                             if ext == ".pdf":
-                                with st.spinner("正在将 PDF 转为 Word..."):
-                                    ok, out_path = pdf_to_docx(file)
-                                if ok and out_path and os.path.exists(out_path):
-                                    with open(out_path, "rb") as f:
-                                        st.success("Word 文件生成成功！请点击下方按钮下载。\n\n⚠️ 仅支持简单文本，复杂排版/图片/表格无法还原。")
-                                        st.download_button(
-                                            label="下载 Word 文件",
-                                            data=f.read(),
-                                            file_name="converted.docx",
-                                            mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-                                        )
-                                else:
-                                    st.error(f"PDF 转 Word 失败：{out_path}")
+                                submit_convert_job("pdf_word_job", "PDF 转 Word", partial(pdf_to_docx, segment_pages=segment_pages), file, {
+                                    **_docx_download(segment_pages, "converted"),
+                                    "success": "Word 文件生成成功！请点击下方按钮下载。\n\n⚠️ 仅支持简单文本，复杂排版/图片/表格无法还原。",
+                                }, with_progress=True, unit="页")
                             elif ext == ".docx":
-                                with st.spinner("正在将 Word 转为 PDF..."):
-                                    ok, out_path = docx_to_pdf(file)
-                                if ok and out_path and os.path.exists(out_path):
-                                    with open(out_path, "rb") as f:
-                                        st.success("PDF 文件生成成功！请点击下方按钮下载。")
-                                        st.download_button(
-                                            label="下载 PDF 文件",
-                                            data=f.read(),
-                                            file_name="converted.pdf",
-                                            mime="application/pdf"
-                                        )
-                                else:
-                                    st.error(f"Word 转 PDF 失败：{out_path}")
+                                submit_convert_job("pdf_word_job", "Word 转 PDF", docx_to_pdf, file, {
+                                    "label": "下载 PDF 文件",
+                                    "file_name": "converted.pdf",
+                                    "mime": "application/pdf",
+                                    "success": "PDF 文件生成成功！请点击下方按钮下载。",
+                                })
                             else:
                                 st.error("仅支持 PDF 或 Word 文件！")
+                show_convert_job("pdf_word_job")
         with col2:
             with st.expander("JSON 转 PDF", expanded=True):
                 with st.form("json2pdf_form"):
@@ -126,19 +193,13 @@ def main():
                     if json_file is None:
                         st.warning("请上传 JSON 文件。")
                     else:
-                        with st.spinner("正在生成 PDF..."):
-                            ok, pdf_path_or_err = json_to_pdf(json_file.read())
-                        if ok and pdf_path_or_err and os.path.exists(pdf_path_or_err):
-                            with open(pdf_path_or_err, "rb") as f:
-                                st.success("PDF 生成成功！请点击下方按钮下载。")
-                                st.download_button(
-                                    label="下载 PDF 文件",
-                                    data=f.read(),
-                                    file_name="converted.pdf",
-                                    mime="application/pdf"
-                                )
-                        else:
-                            st.error(f"PDF 生成失败：{pdf_path_or_err}")
+                        submit_convert_job("json2pdf_job", "JSON 转 PDF", json_to_pdf, json_file, {
+                            "label": "下载 PDF 文件",
+                            "file_name": "converted.pdf",
+                            "mime": "application/pdf",
+                            "success": "PDF 生成成功！请点击下方按钮下载。",
+                        }, as_bytes=True)
+                show_convert_job("json2pdf_job")
 
     with usage_tab:
         st.markdown("""
@@ -147,7 +208,7 @@ def main():
 本工具用于常见文件格式的互转，适合批量数据处理、格式兼容等场景。
 
 ### 主要功能
-- 支持 CSV、Excel、JSON 文件互转
+- 支持 CSV、Excel、JSON、Parquet、Feather（Arrow IPC）以及 gzip/zstd 压缩的 CSV 文件互转
 - 支持 PDF ↔ Word 智能互转（仅文本，复杂排版/图片/表格无法还原）
 - 支持 PDF 表格提取为 Word 表格（仅结构化内容，复杂表格样式、合并单元格等无法还原）
 - 支持 JSON 转 PDF
@@ -159,7 +220,15 @@ def main():
 3. 下载转换后的文件
 
 ### 注意事项
-- 文件大小建议不超过 20MB
+- CSV、Excel、JSON 互转按批流式处理，内存占用与文件大小无关，可在上传大小上限内转换大文件；Excel 超过 1048576 行时自动续写到新工作表
+- CSV（含压缩 CSV）、Parquet、Feather 之间互转直接按 Arrow 列式批次读写，不经过 pandas，速度更快；Parquet、Feather、zstd 压缩 CSV 需要安装 pyarrow
+- CSV 列类型按开头的数据推断，后面出现不符合的值（如数字列中夹杂文本）时会自动改为全部按文本列重新转换
+- 转为 Parquet 时可选择压缩算法和行组行数：zstd 压缩率高，snappy 读写最快；行组越大压缩越好，但转换时需在内存中缓冲一个行组
+- 大 JSON 文件请使用顶层为数组的格式（可逐条解析）；转为 CSV、Excel 时以前 5 万条记录中出现的字段作为列
+- PDF、Word 文件大小建议不超过 20MB
+- PDF 转 Word 和表格提取按页分给多个进程并行处理，只使用当时空闲的计算资源，多人同时使用时不会占满服务器
+- PDF 逐页提取、逐页写出，每页的解析缓存用完即释放；数百页以上的大 PDF 建议设置“分段输出”，每个分段单独保存为 Word 文件并打包为 zip，内存占用与总页数无关
+- 转换完成后会显示本次转换的峰值内存，便于判断服务器内存是否够用
 - 数据文件需为标准格式，避免乱码
 - 图片格式互转功能暂未开放
 - JSON 转 PDF 需保证 JSON 格式正确
@@ -169,6 +238,7 @@ def main():
 
 ### 场景举例
 - 批量将 Excel/CSV/JSON 数据互转，便于数据分析和导入导出
+- 将大 CSV 转为 Parquet，体积更小，便于在 pandas、DuckDB、Spark 等工具中分析
 - 将 PDF 文本内容快速提取为 Word 文档，便于编辑和二次处理
 - 将 PDF 中结构化表格内容导出为 Word 表格，便于数据整理
 - 将 JSON 数据生成 PDF 报告，便于归档和分享
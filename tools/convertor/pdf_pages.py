@@ -0,0 +1,200 @@
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from collections import deque
+from concurrent.futures.process import BrokenProcessPool
+
+import pdfplumber
+
+from tools.shared.governor import RESOURCE_WORKERS, get_governor
+from tools.shared.memory import current_tracker, peak_rss
+
+MODE_TEXT = "text"
+MODE_TABLES = "tables"
+
+# 每个子任务最多处理的页数：越小进度越细、负载越均衡，越大重复打开 PDF 的开销越少
+MAX_PAGES_PER_TASK = 16
+# 页数少于此值时直接在当前线程提取，不值得把任务分给子进程
+MIN_PARALLEL_PAGES = 8
+# 在当前线程中逐页提取时，每隔多少页重新打开一次 PDF：
+# pdfminer 会缓存已解析的对象（含解码后的内容流），只开一次时内存随页数增长
+PAGES_PER_OPEN = 64
+
+
+class ProgressAborted(Exception):
+    """进度回调抛出异常（如任务取消）时中止提取，原异常在 error 中，供调用方原样抛出。"""
+
+    def __init__(self, error):
+        super().__init__(str(error))
+        self.error = error
+
+
+def _extract_page(page, mode):
+    if mode == MODE_TEXT:
+        return page.extract_text() or ""
+    return [table for table in page.extract_tables() if table]
+
+
+def iter_range(pdf_path, start, end, mode):
+    """逐页提取第 start 到 end - 1 页（从 0 开始），每 PAGES_PER_OPEN 页重新打开一次 PDF，内存不随页数增长。"""
+    for open_start in range(start, end, PAGES_PER_OPEN):
+        open_end = min(open_start + PAGES_PER_OPEN, end)
+        with pdfplumber.open(pdf_path, pages=list(range(open_start + 1, open_end + 1))) as pdf:
+            for page in pdf.pages:
+                result = _extract_page(page, mode)
+                # 释放该页解析出的字符、线条等对象
+                page.close()
+                yield result
+
+
+def extract_range(pdf_path, start, end, mode):
+    """提取第 start 到 end - 1 页，返回每页结果的列表。"""
+    return list(iter_range(pdf_path, start, end, mode))
+
+
+def _extract_range_worker(pdf_path, start, end, mode):
+    # 在子进程中执行，同时返回子进程的内存峰值
+    return extract_range(pdf_path, start, end, mode), peak_rss()
+
+
+def page_count(pdf_path):
+    with pdfplumber.open(pdf_path) as pdf:
+        return len(pdf.pages)
+
+
+def split_pages(total, workers):
+    """把 total 页切分为 (起始页, 结束页) 区间，每个进程约分到 4 个区间以均衡负载。"""
+    size = max(1, min(MAX_PAGES_PER_TASK, math.ceil(total / (workers * 4))))
+    return [(start, min(start + size, total)) for start in range(0, total, size)]
+
+
+class PdfPagePool:
+    """
+    按页并行提取 PDF 文本或表格：页码区间分给多个子进程，结果按页序合并。
+    传入 governor（ResourceGovernor）时，调用方任务本身已占有一个计算进程名额，
+    额外的并行度只使用当时空闲的名额，与其他转换、正文清洗任务合计不超过全局上限。
+    """
+
+    def __init__(self, max_workers=None, governor=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.governor = governor
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn 启动子进程，避免在多线程的 Streamlit 进程中 fork
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def _reset_executor(self, broken):
+        with self._lock:
+            if self._executor is broken:
+                self._executor = None
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def extract(self, pdf_path, mode=MODE_TEXT, progress=None):
+        """返回每页提取结果的列表（按页序），参数和结果同 iter_pages。"""
+        return list(self.iter_pages(pdf_path, mode, progress))
+
+    def iter_pages(self, pdf_path, mode=MODE_TEXT, progress=None):
+        """
+        按页序逐页产出提取结果：文本模式为字符串，表格模式为该页表格的列表。
+        只缓冲乱序完成的少量区间，内存占用与总页数无关，调用方可边提取边写出。
+        progress(已完成页数, 总页数) 在每个区间（串行提取时每页）完成后调用，抛出异常时中止并抛出 ProgressAborted。
+        """
+        total = page_count(pdf_path)
+        if total < MIN_PARALLEL_PAGES or self.max_workers == 1:
+            yield from self._iter_serial(pdf_path, mode, progress, 0, total, total)
+        elif self.governor is None:
+            yield from self._iter_parallel(pdf_path, mode, progress, total, self.max_workers)
+        else:
+            with self.governor.extra_slots(RESOURCE_WORKERS, self.max_workers - 1) as extra:
+                yield from self._iter_parallel(pdf_path, mode, progress, total, extra + 1)
+
+    @staticmethod
+    def _report(progress, done, total):
+        if progress is not None:
+            try:
+                progress(done, total)
+            except Exception as e:
+                raise ProgressAborted(e) from e
+
+    def _iter_serial(self, pdf_path, mode, progress, start, end, total, done=0):
+        """在当前线程中提取 start 到 end - 1 页，每页完成后汇报进度。"""
+        for result in iter_range(pdf_path, start, end, mode):
+            done += 1
+            self._report(progress, done, total)
+            yield result
+
+    def _iter_parallel(self, pdf_path, mode, progress, total, parallel):
+        ranges = split_pages(total, parallel)
+        if parallel <= 1:
+            yield from self._iter_serial(pdf_path, mode, progress, 0, total, total)
+            return
+        tracker = current_tracker()
+        executor = self._get_executor()
+        queue = deque(ranges)
+        pending = {}
+        # 已完成但前面还有区间未完成的结果，按起始页暂存
+        buffer = {}
+        done = 0
+        broken = False
+        try:
+            for start, end in ranges:
+                while start not in buffer and not broken:
+                    # 在途和暂存的区间合计不超过并行度的两倍，慢区间不会让暂存结果无限堆积
+                    while queue and len(pending) + len(buffer) < parallel * 2:
+                        s, e = queue.popleft()
+                        pending[executor.submit(_extract_range_worker, pdf_path, s, e, mode)] = (s, e)
+                    finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        s, e = pending.pop(future)
+                        try:
+                            pages, worker_peak = future.result()
+                        except BrokenProcessPool:
+                            # 子进程异常退出（如内存不足被杀）时重建进程池，剩余页在当前线程中完成
+                            self._reset_executor(executor)
+                            broken = True
+                            break
+                        buffer[s] = pages
+                        if tracker is not None:
+                            tracker.add_child_peak(worker_peak)
+                        done += e - s
+                        self._report(progress, done, total)
+                if start in buffer:
+                    yield from buffer.pop(start)
+                else:
+                    for result in self._iter_serial(pdf_path, mode, progress, start, end, total, done):
+                        done += 1
+                        yield result
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def shutdown(self, wait=False):
+        """关闭进程池；进程即将退出时应传 wait=True，等子进程退出后再返回。"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_pdf_pool():
+    """获取进程级共享的 PDF 按页提取进程池，进程数与全局计算进程上限一致。"""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            governor = get_governor()
+            _POOL = PdfPagePool(max_workers=governor.resources[RESOURCE_WORKERS].capacity, governor=governor)
+        return _POOL
@@ -1,4 +1,3 @@
-import streamlit as st
 import pandas as pd
 import io
 import json
@@ -8,8 +7,14 @@ import tempfile
 from pathlib import Path
 import os
 import logging
-import pdfplumber
+import zipfile
 from docx import Document
+from tools.convertor.columnar import (
+    ARROW_FORMATS, ARROW_ONLY_FORMATS, CSV_CODECS, ROW_GROUP_ROWS,
+    batches_to_frames, frames_to_batches, iter_batches, open_csv_input, open_csv_output,
+    require_arrow, write_batches,
+)
+from tools.convertor.pdf_pages import MODE_TABLES, MODE_TEXT, ProgressAborted, get_pdf_pool
 
 # 设置日志
 logging.basicConfig(level=logging.INFO)
@@ -76,70 +81,364 @@ def json_to_pdf(content):
     except Exception as e:
         return False, f"生成PDF时出错: {str(e)}"
 
-def read_file(file, filetype):
-    """根据文件类型读取数据，返回DataFrame或dict，异常时返回None和错误信息"""
+# 流式转换时每批处理的行数，内存占用只与批大小有关，与文件总大小无关
+CHUNK_ROWS = 50000
+# JSON 流式解析每次读取的字符数
+JSON_READ_CHARS = 1 << 20
+# Excel 单个工作表最多行数（含表头），超出后续写到新工作表
+EXCEL_MAX_ROWS = 1048576
+
+DATA_SUFFIXES = {
+    "CSV": ".csv", "Excel": ".xlsx", "JSON": ".json",
+    "CSV.gz": ".csv.gz", "CSV.zst": ".csv.zst", "Parquet": ".parquet", "Feather": ".feather",
+}
+DATA_FORMATS = list(DATA_SUFFIXES)
+
+# 文件名后缀到格式的对应，长后缀在前
+_SUFFIX_FORMATS = [
+    (".csv.gz", "CSV.gz"), (".csv.zst", "CSV.zst"), (".csv.zstd", "CSV.zst"),
+    (".csv", "CSV"), (".xlsx", "Excel"), (".json", "JSON"),
+    (".parquet", "Parquet"), (".pq", "Parquet"), (".feather", "Feather"), (".arrow", "Feather"),
+]
+
+def detect_filetype(name):
+    """根据文件名判断数据文件格式，无法识别时返回 None。"""
+    name = name.lower()
+    for suffix, fmt in _SUFFIX_FORMATS:
+        if name.endswith(suffix):
+            return fmt
+    return None
+
+def _json_records(data):
+    """按原有规则从 JSON 对象或数组中取出记录列表。"""
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict):
+        for v in data.values():
+            if isinstance(v, list):
+                return v
+        return [data]
+    raise ValueError("JSON结构不支持，仅支持对象或数组。")
+
+def _iter_json_records(f, read_chars=JSON_READ_CHARS):
+    """
+    逐条解析顶层为数组的 JSON 文件，缓冲区只保留尚未解析的部分。
+    顶层为对象时（记录在对象的某个数组字段中）无法流式解析，整体读入后按原有规则取记录。
+    """
+    decoder = json.JSONDecoder()
+    buf = f.read(read_chars)
+    pos = len(buf) - len(buf.lstrip())
+    if not buf[pos:pos + 1] == "[":
+        yield from _json_records(json.loads(buf + f.read()))
+        return
+    pos += 1
+    while True:
+        while pos < len(buf) and (buf[pos].isspace() or buf[pos] == ","):
+            pos += 1
+        if pos < len(buf) and buf[pos] == "]":
+            return
+        end = None
+        nxt = pos
+        if pos < len(buf):
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                end = None
+        if end is not None:
+            nxt = end
+            while nxt < len(buf) and buf[nxt].isspace():
+                nxt += 1
+        # 只有后面已读到 , 或 ] 时才确认该条记录完整：数字可能在缓冲区边界被截断（如 "6." 会被解析为 6）；
+        # 解析失败（记录跨越缓冲区）或无法确认时读入更多后重新解析，
+        # 单条记录超过缓冲区时按已缓冲的大小加倍读取，避免反复重新解析
+        if end is None or nxt == len(buf) or buf[nxt] not in ",]":
+            more = f.read(max(read_chars, len(buf) - pos))
+            if more:
+                buf = buf[pos:] + more
+                pos = 0
+                continue
+            raise ValueError("JSON 数组缺少结尾的 ]" if end is not None and nxt == len(buf) else "JSON 文件不完整或格式错误")
+        yield obj
+        pos = end
+        if pos > read_chars:
+            buf = buf[pos:]
+            pos = 0
+
+def _batched_frames(records, chunk_rows, columns=None):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= chunk_rows:
+            yield pd.DataFrame(batch, columns=columns)
+            batch = []
+    if batch:
+        yield pd.DataFrame(batch, columns=columns)
+
+def _iter_excel_chunks(source, chunk_rows):
+    from openpyxl import load_workbook
+    wb = load_workbook(source, read_only=True, data_only=True)
     try:
-        if filetype == "CSV":
-            return pd.read_csv(file), None
-        elif filetype == "Excel":
-            return pd.read_excel(file), None
-        elif filetype == "JSON":
-            text = file.read()
-            data = json.loads(text)
-            if isinstance(data, list):
-                return pd.DataFrame(data), None
-            elif isinstance(data, dict):
-                for v in data.values():
-                    if isinstance(v, list):
-                        return pd.DataFrame(v), None
-                return pd.DataFrame([data]), None
+        rows = wb.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(c) if c is not None else f"Unnamed: {i}" for i, c in enumerate(header)]
+        width = len(columns)
+        # 只读模式下行尾的空单元格不会返回，按表头补齐
+        rows = (row[:width] if len(row) >= width else row + (None,) * (width - len(row)) for row in rows)
+        yield from _batched_frames(rows, chunk_rows, columns)
+    finally:
+        wb.close()
+
+def _text_stream(source):
+    if isinstance(source, (str, Path)):
+        return open(source, encoding="utf-8-sig")
+    return io.TextIOWrapper(source, encoding="utf-8-sig")
+
+def iter_chunks(source, filetype, chunk_rows=CHUNK_ROWS):
+    """按批读取数据文件（路径或二进制文件对象），逐批产出 DataFrame。"""
+    if filetype in CSV_CODECS:
+        stream = open_csv_input(source, CSV_CODECS[filetype])
+        try:
+            with pd.read_csv(stream, chunksize=chunk_rows) as reader:
+                yield from reader
+        finally:
+            if stream is not source:
+                stream.close()
+    elif filetype in ("Parquet", "Feather"):
+        yield from batches_to_frames(iter_batches(source, filetype, chunk_rows))
+    elif filetype == "Excel":
+        yield from _iter_excel_chunks(source, chunk_rows)
+    elif filetype == "JSON":
+        f = _text_stream(source)
+        try:
+            yield from _batched_frames(_iter_json_records(f), chunk_rows)
+        finally:
+            # 不关闭调用方传入的文件对象
+            if isinstance(f, io.TextIOWrapper) and not isinstance(source, (str, Path)):
+                f.detach()
             else:
-                return None, "JSON结构不支持，仅支持对象或数组。"
-        else:
-            return None, "暂不支持的文件类型！"
+                f.close()
+    else:
+        raise ValueError("暂不支持的文件类型！")
+
+def read_file(file, filetype, rows=20):
+    """只读取文件前 rows 行用于预览，返回DataFrame，异常时返回None和错误信息"""
+    try:
+        df = next(iter_chunks(file, filetype, chunk_rows=rows), None)
+        if hasattr(file, "seek"):
+            file.seek(0)
+        return (df if df is not None else pd.DataFrame()), None
     except Exception as e:
         return None, f"文件读取失败: {str(e)}"
 
-def convert_and_download(df, target_format, filename_prefix="converted"):
-    """根据目标格式转换并生成下载链接，异常时返回False和错误信息"""
+def _excel_value(v):
+    if v is None or (isinstance(v, float) and v != v):
+        return None
+    if isinstance(v, (list, dict)):
+        return json.dumps(v, ensure_ascii=False)
+    return v
+
+def _write_csv(chunks, out, codec=None):
+    stream = open_csv_output(out, codec)
     try:
-        if target_format == "CSV":
-            towrite = io.StringIO()
-            df.to_csv(towrite, index=False)
-            st.download_button(
-                label="下载CSV文件",
-                data=towrite.getvalue(),
-                file_name=f"{filename_prefix}.csv",
-                mime="text/csv"
-            )
-        elif target_format == "Excel":
-            towrite = io.BytesIO()
-            with pd.ExcelWriter(towrite, engine="openpyxl") as writer:
-                df.to_excel(writer, index=False)
-            st.download_button(
-                label="下载Excel文件",
-                data=towrite.getvalue(),
-                file_name=f"{filename_prefix}.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
-        elif target_format == "JSON":
-            json_str = df.to_json(orient="records", force_ascii=False, indent=2)
-            st.download_button(
-                label="下载JSON文件",
-                data=json_str,
-                file_name=f"{filename_prefix}.json",
-                mime="application/json"
-            )
+        for i, df in enumerate(chunks):
+            (stream or out).write(df.to_csv(index=False, header=i == 0).encode("utf-8"))
+            yield len(df)
+    finally:
+        if stream is not None:
+            stream.close()
+
+def _write_json(chunks, out):
+    out.write(b"[\n")
+    first = True
+    for df in chunks:
+        lines = df.to_json(orient="records", lines=True, force_ascii=False).strip()
+        if lines:
+            out.write((("" if first else ",\n") + lines.replace("\n", ",\n")).encode("utf-8"))
+            first = False
+        yield len(df)
+    out.write(b"\n]\n")
+
+def _write_excel(chunks, out):
+    from openpyxl import Workbook
+    # write_only 模式下行数据写入临时文件，不在内存中保留整张表
+    wb = Workbook(write_only=True)
+    ws = None
+    sheet_rows = 0
+    for df in chunks:
+        for row in df.itertuples(index=False, name=None):
+            if ws is None or sheet_rows >= EXCEL_MAX_ROWS:
+                ws = wb.create_sheet(f"Sheet{len(wb.worksheets) + 1}")
+                ws.append([str(c) for c in df.columns])
+                sheet_rows = 1
+            ws.append([_excel_value(v) for v in row])
+            sheet_rows += 1
+        yield len(df)
+    if ws is None:
+        wb.create_sheet("Sheet1")
+    wb.save(out)
+
+_WRITERS = {"CSV": _write_csv, "Excel": _write_excel, "JSON": _write_json}
+
+def _fixed_columns(chunks):
+    """后续批次按第一批的列对齐（CSV/Excel 表头只能写一次），第一批之后新出现的字段被忽略并记录日志。"""
+    columns = None
+    ignored = set()
+    for df in chunks:
+        if columns is None:
+            columns = list(df.columns)
         else:
-            st.error("暂不支持的目标格式！")
-            return False, "暂不支持的目标格式！"
-        return True, None
+            extra = [c for c in df.columns if c not in columns]
+            if extra and not ignored.issuperset(extra):
+                ignored.update(extra)
+                logger.warning(f"以下字段未出现在第一批记录中，已忽略：{extra}")
+            df = df.reindex(columns=columns)
+        yield df
+
+def _use_arrow(filetype, target_format):
+    """两端都是 Arrow 可直接读写的格式，或目标是列式格式时，按 RecordBatch 转换。"""
+    if target_format not in ARROW_FORMATS:
+        return False
+    if filetype not in ARROW_FORMATS and target_format in CSV_CODECS:
+        return False
+    if not {filetype, target_format} & ARROW_ONLY_FORMATS:
+        # CSV 与 gzip 压缩 CSV 互转时，未安装 pyarrow 也可以退回 pandas
+        try:
+            require_arrow(target_format)
+        except ValueError:
+            return False
+    return True
+
+def _write_rows(writer, progress):
+    """驱动写入生成器，返回 (已写行数, 进度回调抛出的异常)。"""
+    rows = 0
+    for n in writer:
+        rows += n
+        if progress is not None:
+            try:
+                progress(rows)
+            except Exception as e:
+                writer.close()
+                return rows, e
+    return rows, None
+
+def _convert_arrow(source, filetype, target_format, out_path, progress, chunk_rows, row_group_rows, compression):
+    import pyarrow as pa
+    csv_strings = False
+    while True:
+        if filetype in ARROW_FORMATS:
+            batches = iter_batches(source, filetype, chunk_rows, csv_strings=csv_strings)
+        else:
+            batches = frames_to_batches(_fixed_columns(iter_chunks(source, filetype, chunk_rows)))
+        try:
+            with open(out_path, "wb") as out:
+                return _write_rows(write_batches(batches, out, target_format, row_group_rows, compression), progress)
+        except pa.ArrowInvalid:
+            # CSV 列类型按第一块推断，后面出现不符合的值时全部按文本列重新转换一次
+            if filetype not in CSV_CODECS or csv_strings:
+                raise
+            logger.warning("CSV 列类型推断与后续数据不一致，改为全部按文本读取后重新转换")
+            csv_strings = True
+            if hasattr(source, "seek"):
+                source.seek(0)
+
+def convert_file(source, filetype, target_format, progress=None, chunk_rows=CHUNK_ROWS,
+                 row_group_rows=ROW_GROUP_ROWS, compression=None):
+    """
+    流式转换数据文件：按批读取、逐批写入临时文件，内存占用与文件大小无关。
+    Arrow 可直接读写的格式之间（CSV、压缩 CSV、Parquet、Feather）按 RecordBatch 转换，不经过 pandas；
+    row_group_rows、compression 只对 Parquet/Feather 目标有效。
+    progress(已转换行数) 在每批写完后调用，可抛出异常中止转换。
+    返回转换后的文件路径或错误信息。
+    """
+    if target_format not in DATA_SUFFIXES:
+        return False, "暂不支持的目标格式！"
+    out_path = tempfile.mktemp(suffix=DATA_SUFFIXES[target_format])
+    try:
+        if _use_arrow(filetype, target_format):
+            _, aborted = _convert_arrow(source, filetype, target_format, out_path, progress,
+                                        chunk_rows, row_group_rows, compression)
+        else:
+            chunks = iter_chunks(source, filetype, chunk_rows)
+            if target_format != "JSON":
+                chunks = _fixed_columns(chunks)
+            with open(out_path, "wb") as out:
+                if target_format in CSV_CODECS:
+                    writer = _write_csv(chunks, out, CSV_CODECS[target_format])
+                else:
+                    writer = _WRITERS[target_format](chunks, out)
+                _, aborted = _write_rows(writer, progress)
     except Exception as e:
-        st.error(f"转换或下载失败: {str(e)}")
-        return False, f"转换或下载失败: {str(e)}"
+        if os.path.exists(out_path):
+            os.remove(out_path)
+        return False, f"转换失败: {str(e)}"
+    if aborted is not None:
+        # 进度回调抛出的异常（如任务取消）交给调用方处理
+        os.remove(out_path)
+        raise aborted
+    return True, out_path
+
+def _add_text_page(doc, text):
+    if text:
+        for line in text.split('\n'):
+            doc.add_paragraph(line)
+    return 0
+
+def _add_tables_page(doc, tables):
+    for table in tables:
+        word_table = doc.add_table(rows=len(table), cols=len(table[0]))
+        for i, row in enumerate(table):
+            for j, cell in enumerate(row):
+                word_table.cell(i, j).text = str(cell) if cell is not None else ''
+        doc.add_paragraph()  # 表格间空行
+    return len(tables)
+
+def _save_docx_pages(pages, add_page, segment_pages=None):
+    """
+    把逐页提取结果依次交给 add_page(doc, 该页结果) 写入 Word，返回 (文件路径, add_page 返回值之和)。
+    segment_pages 为正数时每 segment_pages 页保存为一个 docx 并打包成 zip，
+    已保存的分段随即释放，内存中只保留一个分段的 Document。
+    """
+    if not segment_pages:
+        doc = Document()
+        count = sum(add_page(doc, page) for page in pages)
+        out_path = tempfile.mktemp(suffix='.docx')
+        doc.save(out_path)
+        return out_path, count
+    out_path = tempfile.mktemp(suffix='.zip')
+    count = 0
+    try:
+        with zipfile.ZipFile(out_path, 'w', zipfile.ZIP_DEFLATED) as zf:
+            doc, first, page_no = None, 0, -1
+            for page_no, page in enumerate(pages):
+                if doc is None:
+                    doc, first = Document(), page_no
+                count += add_page(doc, page)
+                if page_no - first + 1 >= segment_pages:
+                    _write_docx_part(zf, doc, first, page_no)
+                    doc = None
+            if doc is not None or page_no < 0:
+                _write_docx_part(zf, doc or Document(), first, max(page_no, 0))
+    except BaseException:
+        os.remove(out_path)
+        raise
+    return out_path, count
 
-def pdf_to_docx(pdf_file):
-    """PDF 转 Word，返回 docx 文件路径或错误信息"""
+def _write_docx_part(zf, doc, first, last):
+    part_path = tempfile.mktemp(suffix='.docx')
+    try:
+        doc.save(part_path)
+        zf.write(part_path, f"pages_{first + 1:05d}-{last + 1:05d}.docx")
+    finally:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+
+def pdf_to_docx(pdf_file, progress=None, segment_pages=None):
+    """
+    PDF 转 Word，各页文本在多个进程中并行提取后按页序逐页写入，progress(已完成页数, 总页数) 汇报进度；
+    segment_pages 为正数时按页数分段输出为 zip。返回 docx/zip 文件路径或错误信息
+    """
     try:
         if hasattr(pdf_file, 'read'):
             # 兼容 Streamlit UploadedFile
@@ -150,19 +449,15 @@ def pdf_to_docx(pdf_file):
             pdf_path = pdf_file
         else:
             return False, "无法识别的 PDF 文件类型"
-        doc = Document()
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                text = page.extract_text()
-                if text:
-                    for line in text.split('\n'):
-                        doc.add_paragraph(line)
-        out_path = tempfile.mktemp(suffix='.docx')
-        doc.save(out_path)
+        pages = get_pdf_pool().iter_pages(pdf_path, MODE_TEXT, progress)
+        out_path, _ = _save_docx_pages(pages, _add_text_page, segment_pages)
         if os.path.exists(out_path) and os.path.getsize(out_path) > 0:
             return True, out_path
         else:
             return False, "生成的 Word 文件为空"
+    except ProgressAborted as e:
+        # 进度回调抛出的异常（如任务取消）交给调用方处理
+        raise e.error
     except Exception as e:
         return False, f"PDF 转 Word 失败: {str(e)}"
 
@@ -198,10 +493,8 @@ def docx_to_pdf(docx_file):
     except Exception as e:
         return False, f"Word 转 PDF 失败: {str(e)}"
 
-def pdf_tables_to_docx(pdf_file):
-    """提取 PDF 中所有表格并导出为 Word 表格，返回 docx 文件路径或错误信息"""
-    import pdfplumber
-    from docx import Document
+def pdf_tables_to_docx(pdf_file, progress=None, segment_pages=None):
+    """提取 PDF 中所有表格并导出为 Word 表格，各页在多个进程中并行提取后按页序写入；返回 docx/zip 文件路径或错误信息"""
     try:
         if hasattr(pdf_file, 'read'):
             with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp:
@@ -211,26 +504,16 @@ def pdf_tables_to_docx(pdf_file):
             pdf_path = pdf_file
         else:
             return False, "无法识别的 PDF 文件类型"
-        doc = Document()
-        table_count = 0
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                tables = page.extract_tables()
-                for table in tables:
-                    if table:
-                        table_count += 1
-                        word_table = doc.add_table(rows=len(table), cols=len(table[0]))
-                        for i, row in enumerate(table):
-                            for j, cell in enumerate(row):
-                                word_table.cell(i, j).text = str(cell) if cell is not None else ''
-                        doc.add_paragraph()  # 表格间空行
+        pages = get_pdf_pool().iter_pages(pdf_path, MODE_TABLES, progress)
+        out_path, table_count = _save_docx_pages(pages, _add_tables_page, segment_pages)
         if table_count == 0:
+            os.remove(out_path)
             return False, "未检测到可提取的表格。"
-        out_path = tempfile.mktemp(suffix='.docx')
-        doc.save(out_path)
         if os.path.exists(out_path) and os.path.getsize(out_path) > 0:
             return True, out_path
         else:
             return False, "生成的 Word 文件为空"
+    except ProgressAborted as e:
+        raise e.error
     except Exception as e:
         return False, f"PDF 表格提取失败: {str(e)}" 
\ No newline at end of file
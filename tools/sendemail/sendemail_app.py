@@ -4,6 +4,10 @@ import smtplib
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 import os
+from tools.shared.governor import RESOURCE_SMTP, get_governor
+from tools.shared.job_view import job_panel, job_running, submit_job
+from tools.shared.jobs import JOB_DONE
+from tools.shared.upload_cache import get_upload_cache
 
 # 子项目元信息，供主入口自动引用
 PROJECT_META = {
@@ -21,6 +25,11 @@ def convert_df_to_str(df):
             df[col] = df[col].astype(str)
     return df
 
+def read_recipients(file, filetype):
+    """读取收件人文件并把所有列转为字符串，结果由上传缓存保存，界面重跑时不再重复解析。"""
+    df = pd.read_csv(file) if filetype == 'CSV' else pd.read_excel(file)
+    return convert_df_to_str(df)
+
 def generate_email_html(user_body_head, user_body_html, row, columns, content_format, user_body_end):
     """根据选择的格式生成邮件HTML内容"""
     if content_format == "文字形式":
@@ -56,6 +65,46 @@ def send_email(server, from_email, to_email, subject, body):
     except Exception as e:
         return False, str(e)
 
+def send_emails_job(job, *args):
+    """后台任务：等到 SMTP 连接名额后逐个发送邮件，返回发送统计。"""
+    job.update(message="等待 SMTP 连接名额...")
+    # 同时打开的 SMTP 连接数受全局上限控制，多人同时群发时排队
+    with get_governor().slot(RESOURCE_SMTP, check=job.check_cancelled):
+        return _send_emails(job, *args)
+
+def _send_emails(job, from_email, password, df, subject, user_body_head, user_body_html, body_columns, content_format, user_body_end):
+    """逐个发送邮件并汇报进度，返回发送统计。SMTP 连接失败时抛出带提示信息的异常。"""
+    job.update(total=len(df), message="正在连接 SMTP 服务器...")
+    try:
+        server = smtplib.SMTP('smtp.gmail.com', 587, timeout=10)
+        server.starttls()
+        server.login(from_email, password)
+    except smtplib.SMTPServerDisconnected:
+        raise RuntimeError("SMTP服务器连接被意外关闭，可能是网络被限制或Gmail账号未正确设置应用专用密码。\n\n请检查：\n1. 当前网络是否允许访问外部SMTP端口（如587），可尝试切换网络或VPN。\n2. Gmail账号是否开启两步验证并使用应用专用密码。\n3. 稍后重试，或参考帮助文档。")
+    except Exception as e:
+        raise RuntimeError(f"SMTP连接失败: {e}\n\n请检查网络和Gmail账号设置，确保使用应用专用密码。")
+    success_count, failure_count = 0, 0
+    failed_emails = []
+    progress = job.reporter(total=len(df))
+    try:
+        for idx, row in df.iterrows():
+            job.check_cancelled()
+            combined_body = generate_email_html(user_body_head, user_body_html, row, body_columns, content_format, user_body_end)
+            success, error_message = send_email(server, from_email, row['Email Address'], subject, combined_body)
+            if success:
+                success_count += 1
+            else:
+                failure_count += 1
+                failed_emails.append(row['Email Address'])
+            progress.advance(failed=not success, message=f"最近发送：{row['Email Address']}")
+        progress.flush()
+    finally:
+        try:
+            server.quit()
+        except Exception:
+            pass
+    return {"success_count": success_count, "failure_count": failure_count, "failed_emails": failed_emails}
+
 def main():
 
     # 创建侧边栏
@@ -89,8 +138,8 @@ def main():
     with main_tab:
         uploaded_file = st.file_uploader("选择文件", type=["csv", "xlsx"])
         if uploaded_file is not None:
-            df = pd.read_csv(uploaded_file) if uploaded_file.name.endswith('.csv') else pd.read_excel(uploaded_file)
-            df = convert_df_to_str(df)
+            filetype = 'CSV' if uploaded_file.name.endswith('.csv') else 'Excel'
+            df = get_upload_cache().parse(uploaded_file, read_recipients, filetype=filetype)
             st.write(df)
 
             subject = st.text_input("邮件主题", "输入您的邮件主题...", key="subject")
@@ -109,35 +158,18 @@ def main():
                     st.markdown("### 邮件预览")
                     st.markdown(preview_content, unsafe_allow_html=True)
 
-            if st.button('发送邮件'):
-                with st.spinner('邮件发送中...'):
-                    success_count, failure_count = 0, 0
-                    failed_emails = []
-                    try:
-                        server = smtplib.SMTP('smtp.gmail.com', 587, timeout=10)
-                        server.starttls()
-                        server.login(from_email, password)
-                    except smtplib.SMTPServerDisconnected:
-                        st.error("SMTP服务器连接被意外关闭，可能是网络被限制或Gmail账号未正确设置应用专用密码。\n\n请检查：\n1. 当前网络是否允许访问外部SMTP端口（如587），可尝试切换网络或VPN。\n2. Gmail账号是否开启两步验证并使用应用专用密码。\n3. 稍后重试，或参考帮助文档。")
-                        return
-                    except Exception as e:
-                        st.error(f"SMTP连接失败: {e}\n\n请检查网络和Gmail账号设置，确保使用应用专用密码。")
-                        return
-                    for idx, row in df.iterrows():
-                        combined_body = generate_email_html(user_body_head, user_body_html, row, body_columns, content_format, user_body_end)
-                        success, error_message = send_email(server, from_email, row['Email Address'], subject, combined_body)
-                        if success:
-                            success_count += 1
-                        else:
-                            failure_count += 1
-                            failed_emails.append(row['Email Address'])
-                    server.quit()
-                    st.success(f"邮件发送成功数量: {success_count}")
-                    st.error(f"邮件发送失败数量: {failure_count}")
-                    if failed_emails:
-                        st.error("以下邮件发送失败:")
-                        for email in failed_emails:
-                            st.write(email)
+            if st.button('发送邮件', disabled=job_running('send_email_job')):
+                submit_job('send_email_job', 'sendemail', send_emails_job, from_email, password, df, subject,
+                           user_body_head, user_body_html, body_columns, content_format, user_body_end, title='邮件发送')
+            job = job_panel('send_email_job')
+            if job is not None and job.status == JOB_DONE:
+                result = job.result
+                st.success(f"邮件发送成功数量: {result['success_count']}")
+                st.error(f"邮件发送失败数量: {result['failure_count']}")
+                if result['failed_emails']:
+                    st.error("以下邮件发送失败:")
+                    for email in result['failed_emails']:
+                        st.write(email)
 
     with usage_tab:
         st.markdown("""
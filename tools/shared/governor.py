@@ -0,0 +1,274 @@
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+
+RESOURCE_BROWSER_PAGES = "browser_pages"
+RESOURCE_WORKERS = "workers"
+RESOURCE_SMTP = "smtp"
+
+RESOURCE_LABELS = {
+    RESOURCE_BROWSER_PAGES: "浏览器页面",
+    RESOURCE_WORKERS: "计算进程",
+    RESOURCE_SMTP: "SMTP 连接",
+}
+
+
+def _env_limit(name, default):
+    try:
+        return max(1, int(os.environ.get(name, default)))
+    except ValueError:
+        return default
+
+
+# 整个服务进程（所有会话合计）的资源上限，可用环境变量按部署机器的内存和核数调整
+DEFAULT_LIMITS = {
+    RESOURCE_BROWSER_PAGES: _env_limit("WATTTER_MAX_BROWSER_PAGES", 12),
+    RESOURCE_WORKERS: _env_limit("WATTTER_MAX_WORKERS", os.cpu_count() or 1),
+    RESOURCE_SMTP: _env_limit("WATTTER_MAX_SMTP", 2),
+}
+
+# 等待名额时检查取消的间隔（秒）
+CHECK_INTERVAL = 0.5
+
+# 当前申请资源的所有者（后台任务中为任务 ID），同一所有者的请求在公平队列中排成一组；
+# 协程和 asyncio.to_thread 会继承该值，pool.run 提交的爬取协程也会继承调用线程的值
+_current_owner = contextvars.ContextVar("governor_owner", default=None)
+
+
+@contextmanager
+def owner_scope(owner):
+    """在此范围内申请的资源都记在 owner 名下。"""
+    token = _current_owner.set(owner)
+    try:
+        yield
+    finally:
+        _current_owner.reset(token)
+
+
+def current_owner():
+    return _current_owner.get()
+
+
+class _Waiter:
+    __slots__ = ("owner", "since", "granted", "notify")
+
+    def __init__(self, owner, notify):
+        self.owner = owner
+        self.since = time.monotonic()
+        self.granted = False
+        self.notify = notify
+
+
+class FairSemaphore:
+    """
+    线程安全的公平信号量，同步线程和任意事件循环中的协程都可以申请。
+    名额不足时按所有者轮流分配：每个所有者各有一个先进先出队列，
+    各队列轮流取队首，请求多的任务不会饿死后来的任务。
+    """
+
+    def __init__(self, name, capacity):
+        self.name = name
+        self.capacity = capacity
+        self.in_use = 0
+        self.waited = 0
+        self.wait_seconds = 0.0
+        self._queues = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _grant_locked(self):
+        granted = []
+        while self.in_use < self.capacity and self._queues:
+            owner, queue = next(iter(self._queues.items()))
+            waiter = queue.popleft()
+            if queue:
+                self._queues.move_to_end(owner)
+            else:
+                del self._queues[owner]
+            self.in_use += 1
+            waiter.granted = True
+            waited = time.monotonic() - waiter.since
+            if waited > 0.01:
+                self.waited += 1
+                self.wait_seconds += waited
+            granted.append(waiter)
+        return granted
+
+    def _enqueue(self, waiter):
+        with self._lock:
+            self._queues.setdefault(waiter.owner, deque()).append(waiter)
+            granted = self._grant_locked()
+        for w in granted:
+            w.notify()
+
+    def _abandon(self, waiter):
+        """申请方放弃等待（取消或异常）：已分到名额则归还，否则移出队列。"""
+        with self._lock:
+            if not waiter.granted:
+                queue = self._queues.get(waiter.owner)
+                if queue is not None and waiter in queue:
+                    queue.remove(waiter)
+                    if not queue:
+                        del self._queues[waiter.owner]
+                return
+        self.release()
+
+    def release(self):
+        with self._lock:
+            self.in_use -= 1
+            granted = self._grant_locked()
+        for w in granted:
+            w.notify()
+
+    def acquire(self, owner=None, check=None):
+        """阻塞直到分到名额；check 在等待期间周期调用，抛出异常（如任务取消）时放弃等待。"""
+        event = threading.Event()
+        waiter = _Waiter(owner, event.set)
+        self._enqueue(waiter)
+        try:
+            while not event.wait(CHECK_INTERVAL):
+                if check is not None:
+                    check()
+        except BaseException:
+            self._abandon(waiter)
+            raise
+
+    def try_acquire(self):
+        """有空闲名额且无人排队时立即占用一个并返回 True，否则不等待直接返回 False。"""
+        with self._lock:
+            if self.in_use < self.capacity and not self._queues:
+                self.in_use += 1
+                return True
+            return False
+
+    async def acquire_async(self, owner=None):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def wake():
+            if not future.done():
+                future.set_result(None)
+
+        def notify():
+            try:
+                loop.call_soon_threadsafe(wake)
+            except RuntimeError:
+                # 事件循环已关闭，没有协程会使用这个名额
+                self.release()
+
+        waiter = _Waiter(owner, notify)
+        self._enqueue(waiter)
+        try:
+            await future
+        except BaseException:
+            self._abandon(waiter)
+            raise
+
+    def waiting(self, owner=None):
+        """返回 (排队总数, 该所有者排队数, 该所有者最早请求已等待秒数)。"""
+        with self._lock:
+            total = sum(len(q) for q in self._queues.values())
+            mine = self._queues.get(owner)
+            oldest = time.monotonic() - mine[0].since if mine else 0.0
+            return total, len(mine) if mine else 0, oldest
+
+
+class ResourceGovernor:
+    """
+    进程级资源总量控制：浏览器页面、计算进程和 SMTP 连接在所有会话、所有任务间合计不超过上限，
+    超出时按任务公平排队等待，而不是同时启动到内存耗尽。
+    """
+
+    def __init__(self, limits=None):
+        limits = {**DEFAULT_LIMITS, **(limits or {})}
+        self.resources = {name: FairSemaphore(name, capacity) for name, capacity in limits.items()}
+
+    @contextmanager
+    def slot(self, name, check=None):
+        """with governor.slot(RESOURCE_SMTP, check=job.check_cancelled): ... 在同步线程中占用一个名额。"""
+        sem = self.resources[name]
+        sem.acquire(current_owner(), check)
+        try:
+            yield
+        finally:
+            sem.release()
+
+    @asynccontextmanager
+    async def async_slot(self, name):
+        """async with governor.async_slot(RESOURCE_BROWSER_PAGES): ... 在协程中占用一个名额。"""
+        sem = self.resources[name]
+        await sem.acquire_async(current_owner())
+        try:
+            yield
+        finally:
+            sem.release()
+
+    @contextmanager
+    def extra_slots(self, name, n):
+        """
+        不等待地尽量多占用空闲名额（最多 n 个），产出实际占到的个数。
+        已占有一个名额的任务用它临时扩大并行度：资源紧张时只得到 0 个，按原有并行度执行而不排队。
+        """
+        sem = self.resources[name]
+        got = 0
+        try:
+            while got < n and sem.try_acquire():
+                got += 1
+            yield got
+        finally:
+            for _ in range(got):
+                sem.release()
+
+    def waiting(self, owner):
+        """owner 正在等待的资源列表，供界面显示排队情况。"""
+        result = []
+        for name, sem in self.resources.items():
+            total, mine, waited = sem.waiting(owner)
+            if mine:
+                result.append({
+                    "resource": name,
+                    "label": RESOURCE_LABELS.get(name, name),
+                    "in_use": sem.in_use,
+                    "capacity": sem.capacity,
+                    "queued": total,
+                    "mine": mine,
+                    "waited": waited,
+                })
+        return result
+
+    def snapshot(self):
+        snapshot = {}
+        for name, sem in self.resources.items():
+            queued, _, _ = sem.waiting()
+            snapshot[name] = {
+                "in_use": sem.in_use,
+                "capacity": sem.capacity,
+                "queued": queued,
+                "waited": sem.waited,
+                "wait_seconds": round(sem.wait_seconds, 1),
+            }
+        return snapshot
+
+
+def format_waiting(waiting):
+    """把 waiting() 的结果格式化为一行排队说明。"""
+    return "；".join(
+        f"排队等待{w['label']}（已用 {w['in_use']}/{w['capacity']}，共 {w['queued']} 个请求排队，本任务 {w['mine']} 个，已等待 {w['waited']:.0f} 秒）"
+        for w in waiting
+    )
+
+
+_GOVERNOR = None
+_GOVERNOR_LOCK = threading.Lock()
+
+
+def get_governor():
+    """获取进程级共享的资源控制器（所有会话、所有工具共用）。"""
+    global _GOVERNOR
+    with _GOVERNOR_LOCK:
+        if _GOVERNOR is None:
+            _GOVERNOR = ResourceGovernor()
+        return _GOVERNOR
@@ -0,0 +1,72 @@
+import streamlit as st
+from tools.shared.governor import format_waiting, get_governor
+from tools.shared.jobs import JOB_CANCELLED, JOB_FAILED, JOB_STATUS_LABELS, get_job_runner
+from tools.shared.progress import format_progress
+
+# 任务运行中时进度区域自动刷新的间隔（秒）
+POLL_INTERVAL = 1.0
+
+
+def submit_job(session_key, kind, fn, *args, title="", **kwargs):
+    """提交后台任务并把 job_id 记在 session_state[session_key]，返回任务句柄。"""
+    job = get_job_runner().submit(kind, fn, *args, title=title, **kwargs)
+    st.session_state[session_key] = job.id
+    return job
+
+
+def job_running(session_key):
+    """session_state[session_key] 对应的任务是否还未结束，用于禁用重复提交的按钮。"""
+    job_id = st.session_state.get(session_key)
+    job = get_job_runner().get(job_id) if job_id else None
+    return job is not None and not job.finished
+
+
+def _current_job(session_key):
+    job_id = st.session_state.get(session_key)
+    job = get_job_runner().get(job_id) if job_id else None
+    if job is None:
+        st.session_state.pop(session_key, None)
+    return job
+
+
+def _render_progress(session_key):
+    job = _current_job(session_key)
+    if job is None or job.finished:
+        # 任务结束后整页重跑一次，由调用方渲染结果
+        st.rerun()
+    done, total, message = job.progress()
+    label = f"{job.title or '任务'}{JOB_STATUS_LABELS[job.status]}"
+    detail = format_progress(job.metrics) if job.metrics else (f"已完成 {done}/{total}" if total else "")
+    percent = min(100, int(done / total * 100)) if total else 0
+    st.progress(percent, text=f"{label}：{detail}（{percent}%）" if total else label)
+    if message:
+        st.text(message)
+    waiting = get_governor().waiting(job.id)
+    if waiting:
+        st.caption(f"服务器资源繁忙，{format_waiting(waiting)}")
+    if job.cancel_requested:
+        st.caption("正在取消...")
+    elif st.button("取消任务", key=f"{session_key}_cancel"):
+        job.cancel()
+
+
+# 只定时重跑进度区域，不影响页面其余部分
+_progress_fragment = st.fragment(_render_progress, run_every=POLL_INTERVAL)
+
+
+def job_panel(session_key):
+    """
+    显示 session_state[session_key] 对应任务的状态：运行中时显示定时刷新的进度和取消按钮并返回 None，
+    结束时显示失败或取消信息并返回任务句柄（由调用方渲染结果），没有任务时返回 None。
+    """
+    job = _current_job(session_key)
+    if job is None:
+        return None
+    if not job.finished:
+        _progress_fragment(session_key)
+        return None
+    if job.status == JOB_FAILED:
+        st.error(f"{job.title or '任务'}失败：{job.error}")
+    elif job.status == JOB_CANCELLED:
+        st.warning(f"{job.title or '任务'}已取消。")
+    return job
@@ -0,0 +1,183 @@
+import atexit
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from tools.shared.governor import owner_scope
+from tools.shared.progress import DEFAULT_INTERVAL, ProgressReporter
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+JOB_STATUS_LABELS = {
+    JOB_PENDING: "排队中",
+    JOB_RUNNING: "运行中",
+    JOB_DONE: "已完成",
+    JOB_FAILED: "失败",
+    JOB_CANCELLED: "已取消",
+}
+
+DEFAULT_MAX_WORKERS = 8
+# 已结束的任务最多保留条数，超出后按结束时间淘汰最早的
+DEFAULT_KEEP_FINISHED = 50
+
+
+class JobCancelled(Exception):
+    """任务函数在检查到取消请求时抛出。"""
+
+
+class Job:
+    """
+    后台任务句柄：任务函数通过 update() 汇报进度、通过 check_cancelled() 响应取消，
+    界面按 job_id 取回句柄后读取 status、progress 和 result。
+    """
+
+    def __init__(self, kind, title=""):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.title = title
+        self.status = JOB_PENDING
+        self.done = 0
+        self.total = None
+        self.message = ""
+        self.metrics = None
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._cancel = threading.Event()
+        self._future = None
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self):
+        return self.status in (JOB_DONE, JOB_FAILED, JOB_CANCELLED)
+
+    @property
+    def cancel_requested(self):
+        return self._cancel.is_set()
+
+    def update(self, done=None, total=None, message=None):
+        with self._lock:
+            if done is not None:
+                self.done = done
+            if total is not None:
+                self.total = total
+            if message is not None:
+                self.message = message
+
+    def reporter(self, total=None, interval=DEFAULT_INTERVAL):
+        """返回按固定频率把进度、速度和预计剩余时间写入本任务的 ProgressReporter。"""
+        return ProgressReporter(total, self._publish, interval)
+
+    def _publish(self, snapshot):
+        with self._lock:
+            self.done = snapshot["done"]
+            self.total = snapshot["total"]
+            if snapshot["message"] is not None:
+                self.message = snapshot["message"]
+            self.metrics = snapshot
+
+    def check_cancelled(self):
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def cancel(self):
+        """请求取消：排队中的任务直接取消，运行中的任务在下一次 check_cancelled() 时结束。"""
+        self._cancel.set()
+        if self._future is not None and self._future.cancel():
+            self._finish(JOB_CANCELLED)
+
+    def progress(self):
+        """返回 (已完成数, 总数, 说明)，总数未知时为 None。"""
+        with self._lock:
+            return self.done, self.total, self.message
+
+    def _finish(self, status, result=None, error=None):
+        with self._lock:
+            self.status = status
+            self.result = result
+            self.error = error
+            self.finished_at = time.time()
+
+
+class JobRunner:
+    """
+    进程级共享的后台任务执行器：爬虫、格式转换和群发邮件把耗时任务提交到这里，
+    Streamlit 脚本只保存 job_id 并轮询进度，页面重跑或切换工具都不会中断任务。
+    """
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, keep_finished=DEFAULT_KEEP_FINISHED):
+        self.keep_finished = keep_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind, fn, *args, title="", **kwargs):
+        """提交任务，fn(job, *args, **kwargs) 在后台线程中执行，其返回值作为 job.result。"""
+        job = Job(kind, title)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        job._future = self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job, fn, args, kwargs):
+        if job.cancel_requested:
+            job._finish(JOB_CANCELLED)
+            return
+        job.status = JOB_RUNNING
+        job.started_at = time.time()
+        try:
+            # 任务中申请的浏览器页面、计算进程等全局资源记在本任务名下，按任务公平排队
+            with owner_scope(job.id):
+                result = fn(job, *args, **kwargs)
+        except JobCancelled:
+            job._finish(JOB_CANCELLED)
+        except Exception as e:
+            job._finish(JOB_FAILED, error=str(e) or type(e).__name__)
+        else:
+            job._finish(JOB_DONE, result=result)
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self, kind=None):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job for job in jobs if kind is None or job.kind == kind]
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is not None:
+            job.cancel()
+        return job
+
+    def _prune(self):
+        finished = sorted((job for job in self._jobs.values() if job.finished), key=lambda job: job.finished_at)
+        for job in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[job.id]
+
+    def shutdown(self):
+        for job in self.list():
+            job._cancel.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_RUNNER = None
+_RUNNER_LOCK = threading.Lock()
+
+
+def get_job_runner():
+    """获取进程级共享的后台任务执行器（所有会话、所有工具共用）。"""
+    global _RUNNER
+    with _RUNNER_LOCK:
+        if _RUNNER is None:
+            _RUNNER = JobRunner()
+            atexit.register(_RUNNER.shutdown)
+        return _RUNNER
@@ -0,0 +1,82 @@
+import contextvars
+import sys
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# 当前任务的内存统计，计算子进程汇报的峰值通过它记到调用方任务名下
+_current_tracker = contextvars.ContextVar("rss_tracker", default=None)
+
+
+def current_rss():
+    """当前进程的常驻内存（字节），无法获取时返回 None。"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    # 没有 /proc 的系统（如 macOS）以进程峰值代替
+    return peak_rss()
+
+
+def peak_rss():
+    """当前进程启动以来的最大常驻内存（字节），无法获取时返回 None。"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 以字节为单位，Linux 以 KB 为单位
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def format_mb(n):
+    return "-" if n is None else f"{n / 1024 / 1024:.0f} MB"
+
+
+class RssTracker:
+    """
+    记录一次转换期间的内存峰值：sample() 在进度回调等处采样本进程的常驻内存，
+    add_child_peak() 记录计算子进程汇报的峰值。
+    """
+
+    def __init__(self):
+        self.start = current_rss()
+        self.peak = self.start
+        self.child_peak = None
+
+    def sample(self):
+        rss = current_rss()
+        if rss is not None and (self.peak is None or rss > self.peak):
+            self.peak = rss
+        return rss
+
+    def add_child_peak(self, rss):
+        if rss is not None and (self.child_peak is None or rss > self.child_peak):
+            self.child_peak = rss
+
+    def summary(self):
+        """返回一行峰值内存说明。"""
+        text = f"峰值内存：服务进程 {format_mb(self.peak)}（开始时 {format_mb(self.start)}）"
+        if self.child_peak is not None:
+            text += f"，计算子进程 {format_mb(self.child_peak)}"
+        return text
+
+
+@contextmanager
+def track_rss():
+    """with track_rss() as tracker: ... 期间的内存峰值记在 tracker 中，结束时再采样一次。"""
+    tracker = RssTracker()
+    token = _current_tracker.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _current_tracker.reset(token)
+        tracker.sample()
+
+
+def current_tracker():
+    return _current_tracker.get()
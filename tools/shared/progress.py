@@ -0,0 +1,119 @@
+import threading
+import time
+from collections import deque
+
+# 默认每隔多少秒最多发布一次进度
+DEFAULT_INTERVAL = 0.5
+# 速度按最近多少秒内的完成数计算
+DEFAULT_WINDOW = 30.0
+
+
+def format_eta(seconds):
+    """把剩余秒数格式化为 时:分:秒 或 分:秒。"""
+    if seconds is None:
+        return "-"
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes:02d}:{secs:02d}"
+
+
+def format_progress(snapshot):
+    """把 snapshot() 的结果格式化为一行进度说明。"""
+    done, total = snapshot["done"], snapshot["total"]
+    parts = [f"已完成 {done}/{total}" if total else f"已完成 {done}"]
+    if snapshot["rate"]:
+        parts.append(f"{snapshot['rate']:.1f} 条/秒")
+    if total and done < total:
+        parts.append(f"预计剩余 {format_eta(snapshot['eta'])}")
+    if snapshot["failed"]:
+        parts.append(f"失败 {snapshot['failed']}")
+    return "，".join(parts)
+
+
+class ProgressReporter:
+    """
+    批量任务的进度汇总：每条完成时调用 advance()，开销只是计数；
+    按固定频率（最多每 interval 秒一次）把汇总结果交给 publish 回调，并计算速度、预计剩余时间和失败数。
+    速度按最近 window 秒的完成数计算；skip() 计入完成数但不计入速度（如从日志恢复的已完成项）。
+    """
+
+    def __init__(self, total=None, publish=None, interval=DEFAULT_INTERVAL, window=DEFAULT_WINDOW):
+        self.total = total
+        self.publish = publish
+        self.interval = interval
+        self.window = window
+        self.done = 0
+        self.failed = 0
+        self.skipped = 0
+        self.message = None
+        self.started = time.monotonic()
+        self._samples = deque([(self.started, 0)])
+        self._last_publish = 0.0
+        self._lock = threading.Lock()
+
+    def skip(self, n):
+        with self._lock:
+            self.done += n
+            self.skipped += n
+        self._maybe_publish()
+
+    def advance(self, n=1, failed=False, message=None):
+        with self._lock:
+            self.done += n
+            if failed:
+                self.failed += n
+            if message is not None:
+                self.message = message
+        self._maybe_publish()
+
+    def set(self, done, failed=None, skipped=None, message=None):
+        """用绝对值更新进度（如汇总多个工作进程的计数）。"""
+        with self._lock:
+            self.done = done
+            if failed is not None:
+                self.failed = failed
+            if skipped is not None:
+                self.skipped = skipped
+            if message is not None:
+                self.message = message
+        self._maybe_publish()
+
+    def snapshot(self):
+        now = time.monotonic()
+        with self._lock:
+            counted = self.done - self.skipped
+            samples = self._samples
+            if now - samples[-1][0] >= 1.0:
+                samples.append((now, counted))
+            while len(samples) > 2 and now - samples[1][0] > self.window:
+                samples.popleft()
+            start_time, start_count = samples[0]
+            elapsed = now - start_time
+            rate = (counted - start_count) / elapsed if elapsed > 0 else None
+            remaining = self.total - self.done if self.total else None
+            eta = remaining / rate if rate and remaining is not None else None
+            return {
+                "done": self.done,
+                "total": self.total,
+                "failed": self.failed,
+                "rate": rate,
+                "eta": eta,
+                "elapsed": now - self.started,
+                "message": self.message,
+            }
+
+    def _maybe_publish(self):
+        if self.publish is None:
+            return
+        now = time.monotonic()
+        if now - self._last_publish < self.interval:
+            return
+        self._last_publish = now
+        self.publish(self.snapshot())
+
+    def flush(self):
+        """立即发布一次当前进度（任务结束时调用）。"""
+        if self.publish is not None:
+            self._last_publish = time.monotonic()
+            self.publish(self.snapshot())
@@ -0,0 +1,213 @@
+import hashlib
+import io
+import os
+import pickle
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+
+def _env_mb(name, default):
+    try:
+        return max(0, int(os.environ.get(name, default))) * 1024 * 1024
+    except ValueError:
+        return default * 1024 * 1024
+
+
+# 内存中缓存的解析结果总大小上限，超出后按最近使用时间淘汰（淘汰的条目写入磁盘）
+DEFAULT_MAX_BYTES = _env_mb("WATTTER_UPLOAD_CACHE_MB", 256)
+# 写到磁盘的解析结果总大小上限，设为 0 时不写磁盘
+DEFAULT_SPILL_BYTES = _env_mb("WATTTER_UPLOAD_SPILL_MB", 1024)
+DEFAULT_SPILL_DIR = os.environ.get(
+    "WATTTER_UPLOAD_CACHE_DIR",
+    os.path.join(tempfile.gettempdir(), "wattter-tools", "uploads"),
+)
+# 记录上传文件 file_id 到内容摘要的对应，同一次上传在重跑时不必重新计算摘要
+_DIGEST_MEMO_SIZE = 256
+
+
+def sizeof(value):
+    """估算解析结果占用的内存字节数。"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(sizeof(v) for v in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sizeof(k) + sizeof(v) for k, v in value.items())
+    return sys.getsizeof(value)
+
+
+def _parser_name(parser):
+    func = getattr(parser, "func", parser)
+    return f"{func.__module__}.{func.__qualname__}"
+
+
+class UploadCache:
+    """
+    上传文件解析结果缓存：按文件内容摘要、解析函数和解析参数缓存解析结果，界面重跑时不再重复解析。
+    内存中的条目总大小不超过 max_bytes，按最近使用时间淘汰；淘汰的条目写入 spill_dir，
+    磁盘上的条目总大小不超过 spill_bytes，再次用到时读回内存。
+    缓存的结果在多个会话间共享，调用方不要原地修改。
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, spill_dir=DEFAULT_SPILL_DIR, spill_bytes=DEFAULT_SPILL_BYTES):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir if spill_bytes > 0 else None
+        self.spill_bytes = spill_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.spill_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._digests = OrderedDict()
+        self._lock = threading.Lock()
+        if self.spill_dir:
+            os.makedirs(self.spill_dir, exist_ok=True)
+
+    def digest(self, file):
+        """计算上传文件内容的摘要；Streamlit UploadedFile 按 file_id 记住摘要。"""
+        file_id = getattr(file, "file_id", None)
+        if file_id is not None:
+            with self._lock:
+                digest = self._digests.get(file_id)
+                if digest is not None:
+                    self._digests.move_to_end(file_id)
+                    return digest
+        digest = hashlib.sha256(file.getvalue()).hexdigest()
+        if file_id is not None:
+            with self._lock:
+                self._digests[file_id] = digest
+                while len(self._digests) > _DIGEST_MEMO_SIZE:
+                    self._digests.popitem(last=False)
+        return digest
+
+    def parse(self, file, parser, **options):
+        """
+        返回 parser(文件对象, **options) 的结果，内容和参数相同的上传文件只解析一次。
+        file 为 Streamlit UploadedFile 或其他带 getvalue() 的对象，parser 收到的是内容的 BytesIO 副本。
+        """
+        key = (self.digest(file), _parser_name(parser), tuple(sorted(options.items())))
+        found, value = self._get(key)
+        if found:
+            return value
+        value = parser(io.BytesIO(file.getvalue()), **options)
+        self._put(key, value)
+        return value
+
+    def _spill_path(self, key):
+        return os.path.join(self.spill_dir, hashlib.sha256(repr(key).encode("utf-8")).hexdigest() + ".pkl")
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[0]
+        if self.spill_dir:
+            path = self._spill_path(key)
+            try:
+                with open(path, "rb") as f:
+                    value = pickle.load(f)
+                os.utime(path)
+            except FileNotFoundError:
+                pass
+            except Exception:
+                # 文件损坏或由不兼容的版本写入，当作未命中
+                self._remove(path)
+            else:
+                with self._lock:
+                    self.spill_hits += 1
+                self._put(key, value, spilled=True)
+                return True, value
+        with self._lock:
+            self.misses += 1
+        return False, None
+
+    def _put(self, key, value, spilled=False):
+        size = sizeof(value)
+        evicted = []
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            if size <= self.max_bytes:
+                self._entries[key] = (value, size, spilled)
+                self.bytes += size
+            else:
+                evicted.append((key, (value, size, spilled)))
+            while self.bytes > self.max_bytes and self._entries:
+                old_key, entry = self._entries.popitem(last=False)
+                self.bytes -= entry[1]
+                evicted.append((old_key, entry))
+        if self.spill_dir:
+            # 写磁盘在锁外进行，不阻塞其他会话读缓存
+            for old_key, (old_value, _, old_spilled) in evicted:
+                if not old_spilled:
+                    self._spill(old_key, old_value)
+
+    def _spill(self, key, value):
+        path = self._spill_path(key)
+        tmp = path + ".tmp"
+        try:
+            with open(tmp, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except Exception:
+            self._remove(tmp)
+            return
+        self._trim_spill()
+
+    def _trim_spill(self):
+        """磁盘上的条目超过上限时按最近访问时间淘汰。"""
+        files = []
+        for name in os.listdir(self.spill_dir):
+            if name.endswith(".pkl"):
+                path = os.path.join(self.spill_dir, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.spill_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "spill_hits": self.spill_hits,
+                "misses": self.misses,
+            }
+
+
+_UPLOAD_CACHE = None
+_UPLOAD_CACHE_LOCK = threading.Lock()
+
+
+def get_upload_cache():
+    """获取进程级共享的上传文件解析缓存（所有会话、所有工具共用）。"""
+    global _UPLOAD_CACHE
+    with _UPLOAD_CACHE_LOCK:
+        if _UPLOAD_CACHE is None:
+            _UPLOAD_CACHE = UploadCache()
+        return _UPLOAD_CACHE
@@ -0,0 +1,127 @@
+import html
+import json
+from tools.spider.fetch_strategy import GOTO_TIMEOUT_MS
+from tools.spider.readiness import ALBUM_ITEM_SELECTOR, wait_for_album_items
+from tools.spider.resource_blocker import DEFAULT_BLOCKER, block_resources
+
+# 专辑页滚动加载时请求的文章列表接口
+ALBUM_API_MARKER = "action=getalbum"
+
+# 每次滚动后等待列表变长的最长时间（毫秒），连续 ALBUM_IDLE_ROUNDS 次不再变长视为已到底
+ALBUM_SCROLL_WAIT_MS = 3000
+ALBUM_IDLE_ROUNDS = 3
+ALBUM_MAX_SCROLLS = 1000
+
+# 一次 evaluate 取出所有列表项的链接和标题
+_EXTRACT_ITEMS_JS = """
+(selector) => Array.from(document.querySelectorAll(selector), el => {
+    const title = el.querySelector('.album__item-title');
+    return [el.getAttribute('data-link') || '', title ? title.innerText.trim() : (el.getAttribute('data-title') || '')];
+})
+"""
+
+_COUNT_ITEMS_JS = "(selector) => document.querySelectorAll(selector).length"
+
+_GREW_JS = "([selector, n]) => document.querySelectorAll(selector).length > n"
+
+
+def _link_key(link):
+    """去重用的链接标识：统一协议、去掉锚点。"""
+    return link.replace("http://", "https://", 1).split("#", 1)[0]
+
+
+class AlbumLinks:
+    """按发现顺序收集专辑文章链接，边收集边去重。"""
+
+    def __init__(self):
+        self.links = []
+        self.titles = []
+        self.finished = False
+        self._seen = set()
+
+    def __len__(self):
+        return len(self.links)
+
+    def add(self, link, title=""):
+        if not link:
+            return
+        # 接口返回的链接中 & 被转义为 &amp;
+        link = html.unescape(link).strip()
+        key = _link_key(link)
+        if key in self._seen:
+            return
+        self._seen.add(key)
+        self.links.append(link)
+        self.titles.append(html.unescape(title or "").strip())
+
+    def add_api_payload(self, data):
+        """解析文章列表接口的 JSON，返回本次新增的链接数。"""
+        resp = data.get("getalbum_resp") or {}
+        items = resp.get("article_list") or []
+        # 只有一篇文章时接口返回的是对象而不是列表
+        if isinstance(items, dict):
+            items = [items]
+        before = len(self.links)
+        for item in items:
+            self.add(item.get("url"), item.get("title"))
+        if str(resp.get("continue_flag", "1")) == "0":
+            self.finished = True
+        return len(self.links) - before
+
+
+async def harvest_album(page, url, state=None, max_scrolls=ALBUM_MAX_SCROLLS, scroll_wait_ms=ALBUM_SCROLL_WAIT_MS, idle_rounds=ALBUM_IDLE_ROUNDS):
+    """
+    打开专辑页并不断滚动到底，直到列表不再变长或接口返回已无更多。
+    滚动触发的文章列表接口响应直接从网络中截获解析，最后再一次性读取页面上的列表项补漏。
+    state 字典中的 "found" 实时更新为已发现的链接数，供界面显示进度。
+    返回 AlbumLinks。
+    """
+    album = AlbumLinks()
+
+    async def on_response(response):
+        if ALBUM_API_MARKER not in response.url:
+            return
+        try:
+            data = json.loads(await response.text())
+        except Exception:
+            return
+        album.add_api_payload(data)
+        if state is not None:
+            state["found"] = len(album)
+
+    page.on("response", on_response)
+    try:
+        await page.goto(url, wait_until="domcontentloaded", timeout=GOTO_TIMEOUT_MS)
+        await wait_for_album_items(page)
+        # 首屏列表项随页面直接下发，不经过接口
+        for link, title in await page.evaluate(_EXTRACT_ITEMS_JS, ALBUM_ITEM_SELECTOR):
+            album.add(link, title)
+        count = await page.evaluate(_COUNT_ITEMS_JS, ALBUM_ITEM_SELECTOR)
+        idle = 0
+        for _ in range(max_scrolls):
+            if album.finished or idle >= idle_rounds:
+                break
+            if state is not None:
+                state["found"] = len(album)
+            await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+            try:
+                await page.wait_for_function(_GREW_JS, arg=[ALBUM_ITEM_SELECTOR, count], timeout=scroll_wait_ms)
+                idle = 0
+            except Exception:
+                idle += 1
+            count = await page.evaluate(_COUNT_ITEMS_JS, ALBUM_ITEM_SELECTOR)
+        for link, title in await page.evaluate(_EXTRACT_ITEMS_JS, ALBUM_ITEM_SELECTOR):
+            album.add(link, title)
+    finally:
+        page.remove_listener("response", on_response)
+    if state is not None:
+        state["found"] = len(album)
+    return album
+
+
+async def collect_album_links(pool, url, state=None, blocker=DEFAULT_BLOCKER):
+    """打开公众号专辑页，返回 (链接列表, 标题列表)。"""
+    async with pool.page() as page:
+        async with block_resources(page, blocker):
+            album = await harvest_album(page, url, state)
+    return album.links, album.titles
@@ -0,0 +1,242 @@
+import html
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from tools.spider.fetch_cache import DEFAULT_CACHE_DIR
+from tools.spider.retry import STATUS_OK
+
+DEFAULT_ARCHIVE_PATH = os.path.join(DEFAULT_CACHE_DIR, "archive.sqlite3")
+
+# 后台写入时每批最多条数，以及未攒满时最长等待秒数
+ARCHIVE_BATCH_SIZE = 200
+ARCHIVE_FLUSH_INTERVAL = 1.0
+
+# 搜索结果摘要的长度（字）
+SNIPPET_CHARS = 120
+
+_CJK_RUN = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+")
+_CJK_CHAR = re.compile(r"^[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]$")
+
+
+def _bigrams(match):
+    run = match.group(0)
+    if len(run) == 1:
+        return f" {run} "
+    return " " + " ".join(run[i:i + 2] for i in range(len(run) - 1)) + " "
+
+
+def segment(text):
+    """连续的中文拆成重叠的二字词，其余文本原样保留，交给 FTS5 的 unicode61 分词。"""
+    return _CJK_RUN.sub(_bigrams, text or "")
+
+
+def build_match_query(query):
+    """
+    把用户输入的关键词（空格分隔，全部需要命中）转换为 FTS5 MATCH 表达式。
+    每个关键词按索引时同样的方式切分后作为短语匹配；单个汉字按前缀匹配（位于词尾的单字可能漏检）。
+    没有可检索的内容时返回 None。
+    """
+    parts = []
+    for term in query.split():
+        tokens = segment(term).split()
+        if not tokens:
+            continue
+        phrase = '"' + " ".join(tokens).replace('"', '""') + '"'
+        if len(tokens) == 1 and _CJK_CHAR.match(tokens[0]):
+            phrase += "*"
+        parts.append(phrase)
+    return " AND ".join(parts) if parts else None
+
+
+def _highlight(text, pattern):
+    """转义 text 为 HTML，pattern 的每处匹配用 <mark> 包裹；一次扫描完成，已高亮的内容不会再被较短的关键词匹配。"""
+    parts = []
+    last = 0
+    for m in pattern.finditer(text):
+        parts.append(html.escape(text[last:m.start()]))
+        parts.append(f"<mark>{html.escape(m.group(0))}</mark>")
+        last = m.end()
+    parts.append(html.escape(text[last:]))
+    return "".join(parts)
+
+
+def make_snippet(content, query, length=SNIPPET_CHARS):
+    """截取正文中第一个关键词附近的一段，关键词用 <mark> 高亮（与 FTS5 检索一致，不区分大小写），返回 HTML。"""
+    content = " ".join((content or "").split())
+    terms = [t for t in query.split() if t]
+    if not terms:
+        excerpt = content[:length]
+        return html.escape(excerpt) + ("…" if length < len(content) else "")
+    # 长关键词优先，同一位置既能匹配长词又能匹配其中的短词时高亮长词
+    pattern = re.compile("|".join(map(re.escape, sorted(terms, key=len, reverse=True))), re.IGNORECASE)
+    first = pattern.search(content)
+    start = max(0, first.start() - length // 4) if first else 0
+    excerpt = content[start:start + length]
+    return ("…" if start else "") + _highlight(excerpt, pattern) + ("…" if start + length < len(content) else "")
+
+
+class ArticleArchive:
+    """
+    本地文章库（SQLite）：按网址保存爬取成功的文章，标题和正文建 FTS5 全文索引。
+    索引表不另存原文（contentless），中文按二字词切分后入索引，关键词检索按 bm25 排序、标题权重更高。
+    """
+
+    def __init__(self, path=DEFAULT_ARCHIVE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS articles ("
+                "id INTEGER PRIMARY KEY, url TEXT UNIQUE, title TEXT, content TEXT, source TEXT, crawled_at REAL)"
+            )
+            conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(title, content, content='')")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def add_many(self, rows, source=""):
+        """在一个事务中写入多篇文章（标题、链接、内容），同一网址覆盖旧记录，内容未变的跳过。返回实际写入的篇数。"""
+        now = time.time()
+        written = 0
+        with self._connect() as conn:
+            for row in rows:
+                url, title, content = row["链接"], row.get("标题") or "", row.get("内容") or ""
+                old = conn.execute("SELECT id, title, content FROM articles WHERE url=?", (url,)).fetchone()
+                if old is not None:
+                    article_id, old_title, old_content = old
+                    if old_title == title and old_content == content:
+                        continue
+                    conn.execute(
+                        "INSERT INTO articles_fts (articles_fts, rowid, title, content) VALUES ('delete', ?, ?, ?)",
+                        (article_id, segment(old_title), segment(old_content)),
+                    )
+                    conn.execute(
+                        "UPDATE articles SET title=?, content=?, source=?, crawled_at=? WHERE id=?",
+                        (title, content, source, now, article_id),
+                    )
+                else:
+                    article_id = conn.execute(
+                        "INSERT INTO articles (url, title, content, source, crawled_at) VALUES (?, ?, ?, ?, ?)",
+                        (url, title, content, source, now),
+                    ).lastrowid
+                conn.execute(
+                    "INSERT INTO articles_fts (rowid, title, content) VALUES (?, ?, ?)",
+                    (article_id, segment(title), segment(content)),
+                )
+                written += 1
+        return written
+
+    def count(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def search(self, query, limit=20, offset=0):
+        """关键词检索，返回 (命中总数, 当页结果)；结果含 id、标题、链接、来源、时间和高亮摘要。"""
+        match = build_match_query(query)
+        if match is None:
+            return 0, []
+        with self._connect() as conn:
+            total = conn.execute("SELECT COUNT(*) FROM articles_fts WHERE articles_fts MATCH ?", (match,)).fetchone()[0]
+            rows = conn.execute(
+                "SELECT a.id, a.title, a.url, a.source, a.crawled_at, a.content "
+                "FROM articles_fts JOIN articles a ON a.id = articles_fts.rowid "
+                "WHERE articles_fts MATCH ? ORDER BY bm25(articles_fts, 5.0, 1.0) LIMIT ? OFFSET ?",
+                (match, limit, offset),
+            ).fetchall()
+        results = [
+            {"id": article_id, "标题": title, "链接": url, "来源": source, "时间": crawled_at, "摘要": make_snippet(content, query)}
+            for article_id, title, url, source, crawled_at, content in rows
+        ]
+        return total, results
+
+    def get(self, article_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT title, url, content, source, crawled_at FROM articles WHERE id=?", (article_id,)).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("标题", "链接", "内容", "来源", "时间"), row))
+
+
+class ArchiveWriter:
+    """
+    后台线程批量写入文章库：add() 只把结果放入队列，不阻塞爬取事件循环；
+    写入线程每攒够 batch_size 条或每隔 flush_interval 秒在一个事务中写入一批。
+    """
+
+    def __init__(self, archive, source="", batch_size=ARCHIVE_BATCH_SIZE, flush_interval=ARCHIVE_FLUSH_INTERVAL):
+        self.archive = archive
+        self.source = source
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.error = None
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="spider-archive-writer", daemon=True)
+        self._thread.start()
+
+    def add(self, row):
+        self._queue.put(row)
+
+    def _run(self):
+        closing = False
+        while not closing:
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    row = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if row is None:
+                    closing = True
+                    break
+                batch.append(row)
+            if batch:
+                try:
+                    self.written += self.archive.add_many(batch, self.source)
+                except sqlite3.Error as e:
+                    # 文章库写入失败不影响爬取结果，记下错误供界面提示
+                    self.error = str(e)
+
+    def close(self):
+        """写完队列中剩余的结果后返回。"""
+        self._queue.put(None)
+        self._thread.join()
+
+
+class ArchivingSink:
+    """在写入结果文件的同时，把爬取成功的文章交给 ArchiveWriter 存入文章库。"""
+
+    def __init__(self, sink, writer):
+        self.sink = sink
+        self.writer = writer
+
+    def write(self, idx, result):
+        self.sink.write(idx, result)
+        if result.get("状态", STATUS_OK) == STATUS_OK and result.get("内容"):
+            self.writer.add(result)
+
+
+_ARCHIVE = None
+_ARCHIVE_LOCK = threading.Lock()
+
+
+def get_article_archive():
+    """获取默认位置的本地文章库。"""
+    global _ARCHIVE
+    with _ARCHIVE_LOCK:
+        if _ARCHIVE is None:
+            _ARCHIVE = ArticleArchive()
+        return _ARCHIVE
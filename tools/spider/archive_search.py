@@ -0,0 +1,47 @@
+import html
+import math
+import time
+import streamlit as st
+from tools.spider.archive import get_article_archive
+from tools.spider.common import show_scrollable_preview
+
+SEARCH_PAGE_SIZE = 20
+
+def archive_search_main():
+    archive = get_article_archive()
+    st.caption(f'本地文章库共 {archive.count()} 篇文章。批量爬取时勾选“存入本地文章库”即可加入。')
+    query = st.text_input('关键词（多个关键词用空格分隔，需全部命中）', key='archive_query')
+    if not query.strip():
+        return
+    page = st.session_state.get('archive_page', 1)
+    started = time.perf_counter()
+    total, results = archive.search(query, limit=SEARCH_PAGE_SIZE, offset=(page - 1) * SEARCH_PAGE_SIZE)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if not total:
+        st.info(f'没有找到包含“{query}”的文章（用时 {elapsed_ms:.1f} 毫秒）。')
+        return
+    pages = math.ceil(total / SEARCH_PAGE_SIZE)
+    if page > pages:
+        # 换了关键词后原页码超出范围，回到第一页
+        page = 1
+        st.session_state['archive_page'] = 1
+        total, results = archive.search(query, limit=SEARCH_PAGE_SIZE)
+    st.caption(f'找到 {total} 篇，用时 {elapsed_ms:.1f} 毫秒；第 {page}/{pages} 页。')
+    for item in results:
+        crawled = time.strftime('%Y-%m-%d %H:%M', time.localtime(item['时间'])) if item['时间'] else ''
+        st.markdown(
+            f"<div style='margin-bottom:14px;'><b style='color:#222'>{html.escape(item['标题'] or item['链接'])}</b><br>"
+            f"<span style='color:#888;font-size:13px'>{html.escape(item['链接'])} · {crawled}</span><br>"
+            f"<span style='color:#222;font-size:14px'>{item['摘要']}</span></div>",
+            unsafe_allow_html=True,
+        )
+    col1, col2 = st.columns(2)
+    with col1:
+        st.number_input('页码', min_value=1, max_value=pages, step=1, key='archive_page')
+    with col2:
+        options = {item['id']: item['标题'] or item['链接'] for item in results}
+        article_id = st.selectbox('查看全文', [None] + list(options), format_func=lambda i: '（选择一篇文章）' if i is None else options[i], key='archive_article')
+    if article_id is not None:
+        article = archive.get(article_id)
+        if article is not None:
+            show_scrollable_preview(f"<div style='white-space:pre-wrap'>{html.escape(article['内容'] or '')}</div>", height=400)
@@ -1,21 +1,121 @@
 import streamlit as st
 import pandas as pd
-import asyncio
-from playwright.async_api import async_playwright
-from tools.spider.common import clean_content, show_results
+from tools.spider.archive import ArchiveWriter, ArchivingSink, get_article_archive
+from tools.spider.browser_pool import get_browser_pool
+from tools.spider.common import show_results
+from tools.spider.crawler import crawl_urls
+from tools.spider.dedup import DEDUP_MODE_LABELS, DEDUP_OFF, CrawlDedup, get_dedup_store
+from tools.spider.fetch_cache import get_fetch_cache
+from tools.spider.journal import get_crawl_journal, job_id_for
+from tools.spider.readiness import DEFAULT_MAX_WAIT_MS
+from tools.spider.result_sink import ResultSink
+from tools.spider.resource_blocker import DEFAULT_BLOCKER, format_saved
+from tools.spider.retry import FAILURE_LABELS
+from tools.spider.scheduler import DEFAULT_HOST_MAX, DEFAULT_HOST_RATE, HostScheduler
+from tools.spider.timings import CrawlTimings
+from tools.shared.job_view import job_panel, job_running, submit_job
+from tools.shared.jobs import JOB_DONE
 
-async def fetch_one(browser, url, title):
-    page = await browser.new_page(user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-    try:
-        await page.goto(url, wait_until="domcontentloaded", timeout=60000)
-        await page.wait_for_timeout(3000)
-        content = await page.content()
-        cleaned = clean_content(content)
-        return {"标题": title, "链接": url, "内容": cleaned}
-    except Exception as e:
-        return {"标题": title, "链接": url, "内容": f"抓取失败: {e}"}
-    finally:
-        await page.close()
+def resume_option(job_id, key):
+    """日志中已有该任务的进度时提示并让用户选择是否续爬，返回是否续爬。"""
+    succeeded, failed = get_crawl_journal().summary(job_id)
+    if not succeeded and not failed:
+        return True
+    st.info(f'检测到这批链接的历史进度：已成功 {succeeded} 篇，失败 {failed} 篇。')
+    return st.checkbox('从上次进度继续（跳过已成功的链接，只重试失败和未完成的）', value=True, key=key)
+
+def _batch_crawl_job(job, kind, job_id, urls, titles, max_concurrent, fetch_kwargs, resume, dedup, archive):
+    journal = get_crawl_journal()
+    if not resume:
+        journal.clear(job_id)
+    journal.start(job_id, kind, len(urls))
+    pool = get_browser_pool()
+    progress = job.reporter(total=len(urls))
+    writer = ArchiveWriter(get_article_archive(), source=kind) if archive else None
+    with ResultSink(kind) as sink:
+        target = ArchivingSink(sink, writer) if writer is not None else sink
+        try:
+            # 进度由 progress 按固定频率写入任务；这里只在任务线程中检查取消，取消时中断 pool.run 并取消爬取协程
+            pool.run(crawl_urls(pool, urls, titles, max_concurrent, fetch_kwargs, progress, target, journal, job_id, dedup), on_tick=job.check_cancelled)
+        finally:
+            if writer is not None:
+                writer.close()
+    return {"sink": sink, "archive": writer, "stats": fetch_kwargs.get("stats"), "scheduler": fetch_kwargs.get("scheduler"), "dedup": dedup, "timings": fetch_kwargs.get("timings")}
+
+def start_batch_crawl(session_key, kind, job_id, urls, titles, max_concurrent, fetch_kwargs, resume=True, dedup=None, archive=False):
+    """把批量爬取提交为后台任务，任务 ID 记在 session_state[session_key]；结果流式写入文件，archive 为 True 时同时存入本地文章库。"""
+    return submit_job(session_key, 'spider', _batch_crawl_job, kind, job_id, urls, titles, max_concurrent, fetch_kwargs, resume, dedup, archive, title='批量爬取')
+
+def show_batch_result(result, file_name):
+    """展示已完成的批量爬取任务结果。"""
+    sink = result["sink"]
+    if not sink.count:
+        st.warning('没有爬取到数据。')
+        return
+    st.success('批量爬取完成！')
+    show_crawl_stats(result["stats"], result["scheduler"], result["dedup"])
+    writer = result.get("archive")
+    if writer is not None:
+        if writer.error:
+            st.warning(f'存入本地文章库失败：{writer.error}')
+        else:
+            st.caption(f'已存入本地文章库 {writer.written} 篇（内容未变的文章不重复写入），可在“文章库检索”中搜索。')
+    show_timings(result.get("timings"), file_name.rsplit('.', 1)[0])
+    show_results(sink, file_name=file_name, key=file_name.rsplit('.', 1)[0])
+
+def show_timings(timings, name):
+    """逐链接计时的汇总：各阶段耗时分位数表，以及明细 CSV 和 Prometheus 指标下载。"""
+    if not timings:
+        return
+    with st.expander(f'抓取耗时分析（{len(timings)} 个链接）'):
+        summary = pd.DataFrame(timings.summary()).drop(columns=['phase'])
+        st.dataframe(summary, hide_index=True)
+        st.caption('各阶段只统计经历过该阶段的链接；多次尝试时同一阶段的耗时累加。字节数为 HTTP 响应或渲染后 HTML 的大小。')
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button('下载逐链接计时CSV', timings.to_csv, f'{name}_timings.csv', 'text/csv', key=f'{name}_timings_csv', on_click='ignore')
+        with col2:
+            st.download_button('下载 Prometheus 指标', timings.to_prometheus, f'{name}_metrics.prom', 'text/plain', key=f'{name}_timings_prom', on_click='ignore')
+
+def dedup_options(key):
+    """去重设置，返回 CrawlDedup 或 None（不去重）。"""
+    col1, col2 = st.columns(2)
+    with col1:
+        mode = st.selectbox('重复文章处理', list(DEDUP_MODE_LABELS), format_func=DEDUP_MODE_LABELS.get, index=1, key=f'{key}_dedup_mode')
+    with col2:
+        across_jobs = st.checkbox('跨任务去重（与以往任务抓过的文章比对）', value=False, key=f'{key}_dedup_global', disabled=mode == DEDUP_OFF)
+    if mode == DEDUP_OFF:
+        return None
+    return CrawlDedup(mode, store=get_dedup_store() if across_jobs else None)
+
+def scheduler_options(key):
+    """单域名并发与限速设置，返回 (单域名最大并发, 单域名每秒请求数)。"""
+    col1, col2 = st.columns(2)
+    with col1:
+        host_max = st.number_input('单域名最大并发（按响应自动增减）', min_value=1, max_value=20, value=DEFAULT_HOST_MAX, step=1, key=f'{key}_host_max')
+    with col2:
+        host_rate = st.number_input('单域名每秒最多请求数（0 为不限）', min_value=0.0, max_value=50.0, value=DEFAULT_HOST_RATE, step=0.5, key=f'{key}_host_rate')
+    return host_max, host_rate
+
+def show_crawl_stats(stats, scheduler=None, dedup=None):
+    if stats:
+        st.caption(f"缓存命中 {stats.get('cache', 0)} 篇，HTTP 直取 {stats.get('http', 0)} 篇，浏览器渲染 {stats.get('browser', 0)} 篇。{format_saved(stats)}")
+        failures = stats.get("failures")
+        if failures or stats.get("retried"):
+            detail = "，".join(f"{FAILURE_LABELS.get(kind, kind)} {n} 篇" for kind, n in sorted(failures.items(), key=lambda kv: -kv[1])) if failures else "无"
+            st.caption(f"重试后成功 {stats.get('retried', 0)} 篇；失败分类：{detail}")
+    if scheduler is not None:
+        hosts = sorted(scheduler.snapshot().items(), key=lambda kv: -(kv[1]["succeeded"] + kv[1]["failed"]))[:5]
+        if hosts:
+            st.caption("；".join(
+                f"{host}：并发上限 {h['limit']}，平均耗时 {h['latency'] if h['latency'] is not None else '-'} 秒，成功 {h['succeeded']} / 失败 {h['failed']}"
+                for host, h in hosts
+            ))
+    if dedup is not None:
+        d = dedup.snapshot()
+        if d["skipped_fetches"] or d["near_duplicates"]:
+            action = '已丢弃' if dedup.drop else '已标记'
+            st.caption(f"重复网址跳过抓取 {d['skipped_fetches']} 篇，正文近似重复 {d['near_duplicates']} 篇（{action}）。")
 
 def batch_scraper_main():
     uploaded_file = st.file_uploader("选择一个包含URL的CSV文件", type="csv")
@@ -32,40 +132,33 @@ def batch_scraper_main():
         if url_col:
             urls = data[url_col].tolist()
             titles = data[title_col].tolist() if title_col else [None]*len(urls)
-            if st.button('开始批量爬取'):
+            titles = [t if isinstance(t, str) and t else u for t, u in zip(titles, urls)]
+            job_id = job_id_for('batch', urls)
+            max_concurrent = st.number_input('最大总并发数', min_value=1, max_value=50, value=10, step=1, key='batch_max_concurrent')
+            host_max, host_rate = scheduler_options('batch')
+            dedup = dedup_options('batch')
+            max_wait_s = st.number_input('单页最长等待秒数（正文出现即提前结束）', min_value=1, max_value=60, value=DEFAULT_MAX_WAIT_MS // 1000, step=1, key='batch_max_wait')
+            block_assets = st.checkbox('拦截图片、字体、视频和统计脚本（加快抓取、节省流量）', value=True, key='batch_block_assets')
+            use_cache = st.checkbox('使用本地缓存（24 小时内抓过的链接直接复用结果）', value=True, key='batch_use_cache')
+            archive = st.checkbox('存入本地文章库（可在“文章库检索”中全文搜索）', value=False, key='batch_archive')
+            resume = resume_option(job_id, key='batch_resume')
+            if st.button('开始批量爬取', disabled=job_running('batch_crawl_job')):
                 st.info(f'共 {len(urls)} 个链接，开始批量爬取...')
-                max_concurrent = st.number_input('最大并发数', min_value=1, max_value=20, value=5, step=1)
-                results = [None] * len(urls)
-                progress_bar = st.progress(0)
-                progress_text = st.empty()
-                finished = 0
-                async def run_scrape_tasks():
-                    nonlocal finished
-                    async with async_playwright() as p:
-                        browser = await p.chromium.launch()
-                        sem = asyncio.Semaphore(max_concurrent)
-                        async def sem_fetch(idx):
-                            nonlocal finished
-                            async with sem:
-                                res = await fetch_one(browser, urls[idx], titles[idx] if titles[idx] else urls[idx])
-                                results[idx] = res
-                                finished += 1
-                                percent = int(finished/len(urls)*100)
-                                progress_bar.progress(percent, text=f"已完成 {finished}/{len(urls)} 篇（{percent}%）")
-                                progress_text.text(f"正在爬取第 {finished} 篇：{titles[idx] if titles[idx] else urls[idx]}")
-                        await asyncio.gather(*(sem_fetch(idx) for idx in range(len(urls))))
-                        await browser.close()
-                asyncio.run(run_scrape_tasks())
-                df_results = pd.DataFrame(results)
-                if not df_results.empty:
-                    st.success('批量爬取完成！')
-                    st.session_state['batch_scrape_results'] = df_results
-                    show_results(df_results, preview_count=3, file_name='scrape_results.csv')
-                else:
-                    st.warning('没有爬取到数据。')
+                fetch_kwargs = {
+                    "max_wait_ms": max_wait_s * 1000,
+                    "stats": {},
+                    "blocker": DEFAULT_BLOCKER if block_assets else None,
+                    "cache": get_fetch_cache() if use_cache else None,
+                    "scheduler": HostScheduler(max_total=max_concurrent, host_max=host_max, host_rate=host_rate),
+                    "timings": CrawlTimings(),
+                }
+                start_batch_crawl('batch_crawl_job', 'batch', job_id, urls, titles, max_concurrent, fetch_kwargs, resume, dedup, archive)
+            job = job_panel('batch_crawl_job')
+            if job is not None and job.status == JOB_DONE:
+                st.session_state['batch_scrape_results'] = job.result["sink"]
+                show_batch_result(job.result, file_name='scrape_results.csv')
         elif 'batch_scrape_results' in st.session_state:
-            df_results = st.session_state['batch_scrape_results']
             st.success('已加载上次批量爬取结果。')
-            show_results(df_results, preview_count=3, file_name='scrape_results.csv')
+            show_results(st.session_state['batch_scrape_results'], file_name='scrape_results.csv', key='scrape_results')
         else:
-            st.error("CSV文件中未检测到'url'或'链接'列。") 
\ No newline at end of file
+            st.error("CSV文件中未检测到'url'或'链接'列。")
@@ -0,0 +1,59 @@
+"""
+正文提取基准：在保存的网页语料上对比 lxml 快速实现与原 BeautifulSoup 实现的输出一致性和耗时。
+
+用法（在仓库根目录执行）：
+    python -m tools.spider.benchmarks.bench_extractor [语料目录] [-n 重复次数]
+
+语料目录默认为本目录下的 corpus/，可放入另存的公众号/知乎/CSDN 等网页 HTML 文件。
+其中只有 generic_mdbook_saved.html 是另存的真实网页（mdBook 生成的 rustdoc 文档页）；
+wechat_mp_synthetic.html、zhihu_zhuanlan_synthetic.html 是离线仿照公众号（js_content）和知乎专栏
+（Post-RichText）页面模板构造的，其余文件是覆盖各站点规则的构造页面，都不是真实抓取的网页。
+检验真实网页上的一致性时，把浏览器另存的页面放入语料目录后运行。
+"""
+import argparse
+import os
+import time
+from tools.spider.extractor import clean_content_bs4, clean_content_lxml, etree
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), "corpus")
+
+
+def _time_it(func, html, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(html)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对比 clean_content 的 lxml 与 BeautifulSoup 实现")
+    parser.add_argument("corpus", nargs="?", default=DEFAULT_CORPUS, help="HTML 语料目录")
+    parser.add_argument("-n", "--repeat", type=int, default=20, help="每个文件的重复次数")
+    args = parser.parse_args()
+    if etree is None:
+        raise SystemExit("未安装 lxml，无法运行基准。")
+
+    files = sorted(f for f in os.listdir(args.corpus) if f.endswith((".html", ".htm")))
+    if not files:
+        raise SystemExit(f"语料目录中没有 HTML 文件：{args.corpus}")
+
+    print(f"{'文件':<28}{'大小KB':>8}{'bs4 ms':>10}{'lxml ms':>10}{'加速':>8}  一致")
+    total_bs4 = total_lxml = 0.0
+    mismatches = 0
+    for name in files:
+        with open(os.path.join(args.corpus, name), encoding="utf-8", errors="replace") as f:
+            html = f.read()
+        same = clean_content_bs4(html) == clean_content_lxml(html)
+        mismatches += 0 if same else 1
+        t_bs4 = _time_it(clean_content_bs4, html, args.repeat)
+        t_lxml = _time_it(clean_content_lxml, html, args.repeat)
+        total_bs4 += t_bs4
+        total_lxml += t_lxml
+        print(f"{name:<28}{len(html) / 1024:>8.1f}{t_bs4:>10.2f}{t_lxml:>10.2f}{t_bs4 / t_lxml:>7.1f}x  {'是' if same else '否'}")
+    print(f"{'合计':<28}{'':>8}{total_bs4:>10.2f}{total_lxml:>10.2f}{total_bs4 / total_lxml:>7.1f}x")
+    if mismatches:
+        print(f"注意：{mismatches} 个文件输出不一致（多为不规范 HTML 在两种解析器下结构不同）。")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+import asyncio
+import atexit
+import concurrent.futures
+import threading
+from contextlib import asynccontextmanager
+from playwright.async_api import async_playwright
+from tools.shared.governor import RESOURCE_BROWSER_PAGES, get_governor
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+
+class BrowserPool:
+    """
+    常驻 Chromium 浏览器池：浏览器运行在独立后台线程的事件循环中，跨 Streamlit 重跑和会话复用。
+    页面按需分配、用完归还，使用满 max_page_uses 次或健康检查失败后关闭重建。
+    传入 governor（ResourceGovernor）时，同时打开的页面总数受其上限控制，超出时按任务公平排队；
+    空闲页缓存也不超过该上限，归还后仍保持打开的页面不会让实际页面数超出 governor 公布的上限。
+    """
+
+    def __init__(self, max_page_uses=50, max_idle_pages=20, headless=True, user_agent=DEFAULT_USER_AGENT, governor=None):
+        self.max_page_uses = max_page_uses
+        if governor is not None:
+            max_idle_pages = min(max_idle_pages, governor.resources[RESOURCE_BROWSER_PAGES].capacity)
+        self.max_idle_pages = max_idle_pages
+        self.headless = headless
+        self.user_agent = user_agent
+        self.governor = governor
+        self._loop = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._browser_lock = None
+        self._playwright = None
+        self._browser = None
+        self._context = None
+        self._generation = 0
+        self._idle = []
+        self._page_info = {}
+
+    # ---------- 后台事件循环 ----------
+    def _ensure_loop(self):
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._run_loop, name="spider-browser-pool", daemon=True)
+            self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._browser_lock = asyncio.Lock()
+        self._loop.run_forever()
+
+    def submit(self, coro):
+        """把协程提交到浏览器池所在的事件循环，返回 concurrent.futures.Future。"""
+        self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def run(self, coro, on_tick=None, interval=0.2):
+        """
+        在浏览器池事件循环中执行协程并阻塞等待结果。
+        on_tick 会在调用方线程中按 interval 秒周期调用（结束时再调用一次），用于刷新 Streamlit 进度等界面元素。
+        """
+        future = self.submit(coro)
+        try:
+            while True:
+                done, _ = concurrent.futures.wait([future], timeout=interval)
+                if on_tick:
+                    on_tick()
+                if done:
+                    return future.result()
+        except BaseException:
+            # 调用方被中断（如 Streamlit 重跑抛出 StopException）时取消协程，避免任务在后台空转
+            future.cancel()
+            raise
+
+    # ---------- 浏览器与页面管理（仅在池事件循环内调用） ----------
+    async def _ensure_browser(self):
+        async with self._browser_lock:
+            if self._browser is not None and self._browser.is_connected():
+                return
+            await self._close_browser()
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(headless=self.headless)
+            self._context = await self._browser.new_context(user_agent=self.user_agent)
+            self._generation += 1
+
+    async def _close_browser(self):
+        self._idle.clear()
+        self._page_info.clear()
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception:
+                pass
+        self._browser = None
+        self._context = None
+
+    def _is_healthy(self, page):
+        info = self._page_info.get(page)
+        return (
+            info is not None
+            and info["generation"] == self._generation
+            and not page.is_closed()
+            and self._browser is not None
+            and self._browser.is_connected()
+        )
+
+    async def _discard(self, page):
+        self._page_info.pop(page, None)
+        try:
+            if not page.is_closed():
+                await page.close()
+        except Exception:
+            pass
+
+    async def acquire(self):
+        """取出一个健康的空闲页面，没有则新建。"""
+        await self._ensure_browser()
+        while self._idle:
+            page = self._idle.pop()
+            if self._is_healthy(page):
+                return page
+            await self._discard(page)
+        page = await self._context.new_page()
+        self._page_info[page] = {"generation": self._generation, "uses": 0}
+        return page
+
+    async def release(self, page, reusable=True):
+        """归还页面；出错、用满次数或空闲页过多时直接关闭。"""
+        info = self._page_info.get(page)
+        if info is not None:
+            info["uses"] += 1
+        if (
+            not reusable
+            or not self._is_healthy(page)
+            or info["uses"] >= self.max_page_uses
+            or len(self._idle) >= self.max_idle_pages
+        ):
+            await self._discard(page)
+            return
+        try:
+            # 跳转空白页释放上一个网页的 DOM 和脚本内存
+            await page.goto("about:blank")
+        except Exception:
+            await self._discard(page)
+            return
+        self._idle.append(page)
+
+    @asynccontextmanager
+    async def page(self):
+        """async with pool.page() as page: ... 用完自动归还。"""
+        if self.governor is None:
+            async with self._page() as page:
+                yield page
+            return
+        async with self.governor.async_slot(RESOURCE_BROWSER_PAGES):
+            async with self._page() as page:
+                yield page
+
+    @asynccontextmanager
+    async def _page(self):
+        page = await self.acquire()
+        ok = False
+        try:
+            yield page
+            ok = True
+        finally:
+            await self.release(page, reusable=ok)
+
+    async def _shutdown(self):
+        await self._close_browser()
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    def shutdown(self, timeout=10):
+        """关闭浏览器并停止后台事件循环。"""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout=timeout)
+        except Exception:
+            pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=timeout)
+        self._thread = None
+
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_browser_pool():
+    """获取进程级共享的浏览器池（所有会话、所有爬虫页签共用）。"""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = BrowserPool(governor=get_governor())
+            atexit.register(_POOL.shutdown)
+        return _POOL
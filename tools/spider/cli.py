@@ -0,0 +1,292 @@
+# cli.py
+# 命令行批量爬虫：脱离 Streamlit 运行，把链接列表分给多个工作进程，每个进程各自运行一个浏览器，结束后合并结果。
+# 用法：python -m tools.spider.cli urls.csv -o results.jsonl --workers 4
+
+import argparse
+import csv
+import glob
+import json
+import math
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from tools.spider.dedup import DEDUP_MARK, DEDUP_MODE_LABELS, DEFAULT_DEDUP_PATH, STATUS_DUPLICATE
+from tools.spider.journal import get_crawl_journal, job_id_for
+from tools.spider.readiness import DEFAULT_MAX_WAIT_MS
+from tools.spider.result_sink import RESULT_FIELDS
+from tools.spider.retry import STATUS_OK
+from tools.spider.scheduler import DEFAULT_HOST_MAX, DEFAULT_HOST_RATE
+from tools.spider.timings import CrawlTimings
+from tools.shared.progress import ProgressReporter, format_progress
+
+URL_COLUMNS = ("url", "链接")
+TITLE_COLUMNS = ("标题", "title", "name")
+
+
+def read_url_list(path):
+    """读取 CSV 或 JSONL 格式的链接列表，返回 (链接列表, 标题列表)；缺少标题时用链接代替。"""
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        if path.lower().endswith((".jsonl", ".ndjson")):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+    urls = []
+    titles = []
+    for row in rows:
+        url = title = None
+        for key, value in row.items():
+            name = str(key).strip()
+            if name.lower() in URL_COLUMNS:
+                url = value
+            if name in TITLE_COLUMNS:
+                title = value
+        if isinstance(url, str) and url.strip():
+            url = url.strip()
+            urls.append(url)
+            titles.append(title if isinstance(title, str) and title else url)
+    return urls, titles
+
+
+def shard_indices(total, workers):
+    """按序号轮流分配到各工作进程，同一域名的链接分散到所有进程。"""
+    return [list(range(shard, total, workers)) for shard in range(workers)]
+
+
+class _ShardSink:
+    """把分片内的序号映射回原列表中的序号后写入。"""
+
+    def __init__(self, sink, indices):
+        self.sink = sink
+        self.indices = indices
+
+    def write(self, idx, result):
+        self.sink.write(self.indices[idx], result)
+
+
+class _ShardJournal:
+    """
+    分片读写整个链接列表共用的进度日志：日志按原列表中的序号记录，
+    续爬时与工作进程数无关，换用不同的 -w 重新运行也能接着上次的进度。
+    """
+
+    def __init__(self, journal, indices):
+        self.journal = journal
+        self.indices = indices
+        self._local = {i: local for local, i in enumerate(indices)}
+
+    def record(self, job_id, idx, result, ok):
+        self.journal.record(job_id, self.indices[idx], result, ok)
+
+    def iter_succeeded(self, job_id):
+        for idx, row in self.journal.iter_succeeded(job_id):
+            local = self._local.get(idx)
+            if local is not None:
+                yield local, row
+
+
+def _run_shard(shard, indices, urls, titles, out_dir, options, counters):
+    # 在工作进程中才导入浏览器等重依赖
+    from tools.spider.archive import ArchiveWriter, ArchivingSink, ArticleArchive
+    from tools.spider.browser_pool import BrowserPool
+    from tools.spider.crawler import crawl_urls
+    from tools.spider.dedup import DEDUP_OFF, CrawlDedup, DedupStore
+    from tools.spider.extract_pool import ExtractPool
+    from tools.spider.fetch_cache import get_fetch_cache
+    from tools.spider.resource_blocker import DEFAULT_BLOCKER
+    from tools.spider.result_sink import ResultSink
+    from tools.spider.scheduler import HostScheduler
+    from tools.spider.timings import CrawlTimings
+
+    pool = BrowserPool()
+    extractor = ExtractPool(max_workers=options["extract_workers"])
+    journal = _ShardJournal(get_crawl_journal(), indices)
+    job_id = options["job_id"]
+    fetch_kwargs = {
+        "max_wait_ms": options["max_wait_ms"],
+        "blocker": DEFAULT_BLOCKER if options["block_assets"] else None,
+        "cache": get_fetch_cache() if options["use_cache"] else None,
+        "scheduler": HostScheduler(max_total=options["concurrency"], host_max=options["host_max"], host_rate=options["host_rate"]),
+        "extractor": extractor,
+        "timings": CrawlTimings(),
+    }
+    dedup = None
+    if options["dedup"] != DEDUP_OFF:
+        # 各进程共用同一个指纹库，分到不同进程的重复链接也能识别
+        dedup = CrawlDedup(options["dedup"], store=DedupStore(options["dedup_path"]))
+    done, failed, skipped = counters
+    def publish(snapshot):
+        done[shard] = snapshot["done"]
+        failed[shard] = snapshot["failed"]
+        skipped[shard] = progress.skipped
+    progress = ProgressReporter(len(urls), publish, interval=1.0)
+    writer = ArchiveWriter(ArticleArchive(), source="cli") if options["archive"] else None
+    try:
+        with ResultSink(f"shard{shard}", directory=out_dir) as sink:
+            target = _ShardSink(sink, indices)
+            if writer is not None:
+                target = ArchivingSink(target, writer)
+            crawl = crawl_urls(pool, urls, titles, options["concurrency"], fetch_kwargs, progress, target, journal, job_id, dedup)
+            pool.run(crawl, interval=1.0)
+        fetch_kwargs["timings"].save(os.path.join(out_dir, f"shard{shard}.timings.csv"))
+    finally:
+        if writer is not None:
+            writer.close()
+        pool.shutdown()
+        extractor.shutdown(wait=True)
+
+
+def merge_shards(paths, output):
+    """
+    按序号合并各分片的 JSONL 结果并写入 output（按扩展名输出 CSV 或 JSONL），返回各状态的条数。
+    只在内存中保留 (序号, 分片, 文件偏移) 索引，正文逐行从分片文件读取。
+    """
+    index = []
+    for shard, path in enumerate(paths):
+        with open(path, "rb") as f:
+            offset = 0
+            for line in f:
+                index.append((json.loads(line)["序号"], shard, offset))
+                offset += len(line)
+    index.sort()
+    files = [open(path, "rb") for path in paths]
+    counts = {}
+    as_csv = output.lower().endswith(".csv")
+    try:
+        with open(output, "w", encoding="utf-8-sig" if as_csv else "utf-8", newline="") as out:
+            writer = csv.DictWriter(out, fieldnames=RESULT_FIELDS, extrasaction="ignore") if as_csv else None
+            if writer is not None:
+                writer.writeheader()
+            for _, shard, offset in index:
+                f = files[shard]
+                f.seek(offset)
+                line = f.readline()
+                row = json.loads(line)
+                counts[row.get("状态")] = counts.get(row.get("状态"), 0) + 1
+                if writer is not None:
+                    writer.writerow(row)
+                else:
+                    out.write(line.decode("utf-8").rstrip("\n") + "\n")
+    finally:
+        for f in files:
+            f.close()
+    return counts
+
+
+def run(input_path, output, workers, options, log=sys.stderr, metrics_path=None):
+    """分片爬取并合并结果，返回进程退出码；metrics_path 为逐链接计时的导出文件（.csv 或 Prometheus 文本）。"""
+    urls, titles = read_url_list(input_path)
+    if not urls:
+        print(f"{input_path} 中没有找到链接（需要 url 或 链接 列）", file=log)
+        return 1
+    workers = max(1, min(workers, len(urls)))
+    # 链接轮流分给各进程，单域名的并发和限速按实际进程数均分，合计不超过设定值；正文提取进程按 CPU 核数均分
+    options = {
+        **options,
+        "host_max": max(1, math.ceil(options["host_max"] / workers)),
+        "host_rate": options["host_rate"] / workers,
+        "extract_workers": max(1, (os.cpu_count() or 1) // workers),
+    }
+    # 进度日志按整个链接列表记录，由主进程在启动工作进程前清空或登记
+    journal = get_crawl_journal()
+    job_id = job_id_for("cli", urls)
+    if not options["resume"]:
+        journal.clear(job_id)
+    journal.start(job_id, "cli", len(urls))
+    options["job_id"] = job_id
+    ctx = multiprocessing.get_context("spawn")
+    # 各工作进程的 (已完成, 失败, 从日志恢复) 计数
+    counters = tuple(ctx.Array("i", workers) for _ in range(3))
+    out_dir = tempfile.mkdtemp(prefix="spider-cli-")
+    try:
+        if not options.get("dedup_path"):
+            # 未加 --dedup-global 时指纹库放在本次运行的临时目录，只在本次运行的各分片之间去重，运行结束即删除
+            options = {**options, "dedup_path": os.path.join(out_dir, "dedup.sqlite3")}
+        processes = []
+        for shard, indices in enumerate(shard_indices(len(urls), workers)):
+            proc = ctx.Process(
+                target=_run_shard,
+                args=(shard, indices, [urls[i] for i in indices], [titles[i] for i in indices], out_dir, options, counters),
+                name=f"spider-shard-{shard}",
+            )
+            proc.start()
+            processes.append(proc)
+        progress = ProgressReporter(len(urls))
+        try:
+            while any(p.is_alive() for p in processes):
+                time.sleep(2)
+                progress.set(*(sum(c) for c in counters))
+                print(f"\r{format_progress(progress.snapshot())}    ", end="", file=log, flush=True)
+            print(file=log)
+        except KeyboardInterrupt:
+            for p in processes:
+                p.terminate()
+            for p in processes:
+                p.join()
+            print("\n已中断，已完成的链接记录在进度日志中，重新运行同一命令即可续爬。", file=log)
+            return 130
+        crashed = [p.name for p in processes if p.exitcode != 0]
+        shard_files = sorted(glob.glob(os.path.join(out_dir, "*.jsonl")))
+        counts = merge_shards(shard_files, output)
+        timings = CrawlTimings.load_csv(sorted(glob.glob(os.path.join(out_dir, "*.timings.csv"))))
+        finished = sum(counters[0])
+        # drop 模式下丢弃的重复链接计入已完成但不在输出中
+        dropped = finished - sum(counts.values())
+        succeeded = counts.pop(STATUS_OK, 0)
+        duplicates = counts.pop(STATUS_DUPLICATE, 0) + dropped
+        unfinished = len(urls) - finished
+        print(f"已写入 {output}：成功 {succeeded} 篇，重复 {duplicates} 篇，失败 {sum(counts.values())} 篇，未完成 {unfinished} 篇。", file=log)
+        if timings:
+            total = next((entry for entry in timings.summary() if entry["phase"] == "total"), None)
+            if total is not None:
+                print(f"单链接耗时 p50 {total['p50_毫秒']} 毫秒，p90 {total['p90_毫秒']} 毫秒，p99 {total['p99_毫秒']} 毫秒。", file=log)
+            if metrics_path:
+                timings.save(metrics_path)
+                print(f"逐链接计时已写入 {metrics_path}。", file=log)
+        if crashed:
+            print(f"以下工作进程异常退出：{', '.join(crashed)}；重新运行同一命令可从进度日志续爬。", file=log)
+            return 2
+        return 0
+    finally:
+        # 中断或出错时也删除分片结果、计时和本次运行的指纹库
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="命令行批量爬虫：多进程、每进程一个浏览器，结果合并为一个文件。")
+    parser.add_argument("input", help="链接列表，CSV（url/链接 列，可选 标题 列）或 JSONL")
+    parser.add_argument("-o", "--output", default="results.jsonl", help="输出文件，扩展名为 .csv 时输出 CSV，否则输出 JSONL")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1, help="工作进程数（每个进程一个浏览器），默认等于 CPU 核数")
+    parser.add_argument("-c", "--concurrency", type=int, default=10, help="每个工作进程的最大并发数")
+    parser.add_argument("--host-max", type=int, default=DEFAULT_HOST_MAX, help="单域名最大并发（所有进程合计）")
+    parser.add_argument("--host-rate", type=float, default=DEFAULT_HOST_RATE, help="单域名每秒最多请求数（所有进程合计，0 为不限）")
+    parser.add_argument("--max-wait", type=float, default=DEFAULT_MAX_WAIT_MS / 1000, help="单页最长等待秒数")
+    parser.add_argument("--no-block-assets", action="store_true", help="不拦截图片、字体、视频和统计脚本")
+    parser.add_argument("--no-cache", action="store_true", help="不使用本地抓取缓存")
+    parser.add_argument("--restart", action="store_true", help="忽略进度日志，从头开始爬取")
+    parser.add_argument("--dedup", choices=list(DEDUP_MODE_LABELS), default=DEDUP_MARK, help="重复文章处理：off 不去重，mark 标记，drop 丢弃")
+    parser.add_argument("--dedup-global", action="store_true", help="跨任务去重：与以往任务抓过的文章比对（使用与界面共用的本地指纹库）；不加时只在本次运行内去重")
+    parser.add_argument("--archive", action="store_true", help="同时把成功的文章存入本地文章库（可在界面“文章库检索”中全文搜索）")
+    parser.add_argument("--metrics", help="导出逐链接计时：.csv 为明细，其他扩展名（如 .prom）为 Prometheus 文本格式")
+    args = parser.parse_args(argv)
+
+    workers = max(1, args.workers)
+    options = {
+        "concurrency": args.concurrency,
+        "host_max": args.host_max,
+        "host_rate": args.host_rate,
+        "max_wait_ms": int(args.max_wait * 1000),
+        "block_assets": not args.no_block_assets,
+        "use_cache": not args.no_cache,
+        "resume": not args.restart,
+        "dedup": args.dedup,
+        "dedup_path": DEFAULT_DEDUP_PATH if args.dedup_global else None,
+        "archive": args.archive,
+    }
+    return run(args.input, args.output, workers, options, metrics_path=args.metrics)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
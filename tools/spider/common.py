@@ -1,47 +1,7 @@
+import html
+import math
 import streamlit as st
 import pandas as pd
-from bs4 import BeautifulSoup, Comment
-import re
-
-def clean_content(raw_html):
-    """
-    清理 HTML 内容，兼容公众号、知乎、CSDN等，优先提取主流正文容器。
-    """
-    if not isinstance(raw_html, str):
-        return ""
-    soup = BeautifulSoup(raw_html, "html.parser")
-    for tag in soup(["script", "style"]):
-        tag.decompose()
-    for element in soup(text=lambda text: isinstance(text, Comment)):
-        element.extract()
-    title = soup.title.string.strip() if soup.title else ""
-    meta_desc = ""
-    meta = soup.find("meta", attrs={"name": "description"})
-    if meta and meta.get("content"):
-        meta_desc = meta["content"].strip()
-    main_content = ""
-    js_content = soup.find("div", id="js_content")
-    if js_content:
-        main_content = " ".join([p.get_text(strip=True) for p in js_content.find_all("p")])
-    else:
-        zhihu_main = soup.find("div", class_="RichText ztext") or \
-                     soup.find("div", class_="RichText") or \
-                     soup.find("div", class_="Post-RichTextContainer")
-        if zhihu_main:
-            main_content = zhihu_main.get_text(separator=' ', strip=True)
-        else:
-            csdn_main = soup.find("div", class_="article_content") or \
-                        soup.find("div", id="content_views") or \
-                        soup.find("article", class_="baidu_pl") or \
-                        soup.find("div", class_="blog-content-box") or \
-                        soup.find("main")
-            if csdn_main:
-                main_content = csdn_main.get_text(separator=' ', strip=True)
-            else:
-                main_content = " ".join([p.get_text(strip=True) for p in soup.find_all("p")])
-    result = f"标题：{title}\n描述：{meta_desc}\n正文：{main_content}"
-    result = re.sub(r'\s+', ' ', result)
-    return result.strip()
 
 def show_scrollable_preview(content, height=200):
     """
@@ -49,13 +9,45 @@ def show_scrollable_preview(content, height=200):
     """
     st.markdown(f"<div style='height:{height}px;overflow:auto;border:1px solid #eee;padding:8px;background:#fafbfc;border-radius:6px;font-size:15px;line-height:1.7;color:#222;'>{content}</div>", unsafe_allow_html=True)
 
-def show_results(df, preview_count=3, file_name='result.csv', title_col='标题', link_col='链接', content_col='内容', preview_height=400):
-    st.dataframe(df)
-    st.markdown(f'**内容预览（前{preview_count}条）：**')
-    # 合并前三条内容
-    preview_html = ""
-    for idx, row in df.head(preview_count).iterrows():
-        preview_html += f"<div style='margin-bottom:18px;'><b style='color:#222'>{row.get(title_col,'')}</b><br><span style='color:#888;font-size:13px'>{row.get(link_col,'')}</span><br><div style='margin-top:6px;color:#222'>{row[content_col] if pd.notnull(row[content_col]) else '(无内容)'}</div></div>"
-    show_scrollable_preview(preview_html, height=preview_height)
-    csv = df.to_csv(index=False).encode()
-    st.download_button('下载爬取结果CSV', csv, file_name, 'text/csv') 
\ No newline at end of file
+def _truncate(text, limit):
+    if not isinstance(text, str):
+        return ''
+    return text if len(text) <= limit else text[:limit] + '…'
+
+def _file_reader(path):
+    # 供 download_button 在点击时才读取文件；Streamlit 不会关闭回调返回的文件对象，因此直接返回读出的字节
+    def read():
+        with open(path, 'rb') as f:
+            return f.read()
+    return read
+
+def show_results(sink, file_name='result.csv', key='results', page_size=50, content_chars=120, preview_height=400):
+    """
+    分页展示落盘的爬取结果：每页只从结果文件读取当页的行，表格中的内容列截断显示，
+    选中一行后在下方展开完整内容；下载在点击时才读取文件。
+    """
+    pages = max(1, math.ceil(sink.count / page_size))
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        page = st.number_input('页码', min_value=1, max_value=pages, value=1, step=1, key=f'{key}_page')
+    with col2:
+        st.caption(f'共 {sink.count} 条结果，每页 {page_size} 条，共 {pages} 页。选中表格中的一行可查看完整内容。')
+    rows = sink.read_rows((page - 1) * page_size, page_size)
+    df = pd.DataFrame(rows, columns=sink.fields)
+    df['内容'] = df['内容'].map(lambda text: _truncate(text, content_chars))
+    event = st.dataframe(df, hide_index=True, on_select='rerun', selection_mode='single-row', key=f'{key}_table_{page}')
+    selected = event.selection.rows
+    if selected:
+        row = rows[selected[0]]
+        content = html.escape(row.get('内容') or '') or '(无内容)'
+        show_scrollable_preview(
+            f"<b style='color:#222'>{html.escape(str(row.get('标题', '')))}</b><br>"
+            f"<span style='color:#888;font-size:13px'>{html.escape(str(row.get('链接', '')))}</span>"
+            f"<div style='margin-top:6px;color:#222;white-space:pre-wrap'>{content}</div>",
+            height=preview_height,
+        )
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button('下载爬取结果CSV', _file_reader(sink.csv_path), file_name, 'text/csv', key=f'{key}_csv', on_click='ignore')
+    with col2:
+        st.download_button('下载爬取结果JSONL', _file_reader(sink.jsonl_path), file_name.rsplit('.', 1)[0] + '.jsonl', 'application/x-ndjson', key=f'{key}_jsonl', on_click='ignore')
@@ -0,0 +1,86 @@
+import asyncio
+import time
+from tools.spider.dedup import STATUS_DUPLICATE, duplicate_result
+from tools.spider.fetch_strategy import fetch_cleaned
+from tools.spider.readiness import DEFAULT_MAX_WAIT_MS
+from tools.spider.resource_blocker import DEFAULT_BLOCKER
+from tools.spider.retry import DEFAULT_RETRY_POLICY, STATUS_OK, RetryExhausted, with_retry
+from tools.spider.scheduler import HostScheduler
+from tools.spider.timings import NO_TIMING
+
+async def fetch_one(pool, url, title, max_wait_ms=DEFAULT_MAX_WAIT_MS, stats=None, blocker=DEFAULT_BLOCKER, cache=None, scheduler=None, extractor=None, policy=DEFAULT_RETRY_POLICY, timings=None):
+    """
+    抓取单个链接，按失败分类自动重试；状态、尝试次数和错误信息与正文分列返回。
+    传入 timings（CrawlTimings）时记录该链接各阶段耗时、字节数和结果。
+    """
+    timing = timings.start() if timings is not None else NO_TIMING
+    async def attempt_fetch(attempt):
+        return await fetch_cleaned(pool, url, max_wait_ms=max_wait_ms, blocker=blocker, stats=stats, cache=cache, scheduler=scheduler, extractor=extractor, attempt=attempt, timing=timing)
+    def on_retry(kind, attempt, delay):
+        timing.add("backoff", delay)
+    started = time.perf_counter()
+    try:
+        (cleaned, strategy), attempts = await with_retry(attempt_fetch, policy, on_retry)
+    except RetryExhausted as e:
+        if stats is not None:
+            failures = stats.setdefault("failures", {})
+            failures[e.kind] = failures.get(e.kind, 0) + 1
+        if timings is not None:
+            timing.add("total", time.perf_counter() - started)
+            timings.record(url, timing, e.kind, attempts=e.attempts)
+        return {"标题": title, "链接": url, "内容": "", "状态": e.kind, "尝试次数": e.attempts, "错误": str(e)}
+    if stats is not None:
+        stats[strategy] = stats.get(strategy, 0) + 1
+        if attempts > 1:
+            stats["retried"] = stats.get("retried", 0) + 1
+    if timings is not None:
+        timing.add("total", time.perf_counter() - started)
+        timings.record(url, timing, STATUS_OK, strategy, attempts)
+    return {"标题": title, "链接": url, "内容": cleaned, "状态": STATUS_OK, "尝试次数": attempts, "错误": ""}
+
+def is_failed(result):
+    return result.get("状态", STATUS_OK) not in (STATUS_OK, STATUS_DUPLICATE)
+
+def _restore_from_journal(journal, job_id, total, sink, dedup=None):
+    """把日志中已成功的结果写入 sink（并登记到去重索引），返回已成功的序号集合。"""
+    done = set()
+    for idx, row in journal.iter_succeeded(job_id):
+        if idx < total:
+            if dedup is not None:
+                dedup.restore(row["链接"], row)
+            if not (dedup is not None and dedup.drop and row["状态"] == STATUS_DUPLICATE):
+                sink.write(idx, row)
+            done.add(idx)
+    return done
+
+async def crawl_urls(pool, urls, titles, max_concurrent, fetch_kwargs, progress, sink, journal=None, job_id=None, dedup=None):
+    """
+    并发抓取所有链接，每条结果完成后立即写入 sink（不在内存中累积）。
+    并发由 fetch_kwargs 中的 scheduler（按域名自适应）控制，未提供时按 max_concurrent 新建。
+    传入 journal 时先把已成功的结果写入 sink、只抓取其余链接，并在每个链接完成后立即写入日志。
+    progress 为 ProgressReporter，每完成一个链接计数一次，由它按固定频率对外发布。
+    传入 dedup（CrawlDedup）时，规范网址重复的链接跳过抓取，正文近似重复的结果按其模式标记或丢弃。
+    """
+    if fetch_kwargs.get("scheduler") is None:
+        fetch_kwargs = {**fetch_kwargs, "scheduler": HostScheduler(max_total=max_concurrent)}
+    done = set()
+    if journal is not None:
+        done = await asyncio.to_thread(_restore_from_journal, journal, job_id, len(urls), sink, dedup)
+    pending = [idx for idx in range(len(urls)) if idx not in done]
+    progress.skip(len(done))
+    async def sem_fetch(idx):
+        duplicate_of = await dedup.claim(urls[idx]) if dedup is not None else None
+        if duplicate_of is not None:
+            res = duplicate_result(titles[idx], urls[idx], duplicate_of)
+        else:
+            res = await fetch_one(pool, urls[idx], titles[idx], **fetch_kwargs)
+            if dedup is not None:
+                res = await dedup.check(urls[idx], res, not is_failed(res))
+        if not (dedup is not None and dedup.drop and res["状态"] == STATUS_DUPLICATE):
+            sink.write(idx, res)
+        if journal is not None:
+            await asyncio.to_thread(journal.record, job_id, idx, res, not is_failed(res))
+        progress.advance(failed=is_failed(res), message=f"最近完成：{titles[idx]}")
+    await asyncio.gather(*(sem_fetch(idx) for idx in pending))
+    progress.flush()
+    return sink
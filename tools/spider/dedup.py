@@ -0,0 +1,266 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import parse_qsl, urlsplit
+import numpy as np
+from tools.spider.fetch_cache import DEFAULT_CACHE_DIR, normalize_url
+from tools.spider.fetch_strategy import content_body
+
+STATUS_DUPLICATE = "duplicate"
+
+DEDUP_OFF = "off"
+DEDUP_MARK = "mark"
+DEDUP_DROP = "drop"
+
+DEDUP_MODE_LABELS = {
+    DEDUP_OFF: "不去重",
+    DEDUP_MARK: "标记重复（保留结果，状态为 duplicate）",
+    DEDUP_DROP: "丢弃重复（不写入结果）",
+}
+
+DEFAULT_DEDUP_PATH = os.path.join(DEFAULT_CACHE_DIR, "dedup.sqlite3")
+
+# 64 位 SimHash 汉明距离不超过该值视为近似重复；分成 4 段各 16 位，距离 ≤3 时至少一段完全相同
+SIMHASH_BITS = 64
+DEFAULT_MAX_DISTANCE = 3
+_BANDS = 4
+_BAND_BITS = SIMHASH_BITS // _BANDS
+_BAND_MASK = (1 << _BAND_BITS) - 1
+
+# 按字符 n-gram 取特征，中文不需要分词；正文过长时只取前 MAX_FEATURE_CHARS 字
+SHINGLE_SIZE = 4
+MAX_FEATURE_CHARS = 20000
+# 正文少于该字数不做近似比对（太短的文本指纹不可靠）
+MIN_FINGERPRINT_CHARS = 50
+
+# 公众号文章只由这几个参数确定，其余为分享、签名和跟踪参数
+_WECHAT_ARTICLE_PARAMS = ("__biz", "mid", "idx")
+
+
+def canonical_url(url):
+    """同一篇文章的不同网址（http/https、分享参数、跟踪参数）归一为同一个键。"""
+    parts = urlsplit(normalize_url(url))
+    if parts.hostname == "mp.weixin.qq.com" and parts.path == "/s":
+        params = dict(parse_qsl(parts.query))
+        if all(params.get(k) for k in _WECHAT_ARTICLE_PARAMS):
+            return "mp.weixin.qq.com/s?" + "&".join(f"{k}={params[k]}" for k in _WECHAT_ARTICLE_PARAMS)
+    return parts.netloc + parts.path + ("?" + parts.query if parts.query else "")
+
+
+def simhash(text):
+    """64 位 SimHash：字符 n-gram 特征的 blake2b 哈希逐位投票。"""
+    text = "".join(text.split())[:MAX_FEATURE_CHARS]
+    if len(text) < SHINGLE_SIZE:
+        return 0
+    shingles = {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little") for s in shingles),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+    bits = (hashes[:, None] >> np.arange(SIMHASH_BITS, dtype=np.uint64)) & np.uint64(1)
+    votes = bits.sum(axis=0) * 2 > len(shingles)
+    return int(sum(1 << i for i, v in enumerate(votes) if v))
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+def _bands(fp):
+    return [(fp >> (i * _BAND_BITS)) & _BAND_MASK for i in range(_BANDS)]
+
+
+def _to_signed(fp):
+    # SQLite INTEGER 为有符号 64 位
+    return fp - (1 << 64) if fp >= 1 << 63 else fp
+
+
+class SimHashIndex:
+    """内存中的 SimHash 近似查找：按 4 段分桶，只和同桶的指纹比较汉明距离。"""
+
+    def __init__(self, max_distance=DEFAULT_MAX_DISTANCE):
+        self.max_distance = max_distance
+        self._buckets = [{} for _ in range(_BANDS)]
+
+    def find(self, fp):
+        """返回与 fp 近似的已有条目的 ref，没有则返回 None。"""
+        for band, bucket in zip(_bands(fp), self._buckets):
+            for other, ref in bucket.get(band, ()):
+                if hamming(fp, other) <= self.max_distance:
+                    return ref
+        return None
+
+    def add(self, fp, ref):
+        for band, bucket in zip(_bands(fp), self._buckets):
+            bucket.setdefault(band, []).append((fp, ref))
+
+
+class DedupStore:
+    """跨任务去重用的持久化指纹库（SQLite）：记录抓过的规范网址和正文 SimHash。"""
+
+    def __init__(self, path=DEFAULT_DEDUP_PATH, max_distance=DEFAULT_MAX_DISTANCE):
+        self.path = path
+        self.max_distance = max_distance
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS fingerprints ("
+                "canonical TEXT PRIMARY KEY, url TEXT, simhash INTEGER, "
+                "band0 INTEGER, band1 INTEGER, band2 INTEGER, band3 INTEGER, created_at REAL)"
+            )
+            for i in range(_BANDS):
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_band{i} ON fingerprints (band{i})")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def lookup_url(self, canonical):
+        """该规范网址以前抓过时返回当时的网址。"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT url FROM fingerprints WHERE canonical=?", (canonical,)).fetchone()
+        return row[0] if row else None
+
+    def find_near(self, fp):
+        bands = _bands(fp)
+        where = " OR ".join(f"band{i}=?" for i in range(_BANDS))
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT url, simhash FROM fingerprints WHERE simhash IS NOT NULL AND ({where})", bands).fetchall()
+        for url, other in rows:
+            if hamming(fp, other & ((1 << 64) - 1)) <= self.max_distance:
+                return url
+        return None
+
+    def add(self, canonical, url, fp=None):
+        bands = _bands(fp) if fp is not None else [None] * _BANDS
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO fingerprints (canonical, url, simhash, band0, band1, band2, band3, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (canonical, url, _to_signed(fp) if fp is not None else None, *bands, time.time()),
+            )
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM fingerprints")
+
+
+class CrawlDedup:
+    """
+    一次批量爬取内的去重（在爬取事件循环中使用，不需要加锁）：
+    1. 规范网址重复：直接跳过抓取；同一网址正在抓取时等它完成，失败则由后来者接手重新抓取。
+    2. 正文近似重复：清洗后计算 SimHash，与本任务（及可选的 store 中历史任务）已有正文比较。
+    mode 为 DEDUP_MARK 时重复结果标记为 duplicate 并注明重复于哪个网址，为 DEDUP_DROP 时不写入结果。
+    """
+
+    def __init__(self, mode=DEDUP_MARK, store=None, max_distance=DEFAULT_MAX_DISTANCE):
+        self.mode = mode
+        self.store = store
+        self.index = SimHashIndex(max_distance)
+        self.skipped_fetches = 0
+        self.near_duplicates = 0
+        self._owners = {}
+
+    @property
+    def drop(self):
+        return self.mode == DEDUP_DROP
+
+    async def claim(self, url):
+        """抓取前调用：该文章已抓过时返回原网址（调用方跳过抓取），否则登记为本链接负责抓取并返回 None。"""
+        key = canonical_url(url)
+        while True:
+            owner = self._owners.get(key)
+            if owner is None:
+                waiter = asyncio.get_running_loop().create_future()
+                self._owners[key] = waiter
+                if self.store is not None:
+                    previous = await asyncio.to_thread(self.store.lookup_url, key)
+                    if previous:
+                        self._resolve(key, waiter, previous)
+                        self.skipped_fetches += 1
+                        return previous
+                return None
+            if isinstance(owner, str):
+                self.skipped_fetches += 1
+                return owner
+            if await asyncio.shield(owner) is None:
+                # 先抓的链接失败了，重新竞争由谁抓取
+                continue
+
+    def _resolve(self, key, waiter, url):
+        if url is None:
+            self._owners.pop(key, None)
+        else:
+            self._owners[key] = url
+        if not waiter.done():
+            waiter.set_result(url)
+
+    async def check(self, url, result, ok):
+        """抓取完成后调用：登记本链接，正文与已有正文近似时返回标记为重复的结果。"""
+        key = canonical_url(url)
+        waiter = self._owners.get(key)
+        if not ok:
+            if isinstance(waiter, asyncio.Future):
+                self._resolve(key, waiter, None)
+            return result
+        body = content_body(result.get("内容", ""))
+        fp = await asyncio.to_thread(simhash, body) if len(body) >= MIN_FINGERPRINT_CHARS else None
+        duplicate_of = None
+        if fp is not None:
+            duplicate_of = self.index.find(fp)
+            if duplicate_of is None and self.store is not None:
+                duplicate_of = await asyncio.to_thread(self.store.find_near, fp)
+        if duplicate_of is not None and duplicate_of != url:
+            self.near_duplicates += 1
+            result = {**result, "状态": STATUS_DUPLICATE, "重复于": duplicate_of}
+        elif fp is not None:
+            self.index.add(fp, url)
+        if self.store is not None:
+            await asyncio.to_thread(self.store.add, key, url, fp if duplicate_of is None else None)
+        if isinstance(waiter, asyncio.Future):
+            self._resolve(key, waiter, url)
+        else:
+            self._owners[key] = url
+        return result
+
+    def restore(self, url, result):
+        """把从进度日志恢复的结果登记进索引（在恢复线程中调用，此时爬取尚未开始）。"""
+        self._owners[canonical_url(url)] = url
+        if result.get("状态") == STATUS_DUPLICATE:
+            return
+        body = content_body(result.get("内容", ""))
+        if len(body) >= MIN_FINGERPRINT_CHARS:
+            self.index.add(simhash(body), url)
+
+    def snapshot(self):
+        return {"skipped_fetches": self.skipped_fetches, "near_duplicates": self.near_duplicates}
+
+
+def duplicate_result(title, url, duplicate_of):
+    """规范网址重复、跳过抓取时的结果行。"""
+    return {"标题": title, "链接": url, "内容": "", "状态": STATUS_DUPLICATE, "尝试次数": 0, "错误": "", "重复于": duplicate_of}
+
+
+_STORE = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_dedup_store():
+    """获取默认位置的跨任务指纹库。"""
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            _STORE = DedupStore()
+        return _STORE
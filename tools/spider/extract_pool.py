@@ -0,0 +1,94 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from tools.shared.governor import RESOURCE_WORKERS, get_governor
+
+
+def _clean_worker(raw_html):
+    # extractor 不依赖 Streamlit，子进程导入开销小
+    from tools.spider.extractor import clean_content
+    return clean_content(raw_html)
+
+
+class ExtractPool:
+    """
+    把 clean_content 放到多进程池中执行，避免 CPU 密集的 HTML 解析阻塞 asyncio 事件循环。
+    进程数默认等于 CPU 核数；同时在途的 HTML 不超过 max_pending 份，超出时抓取协程在此等待，
+    从而反压到抓取端，避免原始 HTML 在内存中堆积。
+    传入 governor（ResourceGovernor）时，每次清洗还要占用一个全局计算进程名额，与格式转换等任务合计不超过上限。
+    """
+
+    def __init__(self, max_workers=None, max_pending=None, governor=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.max_workers * 2
+        self.governor = governor
+        self._executor = None
+        self._lock = threading.Lock()
+        # asyncio.Semaphore 绑定事件循环，每个循环各用一个
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn 启动子进程，避免在多线程的 Streamlit 进程中 fork
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def _reset_executor(self, broken):
+        with self._lock:
+            if self._executor is broken:
+                self._executor = None
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _get_semaphore(self):
+        loop = asyncio.get_running_loop()
+        sem = self._semaphores.get(loop)
+        if sem is None:
+            sem = asyncio.Semaphore(self.max_pending)
+            self._semaphores[loop] = sem
+        return sem
+
+    async def clean(self, raw_html):
+        """异步清洗 HTML，返回与 clean_content 相同的结果。"""
+        async with self._get_semaphore():
+            if self.governor is None:
+                return await self._clean(raw_html)
+            async with self.governor.async_slot(RESOURCE_WORKERS):
+                return await self._clean(raw_html)
+
+    async def _clean(self, raw_html):
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        try:
+            return await loop.run_in_executor(executor, _clean_worker, raw_html)
+        except BrokenProcessPool:
+            # 子进程异常退出（如内存不足被杀）时重建进程池，本次在线程中完成
+            self._reset_executor(executor)
+            return await asyncio.to_thread(_clean_worker, raw_html)
+
+    def shutdown(self, wait=False):
+        """关闭进程池；进程即将退出时应传 wait=True，等子进程退出后再返回。"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_extract_pool():
+    """获取进程级共享的正文提取进程池。"""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ExtractPool(governor=get_governor())
+        return _POOL
@@ -0,0 +1,175 @@
+import re
+from bs4 import BeautifulSoup, Comment
+
+try:
+    from lxml import etree
+    import lxml.html
+except ImportError:  # lxml 可选，未安装时回退到 BeautifulSoup
+    etree = None
+
+# 平台正文容器规则，按优先级排列：命中的第一条规则决定正文，取该规则在文档中的第一个匹配节点。
+# 匹配方式：id 为属性精确匹配；class 为 class 列表包含该项；class_exact 为 class 列表与之完全一致。
+# 取文本方式：paragraphs 只拼接容器内各 <p> 的文本；text 以空格拼接容器内全部文本。
+PLATFORM_RULES = [
+    # 微信公众号
+    {"platform": "wechat", "tag": "div", "id": "js_content", "mode": "paragraphs", "css": "div#js_content"},
+    # 知乎（新版/老版）
+    {"platform": "zhihu", "tag": "div", "class_exact": "RichText ztext", "mode": "text", "css": "div.RichText.ztext"},
+    {"platform": "zhihu", "tag": "div", "class": "RichText", "mode": "text", "css": "div.RichText"},
+    {"platform": "zhihu", "tag": "div", "class": "Post-RichTextContainer", "mode": "text", "css": "div.Post-RichTextContainer"},
+    # CSDN
+    {"platform": "csdn", "tag": "div", "class": "article_content", "mode": "text", "css": "div.article_content"},
+    {"platform": "csdn", "tag": "div", "id": "content_views", "mode": "text", "css": "div#content_views"},
+    {"platform": "csdn", "tag": "article", "class": "baidu_pl", "mode": "text", "css": "article.baidu_pl"},
+    {"platform": "csdn", "tag": "div", "class": "blog-content-box", "mode": "text", "css": "div.blog-content-box"},
+    # 通用
+    {"platform": "generic", "tag": "main", "mode": "text", "css": "main"},
+]
+
+
+def _format_result(title, meta_desc, main_content):
+    result = f"标题：{title}\n描述：{meta_desc}\n正文：{main_content}"
+    return re.sub(r'\s+', ' ', result).strip()
+
+
+# ---------- lxml 实现 ----------
+def _xpath_condition(rule):
+    conds = []
+    if "id" in rule:
+        conds.append(f"@id='{rule['id']}'")
+    if "class" in rule:
+        conds.append(f"contains(concat(' ', normalize-space(@class), ' '), ' {rule['class']} ')")
+    if "class_exact" in rule:
+        conds.append(f"normalize-space(@class)='{rule['class_exact']}'")
+    return f"//{rule['tag']}" + (f"[{' and '.join(conds)}]" if conds else "")
+
+
+def _rule_matches(rule, el):
+    if el.tag != rule["tag"]:
+        return False
+    if "id" in rule and el.get("id") != rule["id"]:
+        return False
+    classes = (el.get("class") or "").split()
+    if "class" in rule and rule["class"] not in classes:
+        return False
+    if "class_exact" in rule and classes != rule["class_exact"].split():
+        return False
+    return True
+
+
+if etree is not None:
+    # 一次 XPath 遍历同时取回标题、描述和所有候选正文容器（按文档顺序）
+    _CANDIDATES_XPATH = etree.XPath(
+        " | ".join(["//title", "//meta[@name='description']"] + [_xpath_condition(r) for r in PLATFORM_RULES])
+    )
+    # 文本节点，跳过 script/style；注释不是 text() 节点，天然被排除
+    _TEXT_XPATH = etree.XPath("descendant-or-self::text()[not(parent::script or parent::style)]")
+    _PARAGRAPH_XPATH = etree.XPath(".//p")
+
+
+def _get_text(el, separator=""):
+    return separator.join(s for s in (t.strip() for t in _TEXT_XPATH(el)) if s)
+
+
+def _paragraphs_text(el):
+    return " ".join(_get_text(p) for p in _PARAGRAPH_XPATH(el))
+
+
+def _parse(raw_html):
+    try:
+        return lxml.html.document_fromstring(raw_html)
+    except ValueError:
+        # 带 XML 编码声明的字符串需以字节形式交给 lxml
+        return lxml.html.document_fromstring(raw_html.encode("utf-8"))
+
+
+def clean_content_lxml(raw_html):
+    """基于 lxml 和 PLATFORM_RULES 的正文提取，输出格式与 clean_content_bs4 相同。"""
+    if not isinstance(raw_html, str):
+        return ""
+    if not raw_html.strip():
+        return _format_result("", "", "")
+    root = _parse(raw_html)
+    title = None
+    meta_desc = None
+    best_rank = len(PLATFORM_RULES)
+    best_el = None
+    for el in _CANDIDATES_XPATH(root):
+        tag = el.tag
+        if tag == "title":
+            if title is None:
+                title = el
+            continue
+        if tag == "meta" and el.get("name") == "description":
+            if meta_desc is None:
+                meta_desc = (el.get("content") or "").strip()
+            continue
+        for rank in range(best_rank):
+            if _rule_matches(PLATFORM_RULES[rank], el):
+                best_rank = rank
+                best_el = el
+                break
+    title_text = title.text.strip() if title is not None and title.text and len(title) == 0 else ""
+    if best_el is None:
+        main_content = _paragraphs_text(root)
+    elif PLATFORM_RULES[best_rank]["mode"] == "paragraphs":
+        main_content = _paragraphs_text(best_el)
+    else:
+        main_content = _get_text(best_el, separator=" ")
+    return _format_result(title_text, meta_desc or "", main_content)
+
+
+# ---------- BeautifulSoup 实现（未安装 lxml 时使用，也作为基准对照） ----------
+def _bs4_find(soup, rule):
+    kwargs = {}
+    if "id" in rule:
+        kwargs["id"] = rule["id"]
+    if "class" in rule:
+        kwargs["class_"] = rule["class"]
+    if "class_exact" in rule:
+        kwargs["class_"] = rule["class_exact"]
+    return soup.find(rule["tag"], **kwargs)
+
+
+def clean_content_bs4(raw_html):
+    """
+    清理 HTML 内容：去除script/style/注释，兼容微信公众号、知乎、CSDN等平台，优先提取主流正文容器。
+    """
+    if not isinstance(raw_html, str):
+        return ""
+    soup = BeautifulSoup(raw_html, "html.parser")
+    for tag in soup(["script", "style"]):
+        tag.decompose()
+    for element in soup(string=lambda text: isinstance(text, Comment)):
+        element.extract()
+    title = soup.title.string.strip() if soup.title and soup.title.string else ""
+    meta_desc = ""
+    meta = soup.find("meta", attrs={"name": "description"})
+    if meta and meta.get("content"):
+        meta_desc = meta["content"].strip()
+    main_content = ""
+    for rule in PLATFORM_RULES:
+        container = _bs4_find(soup, rule)
+        if container:
+            if rule["mode"] == "paragraphs":
+                main_content = " ".join([p.get_text(strip=True) for p in container.find_all("p")])
+            else:
+                main_content = container.get_text(separator=' ', strip=True)
+            break
+    else:
+        # 退而求其次，提取所有<p>标签文本
+        main_content = " ".join([p.get_text(strip=True) for p in soup.find_all("p")])
+    return _format_result(title, meta_desc, main_content)
+
+
+def clean_content(raw_html):
+    """
+    清理 HTML 内容，兼容公众号、知乎、CSDN等，优先提取主流正文容器。
+    安装了 lxml 时使用快速实现，解析失败时回退到 BeautifulSoup。
+    """
+    if etree is None:
+        return clean_content_bs4(raw_html)
+    try:
+        return clean_content_lxml(raw_html)
+    except Exception:
+        return clean_content_bs4(raw_html)
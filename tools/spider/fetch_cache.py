@@ -0,0 +1,177 @@
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "WATTTER_SPIDER_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "wattter-tools", "spider"),
+)
+DEFAULT_TTL = 24 * 3600
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+# 不影响页面内容的跟踪参数，规范化网址时去掉
+_TRACKING_PARAMS = ("utm_source", "utm_medium", "utm_campaign", "utm_term", "utm_content", "spm")
+
+
+def normalize_url(url):
+    """规范化网址作为缓存键：小写协议和主机、去掉默认端口、片段和跟踪参数、查询参数排序。"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    port = parts.port
+    if port and not ((scheme == "http" and port == 80) or (scheme == "https" and port == 443)):
+        host = f"{host}:{port}"
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in _TRACKING_PARAMS)
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+def cache_key(url):
+    return hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+
+
+class FetchCache:
+    """
+    本地抓取缓存：按规范化网址的哈希存放原始 HTML（gzip 文件）和清洗后的文本（SQLite 索引）。
+    超过 ttl 秒的条目视为过期，可凭 ETag/Last-Modified 条件请求续期；总大小超过 max_bytes 时按最近访问时间淘汰。
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._evict_lock = threading.Lock()
+        os.makedirs(os.path.join(cache_dir, "html"), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, url TEXT, fetched_at REAL, accessed_at REAL, size INTEGER, "
+                "etag TEXT, last_modified TEXT, cleaned TEXT)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries(accessed_at)")
+
+    @contextmanager
+    def _connect(self):
+        # 每次操作使用独立连接（退出时提交并关闭），可在任意线程中调用
+        conn = sqlite3.connect(os.path.join(self.cache_dir, "index.sqlite3"), timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _html_path(self, key):
+        return os.path.join(self.cache_dir, "html", key[:2], f"{key}.html.gz")
+
+    def get(self, url):
+        """返回缓存条目字典（含 fresh 标记），未命中返回 None。"""
+        key = cache_key(url)
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT url, fetched_at, etag, last_modified, cleaned FROM entries WHERE key=?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE entries SET accessed_at=? WHERE key=?", (now, key))
+        return {
+            "url": row[0],
+            "fetched_at": row[1],
+            "etag": row[2],
+            "last_modified": row[3],
+            "cleaned": row[4],
+            "fresh": now - row[1] < self.ttl,
+        }
+
+    def load_html(self, url):
+        """读取缓存的原始 HTML，不存在时返回 None。"""
+        try:
+            with gzip.open(self._html_path(cache_key(url)), "rt", encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put(self, url, raw_html, cleaned, etag=None, last_modified=None):
+        key = cache_key(url)
+        path = self._html_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=5) as f:
+            f.write(raw_html)
+        os.replace(tmp_path, path)
+        size = os.path.getsize(path) + len(cleaned.encode("utf-8"))
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, url, fetched_at, accessed_at, size, etag, last_modified, cleaned) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, now, now, size, etag, last_modified, cleaned),
+            )
+        self.evict()
+
+    def refresh(self, url):
+        """条件请求确认内容未变（304）后，把条目重新标记为新鲜。"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("UPDATE entries SET fetched_at=?, accessed_at=? WHERE key=?", (now, now, cache_key(url)))
+
+    def total_bytes(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def evict(self):
+        """总大小超过上限时，按最近访问时间从旧到新淘汰，直到降到上限的 90%。"""
+        with self._evict_lock:
+            total = self.total_bytes()
+            if total <= self.max_bytes:
+                return
+            target = self.max_bytes * 0.9
+            with self._connect() as conn:
+                rows = conn.execute("SELECT key, size FROM entries ORDER BY accessed_at").fetchall()
+                for key, size in rows:
+                    if total <= target:
+                        break
+                    conn.execute("DELETE FROM entries WHERE key=?", (key,))
+                    try:
+                        os.remove(self._html_path(key))
+                    except OSError:
+                        pass
+                    total -= size
+
+    def clear(self):
+        with self._connect() as conn:
+            keys = [row[0] for row in conn.execute("SELECT key FROM entries")]
+            conn.execute("DELETE FROM entries")
+        for key in keys:
+            try:
+                os.remove(self._html_path(key))
+            except OSError:
+                pass
+
+
+def conditional_headers(entry):
+    """根据缓存条目生成条件请求头，没有校验信息时返回空字典。"""
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+_CACHE = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_fetch_cache():
+    """获取进程级共享的抓取缓存。"""
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = FetchCache()
+        return _CACHE
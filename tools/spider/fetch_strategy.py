@@ -0,0 +1,214 @@
+import asyncio
+import threading
+import time
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from tools.spider.browser_pool import DEFAULT_USER_AGENT
+from tools.spider.extract_pool import get_extract_pool
+from tools.spider.fetch_cache import conditional_headers
+from tools.spider.readiness import DEFAULT_MAX_WAIT_MS, wait_until_ready
+from tools.spider.resource_blocker import DEFAULT_BLOCKER, block_resources
+from tools.spider.retry import FAIL_ANTI_BOT, FAIL_EMPTY, FetchError, attempt_timeouts, http_status_kind, looks_like_anti_bot
+from tools.spider.scheduler import no_slot
+from tools.spider.timings import NO_TIMING
+
+STRATEGY_HTTP = "http"
+STRATEGY_BROWSER = "browser"
+STRATEGY_CACHE = "cache"
+
+# 已知必须由浏览器渲染正文的域名（含子域名），直接跳过 HTTP 直取
+JS_RENDERED_DOMAINS = {
+    "zhihu.com",
+}
+
+# 正文少于该字数视为提取失败，需要回退到浏览器
+MIN_BODY_CHARS = 50
+
+HTTP_TIMEOUT = 15
+GOTO_TIMEOUT_MS = 60000
+
+_HTTP_HEADERS = {
+    "User-Agent": DEFAULT_USER_AGENT,
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
+}
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_http_session():
+    """进程级共享的 keep-alive HTTP 会话（带连接池）。"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update(_HTTP_HEADERS)
+            _session = session
+        return _session
+
+
+def domain_of(url):
+    return (urlparse(url).hostname or "").lower()
+
+
+def content_body(cleaned):
+    """从 clean_content 的结果中取出“正文：”之后的部分。"""
+    if not cleaned or "正文：" not in cleaned:
+        return ""
+    return cleaned.split("正文：", 1)[1].strip()
+
+
+class DomainStrategyRegistry:
+    """按域名记录哪种抓取方式有效，后续同域名网址直接使用有效方式。"""
+
+    def __init__(self, js_domains=JS_RENDERED_DOMAINS):
+        self.js_domains = set(js_domains)
+        self._preferred = {}
+        self._lock = threading.Lock()
+
+    def is_js_rendered(self, domain):
+        return any(domain == d or domain.endswith("." + d) for d in self.js_domains)
+
+    def should_try_http(self, domain):
+        if self.is_js_rendered(domain):
+            return False
+        with self._lock:
+            return self._preferred.get(domain) != STRATEGY_BROWSER
+
+    def record(self, domain, strategy):
+        with self._lock:
+            self._preferred[domain] = strategy
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._preferred)
+
+
+_registry = DomainStrategyRegistry()
+
+
+def get_strategy_registry():
+    return _registry
+
+
+def _http_get(url, extra_headers=None, timeout=HTTP_TIMEOUT, timing=NO_TIMING):
+    """返回 (状态码, HTML, 校验头)；条件请求命中 304 时 HTML 为 None。响应字节数累加到 timing。"""
+    resp = get_http_session().get(url, headers=extra_headers, timeout=timeout)
+    timing.add_bytes(len(resp.content))
+    if resp.status_code == 304:
+        return 304, None, {}
+    resp.raise_for_status()
+    content_type = resp.headers.get("Content-Type", "")
+    if "html" not in content_type.lower():
+        raise ValueError(f"非 HTML 响应: {content_type}")
+    # 响应头未声明编码时 requests 默认 ISO-8859-1，中文页面需按内容探测
+    if resp.encoding is None or resp.encoding.lower() == "iso-8859-1":
+        resp.encoding = resp.apparent_encoding
+    validators = {"etag": resp.headers.get("ETag"), "last_modified": resp.headers.get("Last-Modified")}
+    return resp.status_code, resp.text, validators
+
+
+async def fetch_http_html(url, extra_headers=None, timeout=HTTP_TIMEOUT, timing=NO_TIMING):
+    """在线程池中用共享会话直接请求网页，返回 (状态码, HTML, 校验头)，异常向上抛出。"""
+    with timing.phase("http"):
+        return await asyncio.to_thread(_http_get, url, extra_headers, timeout, timing)
+
+
+async def fetch_page_html(pool, url, max_wait_ms=DEFAULT_MAX_WAIT_MS, blocker=DEFAULT_BLOCKER, stats=None, goto_timeout_ms=GOTO_TIMEOUT_MS, timing=NO_TIMING):
+    """
+    用浏览器池中的页面打开网址，等正文就绪后返回渲染后的 HTML，异常向上抛出。
+    blocker 拦截不需要的资源请求，拦截数量累加到 stats 字典。
+    页面返回 4xx/5xx 时抛出带分类的 FetchError。
+    获取页面、打开、等待就绪和读取 HTML 的耗时以及 HTML 字节数记入 timing。
+    """
+    started = time.perf_counter()
+    async with pool.page() as page:
+        timing.add("page", time.perf_counter() - started)
+        async with block_resources(page, blocker, stats):
+            with timing.phase("goto"):
+                response = await page.goto(url, wait_until="domcontentloaded", timeout=goto_timeout_ms)
+            if response is not None and response.status >= 400:
+                raise FetchError(http_status_kind(response.status), f"HTTP {response.status}", response.status)
+            with timing.phase("ready"):
+                await wait_until_ready(page, max_wait_ms=max_wait_ms)
+            with timing.phase("content"):
+                html = await page.content()
+            timing.add_bytes(len(html.encode("utf-8")))
+            return html
+
+
+async def fetch_cleaned(pool, url, max_wait_ms=DEFAULT_MAX_WAIT_MS, registry=None, blocker=DEFAULT_BLOCKER, stats=None, extractor=None, cache=None, scheduler=None, attempt=1, timing=NO_TIMING):
+    """
+    先用 HTTP 直取并清洗，正文为空或域名需 JS 渲染时回退到浏览器。
+    清洗在 extractor（默认共享的提取进程池）中完成，不占用事件循环。
+    传入 cache 时，新鲜的缓存直接返回；过期条目先用 ETag/Last-Modified 条件请求校验，未变化则续期复用。
+    传入 scheduler 时，网络请求和清洗在该域名的调度名额内进行，缓存命中不占名额。
+    attempt 为第几次尝试，决定 HTTP 和浏览器的超时（首次较短，重试时放宽）。
+    timing（UrlTiming）记录缓存、排队、直取、浏览器各步骤和清洗的耗时及下载字节数。
+    返回 (清洗后的文本, 实际使用的抓取方式)；浏览器抓取失败、遇到反爬验证页或正文为空时抛出异常。
+    """
+    registry = registry or _registry
+    extractor = extractor or get_extract_pool()
+    entry = None
+    if cache is not None:
+        with timing.phase("cache"):
+            entry = await asyncio.to_thread(cache.get, url)
+        if entry is not None and entry["fresh"]:
+            return entry["cleaned"], STRATEGY_CACHE
+    slot = scheduler.slot(url) if scheduler is not None else no_slot()
+    started = time.perf_counter()
+    async with slot:
+        timing.add("queue", time.perf_counter() - started)
+        return await _fetch_network(pool, url, max_wait_ms, registry, blocker, stats, extractor, cache, entry, attempt, timing)
+
+
+async def _fetch_network(pool, url, max_wait_ms, registry, blocker, stats, extractor, cache, entry, attempt, timing):
+    http_timeout, goto_timeout_ms = attempt_timeouts(attempt)
+    domain = domain_of(url)
+    http_html = None
+    validators = {}
+    if entry is not None:
+        headers = conditional_headers(entry)
+        if headers:
+            try:
+                status, http_html, validators = await fetch_http_html(url, headers, http_timeout, timing)
+                if status == 304:
+                    with timing.phase("cache"):
+                        await asyncio.to_thread(cache.refresh, url)
+                    return entry["cleaned"], STRATEGY_CACHE
+            except Exception:
+                http_html = None
+    if registry.should_try_http(domain):
+        try:
+            if http_html is None:
+                _, http_html, validators = await fetch_http_html(url, timeout=http_timeout, timing=timing)
+            with timing.phase("clean"):
+                cleaned = await extractor.clean(http_html)
+            if len(content_body(cleaned)) >= MIN_BODY_CHARS:
+                registry.record(domain, STRATEGY_HTTP)
+                if cache is not None:
+                    with timing.phase("cache"):
+                        await asyncio.to_thread(cache.put, url, http_html, cleaned, validators.get("etag"), validators.get("last_modified"))
+                return cleaned, STRATEGY_HTTP
+        except Exception:
+            pass
+    html = await fetch_page_html(pool, url, max_wait_ms=max_wait_ms, blocker=blocker, stats=stats, goto_timeout_ms=goto_timeout_ms, timing=timing)
+    with timing.phase("clean"):
+        cleaned = await extractor.clean(html)
+    body = content_body(cleaned)
+    if len(body) < MIN_BODY_CHARS and looks_like_anti_bot(html):
+        raise FetchError(FAIL_ANTI_BOT, "遇到反爬验证页")
+    if not body:
+        raise FetchError(FAIL_EMPTY, "未提取到正文")
+    if len(body) >= MIN_BODY_CHARS:
+        registry.record(domain, STRATEGY_BROWSER)
+        if cache is not None:
+            # 浏览器渲染结果没有可靠的校验头，只按 TTL 过期
+            with timing.phase("cache"):
+                await asyncio.to_thread(cache.put, url, html, cleaned)
+    return cleaned, STRATEGY_BROWSER
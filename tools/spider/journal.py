@@ -0,0 +1,107 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from tools.spider.fetch_cache import DEFAULT_CACHE_DIR
+
+DEFAULT_JOURNAL_PATH = os.path.join(DEFAULT_CACHE_DIR, "jobs.sqlite3")
+
+
+def job_id_for(kind, urls):
+    """同一类任务、同一组链接（含顺序）得到同一个任务 ID，用于断点续爬。"""
+    digest = hashlib.sha256("\n".join(str(u) for u in urls).encode("utf-8")).hexdigest()[:16]
+    return f"{kind}-{digest}"
+
+
+class CrawlJournal:
+    """
+    批量爬取的持久化进度日志（SQLite）：每完成一个链接立即写入一行，
+    浏览器崩溃、页面重跑或关闭后可从日志恢复，只重跑失败和未完成的链接。
+    """
+
+    def __init__(self, path=DEFAULT_JOURNAL_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "job_id TEXT PRIMARY KEY, kind TEXT, total INTEGER, created_at REAL, updated_at REAL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "job_id TEXT, idx INTEGER, url TEXT, title TEXT, content TEXT, ok INTEGER, "
+                "status TEXT, attempts INTEGER, error TEXT, dup_of TEXT, updated_at REAL, "
+                "PRIMARY KEY (job_id, idx))"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def start(self, job_id, kind, total):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (job_id, kind, total, created_at, updated_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(job_id) DO UPDATE SET updated_at=excluded.updated_at",
+                (job_id, kind, total, now, now),
+            )
+
+    def record(self, job_id, idx, result, ok):
+        """写入单个链接的结果，同一序号重复写入时覆盖（失败重试成功后更新）。"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results (job_id, idx, url, title, content, ok, status, attempts, error, dup_of, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, idx, result.get("链接"), result.get("标题"), result.get("内容"), int(ok),
+                 result.get("状态"), result.get("尝试次数"), result.get("错误"), result.get("重复于"), now),
+            )
+            conn.execute("UPDATE jobs SET updated_at=? WHERE job_id=?", (now, job_id))
+
+    def iter_succeeded(self, job_id):
+        """按序号逐条产出 (序号, 结果字典)，只包含已成功的链接，不一次性载入内存。"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "SELECT idx, url, title, content, status, attempts, dup_of FROM results WHERE job_id=? AND ok=1 ORDER BY idx", (job_id,)
+            )
+            for idx, url, title, content, status, attempts, dup_of in cursor:
+                yield idx, {
+                    "标题": title, "链接": url, "内容": content, "状态": status or "ok",
+                    "尝试次数": attempts if attempts is not None else 1, "错误": "", "重复于": dup_of or "",
+                }
+
+    def summary(self, job_id):
+        """返回 (已成功数, 已失败数)。"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT COALESCE(SUM(ok), 0), COUNT(*) - COALESCE(SUM(ok), 0) FROM results WHERE job_id=?", (job_id,)
+            ).fetchone()
+        return row[0], row[1]
+
+    def clear(self, job_id):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM results WHERE job_id=?", (job_id,))
+            conn.execute("DELETE FROM jobs WHERE job_id=?", (job_id,))
+
+
+_JOURNAL = None
+_JOURNAL_LOCK = threading.Lock()
+
+
+def get_crawl_journal():
+    """获取默认位置的爬取进度日志。"""
+    global _JOURNAL
+    with _JOURNAL_LOCK:
+        if _JOURNAL is None:
+            _JOURNAL = CrawlJournal()
+        return _JOURNAL
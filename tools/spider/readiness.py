@@ -0,0 +1,60 @@
+import asyncio
+from tools.spider.extractor import PLATFORM_RULES
+
+# 与 clean_content 识别的各平台正文容器保持一致（公众号、知乎、CSDN、通用 main）
+CONTENT_SELECTORS = [rule["css"] for rule in PLATFORM_RULES]
+
+# 公众号专辑页的文章列表项
+ALBUM_ITEM_SELECTOR = ".album__list-item.js_album_item"
+
+# 页面就绪的默认最长等待时间（毫秒）
+DEFAULT_MAX_WAIT_MS = 8000
+
+# 任一容器内文本达到该长度即视为正文已渲染
+_CONTENT_READY_JS = """
+([selectors, minText]) => selectors.some(sel => {
+    const el = document.querySelector(sel);
+    return el && (el.innerText || el.textContent || '').trim().length >= minText;
+})
+"""
+
+
+async def wait_until_ready(page, selectors=None, max_wait_ms=DEFAULT_MAX_WAIT_MS, min_text_len=20):
+    """
+    等待页面就绪：正文容器已渲染出文本，或网络进入空闲，二者先到即返回；最多等待 max_wait_ms 毫秒。
+    返回就绪原因："content"、"networkidle" 或 "timeout"。
+    """
+    selectors = selectors or CONTENT_SELECTORS
+    waiters = {
+        asyncio.ensure_future(page.wait_for_function(_CONTENT_READY_JS, arg=[selectors, min_text_len], timeout=max_wait_ms)): "content",
+        asyncio.ensure_future(page.wait_for_load_state("networkidle", timeout=max_wait_ms)): "networkidle",
+    }
+    pending = set(waiters)
+    reason = "timeout"
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max_wait_ms / 1000
+    try:
+        while pending:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            ready = [t for t in done if not t.cancelled() and t.exception() is None]
+            if ready:
+                reason = waiters[ready[0]]
+                break
+    finally:
+        for t in pending:
+            t.cancel()
+        # 回收被取消/超时的等待任务，避免 "exception was never retrieved" 警告
+        await asyncio.gather(*pending, return_exceptions=True)
+    return reason
+
+
+async def wait_for_album_items(page, max_wait_ms=DEFAULT_MAX_WAIT_MS):
+    """等待公众号专辑页出现文章列表项，超时不抛异常。"""
+    try:
+        await page.wait_for_selector(ALBUM_ITEM_SELECTOR, state="attached", timeout=max_wait_ms)
+        return True
+    except Exception:
+        return False
@@ -0,0 +1,88 @@
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
+
+# 默认拦截的资源类型（爬虫只需要 DOM 文本）
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font"}
+
+# 默认拦截的统计/广告域名（含子域名）
+BLOCKED_DOMAINS = {
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "hm.baidu.com",
+    "cnzz.com",
+    "umeng.com",
+    "growingio.com",
+    "sensorsdata.cn",
+}
+
+# 被拦截请求没有实际下载，无法得知真实大小，按资源类型的典型大小估算节省的字节数
+ESTIMATED_BYTES = {
+    "image": 40 * 1024,
+    "media": 500 * 1024,
+    "font": 40 * 1024,
+    "stylesheet": 20 * 1024,
+    "script": 30 * 1024,
+}
+DEFAULT_ESTIMATED_BYTES = 10 * 1024
+
+
+class ResourceBlocker:
+    """按资源类型和域名黑名单拦截页面请求。"""
+
+    def __init__(self, resource_types=BLOCKED_RESOURCE_TYPES, domains=BLOCKED_DOMAINS):
+        self.resource_types = set(resource_types)
+        self.domains = set(domains)
+
+    def should_block(self, resource_type, url):
+        if resource_type in self.resource_types:
+            return True
+        host = (urlparse(url).hostname or "").lower()
+        return any(host == d or host.endswith("." + d) for d in self.domains)
+
+
+DEFAULT_BLOCKER = ResourceBlocker()
+
+
+def record_blocked(stats, resource_type):
+    """把一次拦截计入统计字典（blocked_requests / blocked_bytes）。"""
+    stats["blocked_requests"] = stats.get("blocked_requests", 0) + 1
+    stats["blocked_bytes"] = stats.get("blocked_bytes", 0) + ESTIMATED_BYTES.get(resource_type, DEFAULT_ESTIMATED_BYTES)
+
+
+@asynccontextmanager
+async def block_resources(page, blocker=DEFAULT_BLOCKER, stats=None):
+    """
+    async with block_resources(page, blocker, stats): ...
+    在代码块内对页面启用请求拦截，退出时移除，避免影响浏览器池中复用该页面的下一次抓取。
+    blocker 为 None 时不拦截。
+    """
+    if blocker is None:
+        yield
+        return
+
+    async def handler(route):
+        request = route.request
+        if blocker.should_block(request.resource_type, request.url):
+            if stats is not None:
+                record_blocked(stats, request.resource_type)
+            await route.abort()
+        else:
+            await route.continue_()
+
+    await page.route("**/*", handler)
+    try:
+        yield
+    finally:
+        try:
+            await page.unroute("**/*", handler)
+        except Exception:
+            pass
+
+
+def format_saved(stats):
+    """生成“已拦截 N 个请求，约节省 X MB”的说明文字，无拦截时返回空字符串。"""
+    blocked = stats.get("blocked_requests", 0) if stats else 0
+    if not blocked:
+        return ""
+    return f"已拦截 {blocked} 个图片/字体/视频/统计请求，约节省 {stats.get('blocked_bytes', 0) / 1024 / 1024:.1f} MB 流量。"
@@ -0,0 +1,94 @@
+import csv
+import json
+import os
+import time
+import uuid
+from array import array
+from tools.spider.fetch_cache import DEFAULT_CACHE_DIR
+
+RESULTS_DIR = os.path.join(DEFAULT_CACHE_DIR, "results")
+RESULT_FIELDS = ["序号", "标题", "链接", "状态", "尝试次数", "错误", "重复于", "内容"]
+
+# 结果文件保留天数，新建任务时清理更早的文件
+RESULTS_MAX_AGE_DAYS = 7
+
+
+def prune_results(directory=RESULTS_DIR, max_age_days=RESULTS_MAX_AGE_DAYS):
+    cutoff = time.time() - max_age_days * 86400
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return
+    for name in names:
+        path = os.path.join(directory, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+class ResultSink:
+    """
+    爬取结果流式落盘：每条结果到达即追加写入 JSONL 和 CSV 文件，内存中只保留每行的序号和文件偏移，
+    界面按页从文件读取，下载直接读取文件，结果再多也不会在会话中占用大量内存。
+    """
+
+    def __init__(self, name, directory=RESULTS_DIR, fields=RESULT_FIELDS):
+        os.makedirs(directory, exist_ok=True)
+        prune_results(directory)
+        # 所有 Streamlit 会话共用一个进程，同一秒开始的同类任务只靠时间和 pid 会得到同一个文件名
+        base = os.path.join(directory, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex}")
+        self.jsonl_path = base + ".jsonl"
+        self.csv_path = base + ".csv"
+        self.fields = list(fields)
+        self.count = 0
+        # 按写入顺序记录每行的序号和在 JSONL 中的字节偏移，读取时按序号排序
+        self._seqs = array("q")
+        self._offsets = array("q")
+        self._order = None
+        self._jsonl = open(self.jsonl_path, "xb")
+        # utf-8-sig 便于 Excel 直接打开中文 CSV
+        self._csv_file = open(self.csv_path, "x", encoding="utf-8-sig", newline="")
+        self._csv = csv.DictWriter(self._csv_file, fieldnames=self.fields, extrasaction="ignore")
+        self._csv.writeheader()
+
+    def write(self, idx, result):
+        """写入第 idx 个链接（从 0 开始）的结果。"""
+        row = {"序号": idx + 1, **result}
+        self._seqs.append(idx + 1)
+        self._offsets.append(self._jsonl.tell())
+        self._jsonl.write((json.dumps(row, ensure_ascii=False) + "\n").encode("utf-8"))
+        self._csv.writerow(row)
+        self.count += 1
+        self._order = None
+
+    def flush(self):
+        self._jsonl.flush()
+        self._csv_file.flush()
+
+    def close(self):
+        if not self._jsonl.closed:
+            self._jsonl.close()
+        if not self._csv_file.closed:
+            self._csv_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def read_rows(self, start=0, limit=50):
+        """按序号排序后读取第 start 行起的 limit 行，只从文件中读取这些行。"""
+        if self._order is None:
+            seqs = self._seqs
+            self._order = array("q", sorted(range(len(seqs)), key=seqs.__getitem__))
+        if not self._jsonl.closed:
+            self._jsonl.flush()
+        rows = []
+        with open(self.jsonl_path, "rb") as f:
+            for pos in self._order[start:start + limit]:
+                f.seek(self._offsets[pos])
+                rows.append(json.loads(f.readline()))
+        return rows
@@ -0,0 +1,142 @@
+import asyncio
+import random
+import socket
+import requests
+
+STATUS_OK = "ok"
+FAIL_DNS = "dns"
+FAIL_TIMEOUT = "timeout"
+FAIL_HTTP_4XX = "http_4xx"
+FAIL_HTTP_429 = "http_429"
+FAIL_HTTP_5XX = "http_5xx"
+FAIL_ANTI_BOT = "anti_bot"
+FAIL_EMPTY = "empty"
+FAIL_ERROR = "error"
+
+FAILURE_LABELS = {
+    FAIL_DNS: "域名解析失败",
+    FAIL_TIMEOUT: "超时",
+    FAIL_HTTP_4XX: "HTTP 4xx",
+    FAIL_HTTP_429: "请求过于频繁(429)",
+    FAIL_HTTP_5XX: "HTTP 5xx",
+    FAIL_ANTI_BOT: "反爬验证页",
+    FAIL_EMPTY: "正文为空",
+    FAIL_ERROR: "其他错误",
+}
+
+# 各类失败的 (最多尝试次数, 首次退避秒数, 最长退避秒数)
+# 404/403 等客户端错误和域名解析失败重试也不会成功，只尝试一次
+DEFAULT_RETRY_POLICY = {
+    FAIL_DNS: (1, 0, 0),
+    FAIL_TIMEOUT: (3, 1.0, 10.0),
+    FAIL_HTTP_4XX: (1, 0, 0),
+    FAIL_HTTP_429: (3, 5.0, 60.0),
+    FAIL_HTTP_5XX: (3, 2.0, 30.0),
+    FAIL_ANTI_BOT: (2, 10.0, 60.0),
+    FAIL_EMPTY: (2, 1.0, 5.0),
+    FAIL_ERROR: (2, 1.0, 10.0),
+}
+
+# 第 n 次尝试的 (HTTP 超时秒数, 浏览器打开页面超时毫秒数)，首次尝试快速失败，重试时逐步放宽
+ATTEMPT_TIMEOUTS = [(8, 15000), (15, 30000), (30, 60000)]
+
+# 正文很短且页面包含这些字样时视为反爬验证页
+ANTI_BOT_MARKERS = [
+    "环境异常",
+    "完成验证后即可继续访问",
+    "请完成安全验证",
+    "访问过于频繁",
+    "captcha",
+    "Just a moment...",
+    "cf-challenge",
+    "Access Denied",
+]
+
+_DNS_MARKERS = ("ERR_NAME_NOT_RESOLVED", "NameResolutionError", "Name or service not known", "getaddrinfo failed", "nodename nor servname")
+_TIMEOUT_MARKERS = ("Timeout", "timed out", "ERR_TIMED_OUT")
+
+
+class FetchError(Exception):
+    """带失败分类的抓取异常，kind 为 FAIL_* 之一。"""
+
+    def __init__(self, kind, message="", status_code=None):
+        super().__init__(message or FAILURE_LABELS.get(kind, kind))
+        self.kind = kind
+        self.status_code = status_code
+
+
+class RetryExhausted(Exception):
+    """重试用尽后抛出，携带最后一次失败的分类和总尝试次数。"""
+
+    def __init__(self, kind, attempts, cause):
+        super().__init__(str(cause))
+        self.kind = kind
+        self.attempts = attempts
+        self.cause = cause
+
+
+def http_status_kind(status_code):
+    if status_code == 429:
+        return FAIL_HTTP_429
+    if status_code >= 500:
+        return FAIL_HTTP_5XX
+    return FAIL_HTTP_4XX
+
+
+def classify_error(exc):
+    """把抓取过程中的异常归为 FAIL_* 中的一类。"""
+    if isinstance(exc, FetchError):
+        return exc.kind
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return http_status_kind(exc.response.status_code)
+    if isinstance(exc, (requests.Timeout, asyncio.TimeoutError, socket.timeout)):
+        return FAIL_TIMEOUT
+    if isinstance(exc, socket.gaierror):
+        return FAIL_DNS
+    # Playwright 的异常只能从消息判断
+    message = str(exc)
+    if any(marker in message for marker in _DNS_MARKERS):
+        return FAIL_DNS
+    if any(marker in message for marker in _TIMEOUT_MARKERS):
+        return FAIL_TIMEOUT
+    return FAIL_ERROR
+
+
+def looks_like_anti_bot(html):
+    return any(marker in html for marker in ANTI_BOT_MARKERS)
+
+
+def attempt_timeouts(attempt):
+    """第 attempt 次尝试（从 1 开始）的 (HTTP 超时秒数, 浏览器超时毫秒数)。"""
+    return ATTEMPT_TIMEOUTS[min(attempt, len(ATTEMPT_TIMEOUTS)) - 1]
+
+
+def backoff_delay(kind, attempt, policy=DEFAULT_RETRY_POLICY):
+    """第 attempt 次失败后的等待秒数：指数退避加抖动（在上限的一半到上限之间随机）。"""
+    _, base, cap = policy.get(kind, policy[FAIL_ERROR])
+    if base <= 0:
+        return 0.0
+    delay = min(cap, base * 2 ** (attempt - 1))
+    return random.uniform(delay / 2, delay)
+
+
+async def with_retry(fetch, policy=DEFAULT_RETRY_POLICY, on_retry=None):
+    """
+    按失败分类重试 fetch(attempt) 协程，返回 (结果, 尝试次数)。
+    退避等待在调度名额之外进行，不占用并发。on_retry(kind, attempt, delay) 在每次重试前调用。
+    重试用尽时抛出 RetryExhausted。
+    """
+    attempt = 1
+    while True:
+        try:
+            return await fetch(attempt), attempt
+        except Exception as e:
+            kind = classify_error(e)
+            max_attempts = policy.get(kind, policy[FAIL_ERROR])[0]
+            if attempt >= max_attempts:
+                raise RetryExhausted(kind, attempt, e) from e
+            delay = backoff_delay(kind, attempt, policy)
+            if on_retry is not None:
+                on_retry(kind, attempt, delay)
+            await asyncio.sleep(delay)
+            attempt += 1
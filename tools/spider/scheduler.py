@@ -0,0 +1,168 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
+
+DEFAULT_MAX_TOTAL = 20
+DEFAULT_HOST_INITIAL = 2
+DEFAULT_HOST_MAX = 8
+DEFAULT_HOST_RATE = 2.0
+
+# 平滑延迟超过基线的该倍数视为对方变慢，按拥塞处理
+SLOW_FACTOR = 2.0
+
+
+class TokenBucket:
+    """令牌桶限速：平均每秒 rate 个请求，允许突发 capacity 个；rate<=0 表示不限速。"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self.tokens = self.capacity
+        self.updated = None
+        self._lock = None
+
+    async def take(self):
+        if self.rate <= 0:
+            return
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if self.updated is not None:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class HostLimiter:
+    """
+    单个域名的并发与速率控制，并发上限按 AIMD 自适应：
+    请求成功且延迟正常时每轮加 1，失败、超时或延迟明显升高时减半（一个延迟周期内最多减一次）。
+    """
+
+    def __init__(self, initial=DEFAULT_HOST_INITIAL, max_limit=DEFAULT_HOST_MAX, rate=DEFAULT_HOST_RATE, burst=None):
+        self.limit = float(min(initial, max_limit))
+        self.max_limit = max_limit
+        self.in_flight = 0
+        self.bucket = TokenBucket(rate, burst if burst is not None else max(1.0, rate))
+        self.ewma = None
+        self.baseline = None
+        self.succeeded = 0
+        self.failed = 0
+        self._last_decrease = 0.0
+        self._cond = None
+
+    def _condition(self):
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        return self._cond
+
+    async def acquire(self):
+        cond = self._condition()
+        async with cond:
+            await cond.wait_for(lambda: self.in_flight < max(1, int(self.limit)))
+            self.in_flight += 1
+        try:
+            await self.bucket.take()
+        except BaseException:
+            await self.release()
+            raise
+
+    async def release(self, latency=None, ok=None):
+        """ok 为 None 表示请求未真正发出（如被取消），只归还名额不调整并发。"""
+        cond = self._condition()
+        async with cond:
+            self.in_flight -= 1
+            if ok is not None:
+                self._adjust(latency, ok)
+            cond.notify_all()
+
+    def _adjust(self, latency, ok):
+        slow = False
+        if ok:
+            self.succeeded += 1
+            self.ewma = latency if self.ewma is None else 0.8 * self.ewma + 0.2 * latency
+            if self.baseline is None or self.ewma < self.baseline:
+                self.baseline = self.ewma
+            else:
+                # 基线缓慢向当前延迟靠拢，避免对方整体变慢后持续减速
+                self.baseline += 0.05 * (self.ewma - self.baseline)
+            slow = self.ewma > self.baseline * SLOW_FACTOR
+        else:
+            self.failed += 1
+        if not ok or slow:
+            now = time.monotonic()
+            if now - self._last_decrease >= (self.ewma or 1.0):
+                self.limit = max(1.0, self.limit / 2)
+                self._last_decrease = now
+        else:
+            self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+
+
+class HostScheduler:
+    """
+    批量爬取调度：总并发不超过 max_total，每个域名独立的自适应并发上限和令牌桶限速。
+    先占域名名额再占总名额，单一域名排队时不会挡住其他域名的链接。
+    """
+
+    def __init__(self, max_total=DEFAULT_MAX_TOTAL, host_initial=DEFAULT_HOST_INITIAL, host_max=DEFAULT_HOST_MAX, host_rate=DEFAULT_HOST_RATE):
+        self.max_total = max_total
+        self.host_initial = host_initial
+        self.host_max = host_max
+        self.host_rate = host_rate
+        self._hosts = {}
+        self._total = None
+
+    def limiter(self, url):
+        host = (urlparse(url).hostname or "").lower()
+        limiter = self._hosts.get(host)
+        if limiter is None:
+            limiter = HostLimiter(self.host_initial, self.host_max, self.host_rate)
+            self._hosts[host] = limiter
+        return limiter
+
+    @asynccontextmanager
+    async def slot(self, url):
+        """async with scheduler.slot(url): ... 代码块内抛出异常视为失败。"""
+        if self._total is None:
+            self._total = asyncio.Semaphore(self.max_total)
+        limiter = self.limiter(url)
+        await limiter.acquire()
+        start = None
+        ok = None
+        try:
+            async with self._total:
+                start = time.monotonic()
+                ok = False
+                try:
+                    yield
+                    ok = True
+                except asyncio.CancelledError:
+                    # 取消不代表对方出错，不参与并发调整
+                    ok = None
+                    raise
+        finally:
+            await limiter.release(time.monotonic() - start if start is not None else None, ok)
+
+    def snapshot(self):
+        """各域名当前并发上限、平滑延迟与成败数，供界面展示。"""
+        return {
+            host: {
+                "limit": int(l.limit),
+                "latency": round(l.ewma, 2) if l.ewma is not None else None,
+                "succeeded": l.succeeded,
+                "failed": l.failed,
+            }
+            for host, l in self._hosts.items()
+        }
+
+
+@asynccontextmanager
+async def no_slot():
+    """未启用调度时使用的空上下文。"""
+    yield
@@ -6,12 +6,13 @@
 import streamlit as st
 import pandas as pd
 import io
-import re
-from bs4 import BeautifulSoup, Comment
-from tools.spider.batch_scraper import batch_scraper_main
+from tools.spider.batch_scraper import batch_scraper_main, show_crawl_stats
 from tools.spider.wechat_links import wechat_links_main
-from playwright.sync_api import sync_playwright
-from tools.spider.common import clean_content, show_results, show_scrollable_preview
+from tools.spider.archive_search import archive_search_main
+from tools.spider.browser_pool import get_browser_pool
+from tools.spider.fetch_strategy import fetch_cleaned
+from tools.spider.retry import FAILURE_LABELS, RetryExhausted, with_retry
+from tools.spider.common import show_scrollable_preview
 
 # 项目元信息，供主入口自动聚合
 PROJECT_META = {
@@ -21,59 +22,6 @@ PROJECT_META = {
     "entry": "tools/spider/spider_app.py"
 }
 
-# 工具函数：清理 HTML 内容为纯文本
-def clean_content(raw_html):
-    """
-    进一步清理：去除script/style/注释，兼容微信公众号、知乎、CSDN等平台，优先提取主流正文容器。
-    """
-    if not isinstance(raw_html, str):
-        return ""
-    soup = BeautifulSoup(raw_html, "html.parser")
-    # 去除所有脚本和样式
-    for tag in soup(["script", "style"]):
-        tag.decompose()
-    # 去除注释
-    for element in soup(text=lambda text: isinstance(text, Comment)):
-        element.extract()
-    # 提取标题
-    title = soup.title.string.strip() if soup.title else ""
-    # 提取meta描述
-    meta_desc = ""
-    meta = soup.find("meta", attrs={"name": "description"})
-    if meta and meta.get("content"):
-        meta_desc = meta["content"].strip()
-    # 平台正文提取
-    main_content = ""
-    # 微信公众号
-    js_content = soup.find("div", id="js_content")
-    if js_content:
-        # 只提取js_content下所有<p>标签文本
-        main_content = " ".join([p.get_text(strip=True) for p in js_content.find_all("p")])
-    else:
-        # 知乎（新版/老版）
-        zhihu_main = soup.find("div", class_="RichText ztext") or \
-                     soup.find("div", class_="RichText") or \
-                     soup.find("div", class_="Post-RichTextContainer")
-        if zhihu_main:
-            main_content = zhihu_main.get_text(separator=' ', strip=True)
-        else:
-            # CSDN
-            csdn_main = soup.find("div", class_="article_content") or \
-                        soup.find("div", id="content_views") or \
-                        soup.find("article", class_="baidu_pl") or \
-                        soup.find("div", class_="blog-content-box") or \
-                        soup.find("main")
-            if csdn_main:
-                main_content = csdn_main.get_text(separator=' ', strip=True)
-            else:
-                # 退而求其次，提取所有<p>标签文本
-                main_content = " ".join([p.get_text(strip=True) for p in soup.find_all("p")])
-    # 合并
-    result = f"标题：{title}\n描述：{meta_desc}\n正文：{main_content}"
-    # 再去除多余空白
-    result = re.sub(r'\s+', ' ', result)
-    return result.strip()
-
 def single_crawl_tab():
     with st.container():
         url = st.text_input("请输入要爬取的网页链接：", placeholder="如：https://mp.weixin.qq.com/s/xxx")
@@ -84,16 +32,19 @@ def single_crawl_tab():
                     st.info(f"即将爬取：{url}")
                     with st.spinner("正在本地爬取并解析内容，请稍候..."):
                         try:
-                            with sync_playwright() as p:
-                                browser = p.chromium.launch(headless=True)
-                                page = browser.new_page(user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-                                page.goto(url, wait_until='domcontentloaded', timeout=60000)
-                                page.wait_for_timeout(3000)
-                                content = page.content()
-                                cleaned = clean_content(content)
-                                browser.close()
+                            pool = get_browser_pool()
+                            crawl_stats = {}
+                            (cleaned, strategy), attempts = pool.run(with_retry(
+                                lambda attempt: fetch_cleaned(pool, url, stats=crawl_stats, attempt=attempt)
+                            ))
+                            crawl_stats[strategy] = 1
+                            show_crawl_stats(crawl_stats)
+                            if attempts > 1:
+                                st.caption(f"共尝试 {attempts} 次后成功。")
                             df = pd.DataFrame([{"url": url, "content": cleaned}])
                             st.session_state['single_crawl_result'] = df
+                        except RetryExhausted as e:
+                            st.error(f"本地爬取失败（{FAILURE_LABELS.get(e.kind, e.kind)}，共尝试 {e.attempts} 次）：{e}")
                         except Exception as e:
                             st.error(f"本地爬取异常：{e}")
                 else:
@@ -120,18 +71,20 @@ def main():
         "单网页内容采集",
         "批量链接内容采集",
         "公众号专辑批量采集",
+        "文章库检索",
         "📖 使用说明"
     ]
-    tab1, tab2, tab3,tab0  = st.tabs(tab_desc)
+    tab1, tab2, tab3, tab4, tab0 = st.tabs(tab_desc)
     with tab0:
         st.title("通用爬虫工具 - 使用说明")
         st.markdown("""
 ### 工具简介
-本工具集成了三大爬虫功能，适用于不同网页内容采集场景：
+本工具集成了四项爬虫功能，适用于不同网页内容采集场景：
 
 1. **单网页内容采集**：输入任意网页链接，自动采集正文内容，支持主流平台（如微信公众号、知乎、CSDN等），内容可预览和下载。
 2. **批量链接内容采集**：上传包含多个链接的CSV文件，自动并发采集所有网页内容，支持自定义并发数，结果可预览和批量下载。
 3. **公众号专辑批量采集**：输入公众号专辑页地址，自动识别所有文章链接并可批量采集内容，支持进度显示和结果下载。
+4. **文章库检索**：批量采集时勾选“存入本地文章库”，文章会保存到本机并建立全文索引，可按关键词跨任务检索历史文章。
 
 ### 使用流程
 1. 选择对应功能页签。
@@ -152,3 +105,5 @@ def main():
         batch_scraper_main()
     with tab3:
         wechat_links_main()
+    with tab4:
+        archive_search_main()
@@ -0,0 +1,180 @@
+import csv
+import io
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+import numpy as np
+
+# 单个链接抓取过程中计时的阶段（多次尝试时同一阶段累加）
+PHASES = ("cache", "queue", "http", "page", "goto", "ready", "content", "clean", "backoff", "total")
+
+PHASE_LABELS = {
+    "cache": "读写缓存",
+    "queue": "等待调度名额",
+    "http": "HTTP 直取",
+    "page": "获取浏览器页面",
+    "goto": "页面打开",
+    "ready": "等待正文就绪",
+    "content": "读取页面 HTML",
+    "clean": "正文清洗",
+    "backoff": "重试退避",
+    "total": "总耗时",
+}
+
+TIMING_FIELDS = ["链接", "结果", "抓取方式", "尝试次数", "字节数"] + [f"{phase}_秒" for phase in PHASES]
+
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+
+
+class UrlTiming:
+    """单个链接的各阶段耗时（秒）和下载字节数，由抓取流程在热路径上累加。"""
+
+    __slots__ = ("phases", "bytes")
+
+    def __init__(self):
+        self.phases = {}
+        self.bytes = 0
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def add(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def add_bytes(self, n):
+        self.bytes += n
+
+
+class _NoTiming:
+    """不计时时的占位对象，接口与 UrlTiming 相同。"""
+
+    __slots__ = ()
+
+    def phase(self, name):
+        return nullcontext()
+
+    def add(self, name, seconds):
+        pass
+
+    def add_bytes(self, n):
+        pass
+
+
+NO_TIMING = _NoTiming()
+
+
+class CrawlTimings:
+    """
+    一次批量爬取的逐链接计时记录：每个链接一行（结果、抓取方式、尝试次数、字节数和各阶段耗时），
+    汇总为各阶段的分位数，可导出为 CSV 或 Prometheus 文本格式，用于调整并发和超时。
+    """
+
+    def __init__(self):
+        self.rows = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.rows)
+
+    def start(self):
+        return UrlTiming()
+
+    def record(self, url, timing, outcome, strategy=None, attempts=1):
+        row = (url, outcome, strategy or "", attempts, timing.bytes) + tuple(timing.phases.get(phase) for phase in PHASES)
+        with self._lock:
+            self.rows.append(row)
+
+    def _phase_matrix(self):
+        with self._lock:
+            rows = list(self.rows)
+        values = [[np.nan if v is None else v for v in row[5:]] for row in rows]
+        return np.array(values, dtype=float).reshape(len(rows), len(PHASES))
+
+    def summary(self, quantiles=DEFAULT_QUANTILES):
+        """各阶段的 (阶段, 次数, 各分位数, 最大值, 合计) 毫秒数，只统计经历过该阶段的链接。"""
+        matrix = self._phase_matrix()
+        summary = []
+        for col, phase in enumerate(PHASES):
+            values = matrix[:, col]
+            values = values[~np.isnan(values)]
+            if not len(values):
+                continue
+            entry = {"阶段": PHASE_LABELS[phase], "phase": phase, "次数": int(len(values))}
+            for q, v in zip(quantiles, np.quantile(values, quantiles)):
+                entry[f"p{q * 100:g}_毫秒"] = round(float(v) * 1000, 1)
+            entry["最大_毫秒"] = round(float(values.max()) * 1000, 1)
+            entry["合计_秒"] = round(float(values.sum()), 2)
+            summary.append(entry)
+        return summary
+
+    def counts(self):
+        """按 (结果, 抓取方式) 统计的 (链接数, 字节数)。"""
+        counts = {}
+        with self._lock:
+            for url, outcome, strategy, attempts, nbytes, *_ in self.rows:
+                n, total = counts.get((outcome, strategy), (0, 0))
+                counts[(outcome, strategy)] = (n + 1, total + nbytes)
+        return counts
+
+    def write_csv(self, f):
+        writer = csv.writer(f)
+        writer.writerow(TIMING_FIELDS)
+        with self._lock:
+            rows = list(self.rows)
+        for row in rows:
+            writer.writerow(row[:5] + tuple("" if v is None else f"{v:.4f}" for v in row[5:]))
+
+    def to_csv(self):
+        buf = io.StringIO()
+        self.write_csv(buf)
+        return buf.getvalue()
+
+    def to_prometheus(self, prefix="spider", quantiles=DEFAULT_QUANTILES):
+        """Prometheus 文本格式：各阶段耗时的 summary，以及按结果和抓取方式统计的链接数、字节数。"""
+        lines = [
+            f"# HELP {prefix}_phase_seconds Per-URL crawl phase duration.",
+            f"# TYPE {prefix}_phase_seconds summary",
+        ]
+        matrix = self._phase_matrix()
+        for col, phase in enumerate(PHASES):
+            values = matrix[:, col]
+            values = values[~np.isnan(values)]
+            if not len(values):
+                continue
+            for q, v in zip(quantiles, np.quantile(values, quantiles)):
+                lines.append(f'{prefix}_phase_seconds{{phase="{phase}",quantile="{q:g}"}} {float(v):.6f}')
+            lines.append(f'{prefix}_phase_seconds_sum{{phase="{phase}"}} {float(values.sum()):.6f}')
+            lines.append(f'{prefix}_phase_seconds_count{{phase="{phase}"}} {len(values)}')
+        counts = sorted(self.counts().items())
+        lines += [f"# HELP {prefix}_urls_total URLs crawled by outcome and strategy.", f"# TYPE {prefix}_urls_total counter"]
+        lines += [f'{prefix}_urls_total{{outcome="{o}",strategy="{s}"}} {n}' for (o, s), (n, _) in counts]
+        lines += [f"# HELP {prefix}_bytes_total Page bytes downloaded by outcome and strategy.", f"# TYPE {prefix}_bytes_total counter"]
+        lines += [f'{prefix}_bytes_total{{outcome="{o}",strategy="{s}"}} {b}' for (o, s), (_, b) in counts]
+        return "\n".join(lines) + "\n"
+
+    def save(self, path):
+        """按扩展名导出：.csv 为逐链接明细，其余为 Prometheus 文本格式。"""
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            if path.lower().endswith(".csv"):
+                self.write_csv(f)
+            else:
+                f.write(self.to_prometheus())
+
+    @classmethod
+    def load_csv(cls, paths):
+        """读取一个或多个 write_csv 导出的明细文件（如命令行各工作进程的记录）。"""
+        timings = cls()
+        for path in paths:
+            with open(path, encoding="utf-8", newline="") as f:
+                reader = csv.reader(f)
+                next(reader, None)
+                for row in reader:
+                    url, outcome, strategy, attempts, nbytes = row[:5]
+                    phases = tuple(float(v) if v else None for v in row[5:])
+                    timings.rows.append((url, outcome, strategy, int(attempts), int(nbytes)) + phases)
+        return timings
@@ -1,8 +1,16 @@
 import streamlit as st
 import pandas as pd
-from playwright.async_api import async_playwright
-from tools.spider.common import clean_content, show_results
-import asyncio
+from tools.spider.album import collect_album_links
+from tools.spider.browser_pool import get_browser_pool
+from tools.spider.batch_scraper import dedup_options, resume_option, scheduler_options, show_batch_result, start_batch_crawl
+from tools.spider.fetch_cache import get_fetch_cache
+from tools.spider.journal import job_id_for
+from tools.spider.readiness import DEFAULT_MAX_WAIT_MS
+from tools.spider.resource_blocker import DEFAULT_BLOCKER
+from tools.spider.scheduler import HostScheduler
+from tools.spider.timings import CrawlTimings
+from tools.shared.job_view import job_panel, job_running
+from tools.shared.jobs import JOB_DONE
 
 def wechat_links_main():
 
@@ -16,22 +24,14 @@ def wechat_links_main():
         total_links = 0
         with st.spinner('正在解析专辑内所有文章链接...'):
             if url:
-                from playwright.sync_api import sync_playwright as sync_pw
-                with sync_pw() as p:
-                    browser = p.chromium.launch()
-                    page = browser.new_page()
-                    page.goto(url, wait_until='domcontentloaded', timeout=60000)
-                    page.wait_for_timeout(2000)
-                    items = page.query_selector_all('.album__list-item.js_album_item')
-                    for item in items:
-                        link = item.get_attribute('data-link')
-                        title = item.query_selector('.album__item-title')
-                        title_text = title.inner_text().strip() if title else ''
-                        if link:
-                            links.append(link)
-                            titles.append(title_text)
-                    total_links = len(links)
-                    browser.close()
+                pool = get_browser_pool()
+                found_text = st.empty()
+                state = {"found": 0}
+                def render_found():
+                    found_text.text(f"已发现 {state['found']} 个文章链接，继续向下加载...")
+                links, titles = pool.run(collect_album_links(pool, url, state), on_tick=render_found)
+                found_text.empty()
+                total_links = len(links)
                 st.session_state['wechat_links'] = links
                 st.session_state['wechat_titles'] = titles
                 st.session_state['wechat_total_links'] = total_links
@@ -49,44 +49,27 @@ def wechat_links_main():
         csv_links = df_links.to_csv(index=False).encode()
         st.download_button('下载所有链接CSV', csv_links, 'wechat_links.csv', 'text/csv')
         max_links_to_download = st.number_input('请输入您想要下载的链接数量（0为全部）：', min_value=0, value=total_links, step=1)
-        max_concurrent = st.number_input('最大并发数', min_value=1, max_value=20, value=5, step=1)
-        if st.button('开始爬取内容'):
+        max_concurrent = st.number_input('最大总并发数', min_value=1, max_value=50, value=10, step=1, key='wechat_max_concurrent')
+        host_max, host_rate = scheduler_options('wechat')
+        dedup = dedup_options('wechat')
+        max_wait_s = st.number_input('单页最长等待秒数（正文出现即提前结束）', min_value=1, max_value=60, value=DEFAULT_MAX_WAIT_MS // 1000, step=1, key='wechat_max_wait')
+        block_assets = st.checkbox('拦截图片、字体、视频和统计脚本（加快抓取、节省流量）', value=True, key='wechat_block_assets')
+        use_cache = st.checkbox('使用本地缓存（24 小时内抓过的链接直接复用结果）', value=True, key='wechat_use_cache')
+        archive = st.checkbox('存入本地文章库（可在“文章库检索”中全文搜索）', value=False, key='wechat_archive')
+        total = min(max_links_to_download, len(links)) if max_links_to_download > 0 else len(links)
+        job_id = job_id_for('wechat', links[:total])
+        resume = resume_option(job_id, key='wechat_resume')
+        if st.button('开始爬取内容', disabled=job_running('wechat_crawl_job')):
             st.info('正在批量爬取内容，请耐心等待...')
-            results = [None] * (max_links_to_download if max_links_to_download > 0 else len(links))
-            progress_bar = st.progress(0)
-            progress_text = st.empty()
-            async def fetch_one(browser, url, title):
-                page = await browser.new_page(user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-                try:
-                    await page.goto(url, wait_until="domcontentloaded", timeout=60000)
-                    await page.wait_for_timeout(3000)
-                    content = await page.content()
-                    cleaned = clean_content(content)
-                    return {"标题": title, "链接": url, "内容": cleaned}
-                except Exception as e:
-                    return {"标题": title, "链接": url, "内容": f"抓取失败: {e}"}
-                finally:
-                    await page.close()
-            async def run_scrape_tasks():
-                async with async_playwright() as p:
-                    browser = await p.chromium.launch()
-                    sem = asyncio.Semaphore(max_concurrent)
-                    finished = 0
-                    total = max_links_to_download if max_links_to_download > 0 else len(links)
-                    async def sem_fetch(idx):
-                        nonlocal finished
-                        async with sem:
-                            res = await fetch_one(browser, links[idx], titles[idx])
-                            results[idx] = res
-                            finished += 1
-                            percent = int(finished/total*100)
-                            progress_bar.progress(percent, text=f"已完成 {finished}/{total} 篇（{percent}%）")
-                            progress_text.text(f"正在爬取第 {finished} 篇：{titles[idx]}")
-                    await asyncio.gather(*(sem_fetch(idx) for idx in range(total)))
-                    await browser.close()
-            asyncio.run(run_scrape_tasks())
-            st.session_state['wechat_crawl_results'] = pd.DataFrame(results)
-        if 'wechat_crawl_results' in st.session_state:
-            df_results = st.session_state['wechat_crawl_results']
-            st.success('已加载上次批量爬取结果。')
-            show_results(df_results, preview_count=3, file_name='wechat_scrape_results.csv') 
\ No newline at end of file
+            fetch_kwargs = {
+                "max_wait_ms": max_wait_s * 1000,
+                "stats": {},
+                "blocker": DEFAULT_BLOCKER if block_assets else None,
+                "cache": get_fetch_cache() if use_cache else None,
+                "scheduler": HostScheduler(max_total=max_concurrent, host_max=host_max, host_rate=host_rate),
+                "timings": CrawlTimings(),
+            }
+            start_batch_crawl('wechat_crawl_job', 'wechat', job_id, links[:total], titles[:total], max_concurrent, fetch_kwargs, resume, dedup, archive)
+        job = job_panel('wechat_crawl_job')
+        if job is not None and job.status == JOB_DONE:
+            show_batch_result(job.result, file_name='wechat_scrape_results.csv')